@@ -17,15 +17,15 @@ AirPiano GUI (Tkinter + OpenCV + MediaPipe + MIDI + Particle Effects)
 """
 
 from __future__ import annotations
-import os, sys, time, math, random, threading, traceback
+import os, sys, time, math, random, threading, traceback, hashlib, zipfile
 from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Set
 from pathlib import Path
 
 import cv2
 import numpy as np
-import pandas as pd
 import mido
+# pandas는 CSV를 직접 파싱할 때만 import (스냅샷이 있으면 키오스크 시작 시 생략)
 
 # GUI
 import tkinter as tk
@@ -41,6 +41,9 @@ DEBUG = True
 # CSV paths (상대경로 그대로)
 CHORD_CSV_PATH = 'chord.CSV'
 PROG_CSV_PATH  = 'progression.CSV'
+# CSV 옆에 컴파일된 스냅샷(<CSV>.npz)을 두고 CSV가 그대로면 그것을 읽는다
+USE_CSV_SNAPSHOT = True
+SNAPSHOT_VERSION = 1
 
 # Window / Camera
 MIRROR = True        # 좌우 반전 (기존 행동 유지)
@@ -69,6 +72,9 @@ SMOOTH_ALPHA = 0.35
 FINGER_PRESS_DEG   = 165  # <= press
 FINGER_RELEASE_DEG = 175  # >= release
 USE_THUMB = True
+# True: MediaPipe z(손목 기준 상대 깊이)까지 넣어 3D 관절 각도로 판정 (카메라 쪽으로 굽힌 손가락도 감지,
+# 각도 분포가 달라지므로 PRESS/RELEASE 각도는 다시 맞출 것)
+USE_Z = False
 
 # Windows
 SIMUL_WINDOW_MS = 100
@@ -98,6 +104,7 @@ GRAVITY = 40.0                  # 약한 중력(아래 방향 +y)
 _PREFERRED_ENCODINGS = ['utf-8-sig', 'cp949', 'euc-kr', 'cp932', 'utf-16', 'latin1']
 
 def read_csv_headerless(path: str) -> pd.DataFrame:
+    import pandas as pd
     last = None
     for enc in _PREFERRED_ENCODINGS:
         try:
@@ -109,20 +116,124 @@ def read_csv_headerless(path: str) -> pd.DataFrame:
             last = e
     raise last if last else RuntimeError(f"Failed to read CSV: {path}")
 
+def _is_blank(x) -> bool:
+    """pandas 결측값(NaN/None)"""
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
 def norm_tag(x) -> str:
-    if pd.isna(x):
+    if _is_blank(x):
         return ''
     s = str(x).strip().upper()
     if s in LEGACY_TO_T:
         return 'T'
     return s
 
+# ===================== CSV Snapshots =====================
+# 태그 설정이 바뀌면 컴파일 결과도 달라지므로 스냅샷 키에 포함
+_SNAPSHOT_CONFIG = repr((SNAPSHOT_VERSION, sorted(POLY_TAGS), sorted(MONO_TAGS), sorted(FORBID_TAGS),
+                         sorted(LEGACY_TO_T)))
+
+def snapshot_path(csv_path: str) -> Path:
+    return Path(f"{csv_path}.npz")
+
+def _file_sha1(path: str) -> str:
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+def save_snapshot(csv_path: str, arrays: dict, sha1: Optional[str] = None):
+    """CSV의 크기/mtime/내용 해시와 함께 배열 저장 (쓰기 실패는 무시 - 다음 실행도 CSV 사용)"""
+    st = os.stat(csv_path)
+    meta = dict(config=np.array(_SNAPSHOT_CONFIG), size=np.array(st.st_size), mtime_ns=np.array(st.st_mtime_ns),
+                sha1=np.array(sha1 or _file_sha1(csv_path)))
+    target = snapshot_path(csv_path)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays, **meta)
+        os.replace(tmp, target)
+    except OSError as e:
+        print(f"[CSV] Snapshot not written ({target}): {e}", flush=True)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+def load_snapshot(csv_path: str) -> Optional[dict]:
+    """CSV가 스냅샷을 만든 때와 같으면 배열 dict, 아니면 None
+
+    크기/mtime이 같으면 그대로 쓰고, 다르면 내용 해시를 비교한다
+    (복사/체크아웃으로 mtime만 바뀐 경우 해시가 같으면 서명만 갱신)
+    """
+    try:
+        with np.load(snapshot_path(csv_path), allow_pickle=False) as z:
+            data = {k: z[k] for k in z.files}
+        st = os.stat(csv_path)
+        if str(data.pop('config')) != _SNAPSHOT_CONFIG:
+            return None
+        size, mtime_ns, sha1 = int(data.pop('size')), int(data.pop('mtime_ns')), str(data.pop('sha1'))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+        if _file_sha1(csv_path) != sha1:
+            return None
+        save_snapshot(csv_path, data, sha1)
+    if DEBUG:
+        print(f"[CSV] Loaded {csv_path} from snapshot {snapshot_path(csv_path)}", flush=True)
+    return data
+
+# 12비트 음이름 마스크 → 오름차순 음이름 튜플 (4096가지, 조회 결과로 그대로 반환)
+PCS_OF_MASK: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(pc for pc in range(12) if mask >> pc & 1) for mask in range(1 << 12)
+)
+
+def tag_mask(tags: List[str], tag_set: Set[str]) -> int:
+    """12개 음이름 태그 중 tag_set에 속하는 음이름 비트마스크"""
+    mask = 0
+    for pc, tag in enumerate(tags):
+        if tag in tag_set:
+            mask |= 1 << pc
+    return mask
+
 class ChordTables:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df
+    """chord.CSV 코드 표 - 로드 시 정수 코드 ID + 태그 종류별 12비트 마스크로 컴파일
+
+    ids[코드 이름] → 코드 ID, poly/mono/forbid/root[코드 ID] → 음이름 비트마스크
+    프레임 루프의 allowed_pcs()/bass_pc_of()는 pandas 조회 없이 dict 한 번 + 비트 연산으로 끝나고,
+    결과는 미리 만든 음이름 튜플을 그대로 돌려준다 (호출 쪽에서 수정하지 말 것)
+    """
+
+    def __init__(self, names: List[str], poly: List[int], mono: List[int], forbid: List[int], root: List[int],
+                 df: Optional[pd.DataFrame] = None):
+        self.df = df  # 디버깅/벤치마크용 원본 (CSV에서 읽었을 때만, row())
+        self.names: List[str] = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.poly, self.mono, self.forbid, self.root = (
+            [int(m) for m in masks] for masks in (poly, mono, forbid, root))
+        # 코드 ID → 허용 음이름 튜플 (금지 태그 우선), 근음(가장 낮은 '1')
+        self.allowed = {
+            False: [PCS_OF_MASK[m & ~f] for m, f in zip(self.poly, self.forbid)],
+            True:  [PCS_OF_MASK[m & ~f] for m, f in zip(self.mono, self.forbid)],
+        }
+        self.root_pc: List[Optional[int]] = [(r & -r).bit_length() - 1 if r else None for r in self.root]
+        # 진행표의 코드 이름(슬래시 포함) → (코드 ID 또는 -1, 베이스 음이름) 메모
+        self._resolved: dict = {}
 
     @staticmethod
-    def load(chord_csv_path: str) -> 'ChordTables':
+    def from_frame(df: pd.DataFrame) -> 'ChordTables':
+        tags = [[row[col] for col in NOTE_NAMES] for row in df.to_dict('records')]
+        return ChordTables([str(n) for n in df.index],
+                           [tag_mask(t, POLY_TAGS) for t in tags],
+                           [tag_mask(t, MONO_TAGS) for t in tags],
+                           [tag_mask(t, FORBID_TAGS) for t in tags],
+                           [tag_mask(t, {'1'}) for t in tags],
+                           df=df)
+
+    @staticmethod
+    def load(chord_csv_path: str, use_snapshot: bool = USE_CSV_SNAPSHOT) -> 'ChordTables':
+        if use_snapshot:
+            snap = load_snapshot(chord_csv_path)
+            if snap is not None:
+                return ChordTables(snap['names'].tolist(), snap['poly'].tolist(), snap['mono'].tolist(),
+                                   snap['forbid'].tolist(), snap['root'].tolist())
         raw = read_csv_headerless(chord_csv_path)
         if raw.shape[1] < 13:
             raise ValueError("chord.CSV needs 13 columns (name + 12 PCs).")
@@ -137,36 +248,126 @@ class ChordTables:
         df = df.drop_duplicates(subset=['Chord'], keep='first').set_index('Chord')
         if DEBUG:
             print(f"[CSV] chord.CSV unique chords: {len(df.index)}", flush=True)
-        return ChordTables(df)
+        tables = ChordTables.from_frame(df)
+        if use_snapshot:
+            save_snapshot(chord_csv_path, {
+                'names': np.array(tables.names, dtype=str),
+                'poly': np.array(tables.poly, dtype=np.uint16),
+                'mono': np.array(tables.mono, dtype=np.uint16),
+                'forbid': np.array(tables.forbid, dtype=np.uint16),
+                'root': np.array(tables.root, dtype=np.uint16),
+            })
+        return tables
+
+    def resolve(self, chord_name: str) -> Tuple[int, Optional[int]]:
+        """코드 이름 → (코드 ID, 없으면 -1; 베이스 음이름 - 슬래시 베이스 우선, 없으면 근음)"""
+        hit = self._resolved.get(chord_name)
+        if hit is None:
+            base, slash = (chord_name.split('/', 1) + [None])[:2]
+            cid = self.ids.get(base.strip(), -1)
+            if slash:
+                bass = NAME2PC.get(slash)
+            else:
+                bass = self.root_pc[cid] if cid >= 0 else None
+            hit = self._resolved[chord_name] = (cid, bass)
+        return hit
 
     def row(self, chord_name: str) -> Optional[pd.Series]:
+        """원본 DataFrame 행 (use_snapshot=False로 CSV에서 읽었을 때만)"""
+        import pandas as pd
         base = chord_name.split('/', 1)[0].strip()
         if base in self.df.index:
             r = self.df.loc[base]
             return r if not isinstance(r, pd.DataFrame) else r.iloc[0]
         return None
 
-def load_progressions(path: str) -> List[dict]:
+class ProgressionStore:
+    """progression.CSV 진행 전체를 평탄한 NumPy 배열로 (로드 시 1회 토큰화 + 코드 해석)
+
+    진행 i의 스텝은 [offsets[i], offsets[i+1]) 구간이고, 스텝마다
+        tokens    int32 - 코드 이름 어휘(symbols) 번호 (같은 코드가 이어지는지 비교용)
+        chord_ids int16 - ChordTables 코드 ID (-1: chord.CSV에 없음)
+        bass_pcs  int8  - 베이스 음이름 (슬래시 베이스 우선, 없으면 근음; -1: 없음)
+    무작위 선택/스텝 진행은 정수 인덱스만 다루고, at()은 배열의 memoryview에서 파이썬 int를 바로 읽는다
+    """
+
+    def __init__(self, names: List[str], symbols: List[str], tokens: np.ndarray, offsets: np.ndarray,
+                 tables: ChordTables):
+        self.names = names
+        self.symbols = symbols
+        self.tokens = tokens
+        self.offsets = offsets
+        self.lengths = np.diff(offsets).astype(np.int32)
+        resolved = [tables.resolve(sym) for sym in symbols]
+        sym_ids = np.array([cid for cid, _ in resolved], dtype=np.int16)
+        sym_bass = np.array([-1 if bass is None else bass for _, bass in resolved], dtype=np.int8)
+        self.chord_ids = sym_ids[tokens]
+        self.bass_pcs = sym_bass[tokens]
+        self.unknown = [sym for sym, (cid, _) in zip(symbols, resolved) if cid < 0]
+        # 스칼라 조회용 memoryview (복사 없이 파이썬 int 반환, ndarray.item()보다 빠름)
+        self._offsets, self._lengths = memoryview(self.offsets), memoryview(self.lengths)
+        self._tokens, self._chord_ids, self._bass_pcs = (memoryview(self.tokens), memoryview(self.chord_ids),
+                                                         memoryview(self.bass_pcs))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def length(self, prog: int) -> int:
+        return self._lengths[prog]
+
+    def at(self, prog: int, step: int) -> Tuple[int, int, int]:
+        """(토큰, 코드 ID, 베이스 음이름) - 스텝은 진행 길이로 감는다"""
+        pos = self._offsets[prog] + step % self._lengths[prog]
+        return self._tokens[pos], self._chord_ids[pos], self._bass_pcs[pos]
+
+def _parse_progressions(path: str) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+    """progression.CSV → (진행 이름, 코드 이름 어휘, 스텝별 토큰, 진행별 시작 오프셋)"""
     raw = read_csv_headerless(path)
-    progs = []
+    names: List[str] = []
+    symbols: List[str] = []
+    vocab: dict = {}
+    tokens: List[int] = []
+    offsets = [0]
     for i in range(len(raw)):
         row = raw.iloc[i].tolist()
         name = str(row[0]).strip() if str(row[0]).strip() else f"Row{i}"
-        seq = []
+        start = len(tokens)
         for x in row[1:33]:  # 최대 32스텝
-            if pd.isna(x):
+            if _is_blank(x):
                 continue
             s = str(x).strip()
             if not s or s.lower() == 'nan':
                 continue
-            seq.append(s)
-        if seq:
-            progs.append({'name': name, 'seq': seq})
+            if s not in vocab:
+                vocab[s] = len(symbols)
+                symbols.append(s)
+            tokens.append(vocab[s])
+        if len(tokens) > start:
+            names.append(name)
+            offsets.append(len(tokens))
+    return names, symbols, np.array(tokens, dtype=np.int32), np.array(offsets, dtype=np.int32)
+
+def load_progressions(path: str, tables: ChordTables, use_snapshot: bool = USE_CSV_SNAPSHOT) -> ProgressionStore:
+    snap = load_snapshot(path) if use_snapshot else None
+    if snap is not None:
+        names, symbols = snap['names'].tolist(), snap['symbols'].tolist()
+        tokens, offsets = snap['tokens'], snap['offsets']
+    else:
+        names, symbols, tokens, offsets = _parse_progressions(path)
+        if use_snapshot:
+            save_snapshot(path, {'names': np.array(names, dtype=str), 'symbols': np.array(symbols, dtype=str),
+                                 'tokens': tokens, 'offsets': offsets})
+    store = ProgressionStore(names, symbols, tokens, offsets, tables)
+    if store.unknown:
+        # chord.CSV에 없는 코드는 그 스텝에서 소리가 나지 않는다 (슬래시 베이스만 있으면 베이스만)
+        missing = int((store.chord_ids < 0).sum())
+        print(f"[CSV] Unknown chords ({len(store.unknown)} names, {missing} steps): {sorted(store.unknown)}", flush=True)
     if DEBUG:
-        print(f"[CSV] progression.CSV rows loaded: {len(progs)}", flush=True)
-        if progs:
-            print(f"[CSV] progression[0]: name={progs[0]['name']}, first4={progs[0]['seq'][:4]}", flush=True)
-    return progs
+        print(f"[CSV] progression.CSV rows loaded: {len(store)} ({len(store.tokens)} steps, {len(symbols)} chord names)", flush=True)
+        if len(store):
+            first4 = [symbols[t] for t in store.tokens[:min(4, store.length(0))]]
+            print(f"[CSV] progression[0]: name={store.names[0]}, first4={first4}", flush=True)
+    return store
 
 # ===================== Music helpers =====================
 HAND_FINGERS = [(5,6,8),(9,10,12),(13,14,16),(17,18,20)]
@@ -174,31 +375,34 @@ if USE_THUMB:
     HAND_FINGERS = [(2,3,4)] + HAND_FINGERS
 _FINGER_COUNT = len(HAND_FINGERS)
 
-def allowed_pcs(name: str, tables: ChordTables, mono: bool, exclude: Optional[int]=None) -> List[int]:
-    row = tables.row(name)
-    if row is None:
-        return []
-    tags = MONO_TAGS if mono else POLY_TAGS
-    pcs = []
-    for pc, col in enumerate(NOTE_NAMES):
-        tag = row[col]
-        if tag in FORBID_TAGS:
-            continue
-        if tag in tags and (exclude is None or pc != exclude):
-            pcs.append(pc)
-    return pcs
+def finger_angles(landmarks, use_z: bool = USE_Z) -> List[float]:
+    """손 하나의 MediaPipe 랜드마크 → 손가락별 PIP 관절 각도(도), 180≈펴짐, 길이가 0인 뼈는 0도
+
+    손 2개 x 손가락 5개뿐이라 NumPy 배열로 옮기는 비용이 계산보다 커서 math로 직접 계산한다
+    """
+    angles = []
+    for mcp, pip, tip in HAND_FINGERS:
+        a, b, c = landmarks[mcp], landmarks[pip], landmarks[tip]
+        x1, y1, x2, y2 = a.x - b.x, a.y - b.y, c.x - b.x, c.y - b.y
+        dot, n1, n2 = x1*x2 + y1*y2, x1*x1 + y1*y1, x2*x2 + y2*y2
+        if use_z:
+            z1, z2 = a.z - b.z, c.z - b.z
+            dot += z1*z2; n1 += z1*z1; n2 += z2*z2
+        norm = math.sqrt(n1) * math.sqrt(n2)
+        angles.append(0.0 if norm == 0 else math.degrees(math.acos(max(-1.0, min(1.0, dot/norm)))))
+    return angles
+
+def allowed_pcs(name: str, tables: ChordTables, mono: bool, exclude: Optional[int]=None) -> Tuple[int, ...]:
+    cid = tables.resolve(name)[0]
+    if cid < 0:
+        return ()
+    if exclude is None:
+        return tables.allowed[mono][cid]
+    mask = (tables.mono if mono else tables.poly)[cid] & ~tables.forbid[cid]
+    return PCS_OF_MASK[mask & ~(1 << exclude)]
 
 def bass_pc_of(name: str, tables: ChordTables) -> Optional[int]:
-    base, slash = (name.split('/', 1) + [None])[:2]
-    if slash:
-        return NAME2PC.get(slash)
-    row = tables.row(base)
-    if row is None:
-        return None
-    for pc, col in enumerate(NOTE_NAMES):
-        if row[col] == '1':
-            return pc
-    return None
+    return tables.resolve(name)[1]
 
 def x_to_center(x: float, low: int, high: int) -> int:
     x = max(0.0, min(1.0, x))
@@ -287,11 +491,11 @@ class GS:
     right: HandState
     prog_idx: int = 0
     step: int = 0
-    last_chord: str = ''
+    last_token: int = -1
     bass_once: bool = False
     first_press_t: Optional[float] = None
     prev_total_down: int = 0
-    progs: list = field(default_factory=list)
+    progs: ProgressionStore = None
     tables: ChordTables = None
     out: mido.ports.BaseOutput = None
     running: bool = True
@@ -355,10 +559,12 @@ def render_particles(frame: np.ndarray, particles: List[Particle]):
     cv2.addWeighted(overlay, 0.35, frame, 0.65, 0, frame)
 
 # ===================== Core Apply =====================
-def choose_pcs(gs: GS, h: HandState, chord: str) -> List[int]:
+def choose_pcs(gs: GS, h: HandState, chord_id: int) -> List[int]:
+    if chord_id < 0:
+        return []
     n = h.pressed_now if h.pressed_now > 0 else 1
     mono = (n == 1)
-    pcs = allowed_pcs(chord, gs.tables, mono)
+    pcs = gs.tables.allowed[mono][chord_id]
     if not pcs:
         return []
     k = min(n, len(pcs))
@@ -443,11 +649,14 @@ class AirPianoApp:
         # MIDI
         self.out = open_out()
 
-        # CSV
+        # CSV (스냅샷이 최신이면 pandas 없이 바로 로드)
+        t_csv = time.perf_counter()
         self.tables = ChordTables.load(CHORD_CSV_PATH)
-        self.progs  = load_progressions(PROG_CSV_PATH)
+        self.progs  = load_progressions(PROG_CSV_PATH, self.tables)
         if not self.progs:
             raise RuntimeError("No progressions loaded from progression.CSV")
+        print(f"[BOOT] Chord/progression tables ready in {(time.perf_counter() - t_csv) * 1000:.0f} ms"
+              f" (pandas {'used' if 'pandas' in sys.modules else 'not loaded'})", flush=True)
 
         idx = random.randrange(len(self.progs))
         self.gs = GS(
@@ -489,7 +698,7 @@ class AirPianoApp:
         with self.gs.lock:
             self.gs.prog_idx = random.randrange(len(self.gs.progs))
             self.gs.step = 0
-            self.gs.last_chord = ''
+            self.gs.last_token = -1
             self.gs.bass_once = False
         if DEBUG:
             print("[UI] 분위기 전환: progression 재선택", flush=True)
@@ -541,9 +750,7 @@ class AirPianoApp:
                 break
             t0 = time.time()
             with self.gs.lock:
-                seq = self.gs.progs[self.gs.prog_idx]['seq']
-                if seq:
-                    self.gs.step = (self.gs.step + STEPS_PER_BEAT) % len(seq)
+                self.gs.step = (self.gs.step + STEPS_PER_BEAT) % self.gs.progs.length(self.gs.prog_idx)
             dt = time.time() - t0
             time.sleep(max(0.0, BEAT_SEC - dt))
 
@@ -608,9 +815,9 @@ class AirPianoApp:
                     # (디버그 라인 그리기 원하면 주석 해제)
                     # self.drawer.draw_landmarks(frame, lm, self.mp_hands.HAND_CONNECTIONS)
 
-                    pts = [(p.x, p.y) for p in lm.landmark]
+                    pts = lm.landmark
                     # wrist smoothing
-                    w0 = pts[0]
+                    w0 = (pts[0].x, pts[0].y)
                     if hstate.ema is None:
                         hstate.ema = w0
                     else:
@@ -622,15 +829,7 @@ class AirPianoApp:
                     # press detection with hysteresis & edge trigger
                     down_cnt = 0
                     press_now = 0
-                    for idx_f, (mcp, pip, tip) in enumerate(HAND_FINGERS):
-                        a, b, c = pts[mcp], pts[pip], pts[tip]
-                        v1 = (a[0]-b[0], a[1]-b[1]); v2 = (c[0]-b[0], c[1]-b[1])
-                        dot = v1[0]*v2[0] + v1[1]*v2[1]
-                        n1 = math.hypot(*v1); n2 = math.hypot(*v2)
-                        ang = 0.0 if (n1==0 or n2==0) else math.degrees(
-                            math.acos(max(-1.0, min(1.0, dot/(n1*n2))))
-                        )
-
+                    for idx_f, ang in enumerate(finger_angles(pts)):
                         was = hstate.finger_down[idx_f]
                         now_down = was
                         if was:
@@ -641,9 +840,9 @@ class AirPianoApp:
                                 now_down = True
                                 press_now += 1
                                 # 손가락 tip 좌표에 파티클 스폰 (카메라 프레임 좌표로 변환)
-                                tip_pt = pts[tip]
-                                px = int(tip_pt[0] * w)
-                                py = int(tip_pt[1] * h)
+                                tip_pt = pts[HAND_FINGERS[idx_f][2]]
+                                px = int(tip_pt.x * w)
+                                py = int(tip_pt.y * h)
                                 if not self.gs.paused:
                                     # 한 번에 너무 많이 생성되지 않도록 조절
                                     spawn_particles(self.particles, px, py, n=random.randint(6, 12), scale=1.0)
@@ -656,15 +855,15 @@ class AirPianoApp:
                     hstate.pressed_now = press_now
 
             # Chord & step
-            seq = self.gs.progs[self.gs.prog_idx]['seq']
-            chord = seq[self.gs.step % len(seq)] if seq else ''
-            chord_changed = (chord != self.gs.last_chord)
+            token, chord_id, bass_pc = self.gs.progs.at(self.gs.prog_idx, self.gs.step)
+            chord_changed = (token != self.gs.last_token)
 
             if chord_changed:
-                self.gs.last_chord = chord
+                self.gs.last_token = token
                 self.gs.bass_once = False
                 if DEBUG:
-                    print(f"[BEAT] Beat={self.gs.step+1}/{len(seq)} chord='{chord}'", flush=True)
+                    steps = self.gs.progs.length(self.gs.prog_idx)
+                    print(f"[BEAT] Beat={self.gs.step+1}/{steps} chord='{self.gs.progs.symbols[token]}'", flush=True)
 
             # re-sample pcs on new press
             for hstate in (self.gs.left, self.gs.right):
@@ -673,7 +872,7 @@ class AirPianoApp:
                     hstate.pcs = []
                     continue
                 if (hstate.prev_down == 0 and hstate.down > 0) or (hstate.pressed_now > 0):
-                    hstate.pcs = choose_pcs(self.gs, hstate, chord)
+                    hstate.pcs = choose_pcs(self.gs, hstate, chord_id)
                     if DEBUG and hstate.pcs:
                         print(f"[PICK] {hstate.label} down={hstate.down} pressed_now={hstate.pressed_now} pcs={hstate.pcs}", flush=True)
                 hstate.prev_down = hstate.down
@@ -694,10 +893,10 @@ class AirPianoApp:
                and (self.gs.prev_total_down < 2 and total >= 2) \
                and (self.gs.first_press_t is not None) \
                and ((now2 - self.gs.first_press_t) <= (SIMUL_WINDOW_MS/1000.0)):
-                extra_bass_pc = bass_pc_of(chord, self.gs.tables)
+                extra_bass_pc = bass_pc if bass_pc >= 0 else None
                 self.gs.bass_once = True
                 if DEBUG:
-                    print(f"[BASS] Fired once for chord '{chord}' (pc={extra_bass_pc})", flush=True)
+                    print(f"[BASS] Fired once for chord '{self.gs.progs.symbols[token]}' (pc={extra_bass_pc})", flush=True)
 
             # Apply (MIDI)
             apply_hand(self.gs, self.gs.left, extra_bass_pc)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AirPiano 마이크로 벤치마크 (airpiano_gui.py와 같은 폴더에서 실행, chord.CSV / progression.CSV 필요)
+
+chords:       프레임 루프의 코드 조회 비용 - 예전 pandas row() 조회 vs 컴파일된 ChordTables
+              (한 프레임 = 양손 allowed_pcs() + bass_pc_of() 한 번씩, 진행표의 실제 코드 이름 사용)
+progressions: 분위기 전환(무작위 진행 선택) + 박자 진행 + 프레임마다 현재 코드 해석 비용
+              - 코드 이름 리스트를 매번 해석 vs ProgressionStore 정수 배열
+fingers:      손가락 관절 각도 + 누름/뗌 히스테리시스 - 예전 math 루프 vs finger_angles() (2D/3D)
+              vs (손, 21, 3) NumPy 배열 한 번에 (MediaPipe 랜드마크 객체를 흉내 낸 무작위 손 2개)
+startup:      새 프로세스에서 chord.CSV + progression.CSV 로드 시간 (pandas import 포함)
+              - CSV 직접 파싱 vs 스냅샷(<CSV>.npz) 생성 vs 스냅샷 사용
+
+사용법:
+    python benchmark.py chords --frames 20000
+    python benchmark.py progressions --frames 200000
+    python benchmark.py fingers --frames 5000 --repeat 5
+    python benchmark.py startup --runs 5
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+
+import airpiano_gui as ap
+
+
+# ---------- 예전 구현 (비교 기준) ----------
+def legacy_allowed_pcs(name: str, tables: ap.ChordTables, mono: bool) -> List[int]:
+    row = tables.row(name)
+    if row is None:
+        return []
+    tags = ap.MONO_TAGS if mono else ap.POLY_TAGS
+    pcs = []
+    for pc, col in enumerate(ap.NOTE_NAMES):
+        tag = row[col]
+        if tag in ap.FORBID_TAGS:
+            continue
+        if tag in tags:
+            pcs.append(pc)
+    return pcs
+
+
+def legacy_bass_pc_of(name: str, tables: ap.ChordTables) -> Optional[int]:
+    base, slash = (name.split('/', 1) + [None])[:2]
+    if slash:
+        return ap.NAME2PC.get(slash)
+    row = tables.row(base)
+    if row is None:
+        return None
+    for pc, col in enumerate(ap.NOTE_NAMES):
+        if row[col] == '1':
+            return pc
+    return None
+
+
+def time_frames(chords, allowed, bass, tables):
+    """프레임마다 양손 조회 → 프레임당 µs"""
+    start = time.perf_counter()
+    for chord in chords:
+        allowed(chord, tables, True)
+        allowed(chord, tables, False)
+        bass(chord, tables)
+    return (time.perf_counter() - start) / len(chords) * 1e6
+
+
+def bench_chords(args):
+    tables = ap.ChordTables.load(ap.CHORD_CSV_PATH, use_snapshot=False)  # row()에 원본 DataFrame 필요
+    store = ap.load_progressions(ap.PROG_CSV_PATH, tables)
+    rng = random.Random(0)
+    chords = [store.symbols[rng.choice(store.tokens)] for _ in range(args.frames)]
+
+    # 결과가 같은지 먼저 확인
+    for chord in set(chords):
+        for mono in (False, True):
+            assert list(ap.allowed_pcs(chord, tables, mono)) == legacy_allowed_pcs(chord, tables, mono), chord
+        assert ap.bass_pc_of(chord, tables) == legacy_bass_pc_of(chord, tables), chord
+
+    legacy_frames = chords[:max(1, args.frames // 20)]  # 예전 구현은 느리므로 일부만
+    before = time_frames(legacy_frames, legacy_allowed_pcs, legacy_bass_pc_of, tables)
+    after = time_frames(chords, ap.allowed_pcs, ap.bass_pc_of, tables)
+    print(f"[BENCH] {len(set(chords))} distinct chords, {len(tables.names)} in chord.CSV")
+    print(f"[BENCH] pandas row():  {before:9.2f} µs/frame ({len(legacy_frames)} frames)")
+    print(f"[BENCH] ChordTables:   {after:9.2f} µs/frame ({len(chords)} frames)")
+    print(f"[BENCH] {before / after:.0f}x faster")
+
+
+def bench_progressions(args):
+    tables = ap.ChordTables.load(ap.CHORD_CSV_PATH)
+    store = ap.load_progressions(ap.PROG_CSV_PATH, tables)
+    # 예전 형태: 진행마다 코드 이름 리스트
+    seqs = [[store.symbols[t] for t in store.tokens[a:b]] for a, b in zip(store.offsets[:-1], store.offsets[1:])]
+    frames, beat_every, change_every = args.frames, 6, 500  # 약 60fps, 120BPM 기준 박자마다 6프레임
+
+    def legacy():
+        rng = random.Random(0)
+        prog, step, last = 0, 0, ''
+        for f in range(frames):
+            if f % change_every == 0:
+                prog, step = rng.randrange(len(seqs)), 0
+            elif f % beat_every == 0:
+                step = (step + 1) % len(seqs[prog])
+            seq = seqs[prog]
+            chord = seq[step % len(seq)]
+            if chord != last:
+                last = chord
+            ap.allowed_pcs(chord, tables, True)
+            ap.bass_pc_of(chord, tables)
+
+    def compiled():
+        rng = random.Random(0)
+        prog, step, last = 0, 0, -1
+        allowed = tables.allowed[True]
+        for f in range(frames):
+            if f % change_every == 0:
+                prog, step = rng.randrange(len(store)), 0
+            elif f % beat_every == 0:
+                step = (step + 1) % store.length(prog)
+            token, chord_id, bass_pc = store.at(prog, step)
+            if token != last:
+                last = token
+            if chord_id >= 0:
+                allowed[chord_id]
+
+    # 예전 경로는 ChordTables.resolve()의 이름 메모를 그대로 쓰므로 분할/조회 비용만 비교된다
+    results = {}
+    for label, fn in (('chord names', legacy), ('ProgressionStore', compiled)):
+        start = time.perf_counter()
+        fn()
+        results[label] = (time.perf_counter() - start) / frames * 1e9
+    print(f"[BENCH] {len(store)} progressions, {len(store.tokens)} steps, "
+          f"{store.tokens.nbytes + store.chord_ids.nbytes + store.bass_pcs.nbytes + store.offsets.nbytes:,} bytes of arrays")
+    for label, ns in results.items():
+        print(f"[BENCH] {label:17s} {ns:8.0f} ns/frame")
+
+
+def legacy_finger_update(lm, finger_down: List[bool]):
+    """예전 _process_hands_and_music의 손 하나 처리 → (down 수, 새로 눌린 수)"""
+    pts = [(p.x, p.y) for p in lm.landmark]
+    down_cnt = press_now = 0
+    for idx_f, (mcp, pip, tip) in enumerate(ap.HAND_FINGERS):
+        a, b, c = pts[mcp], pts[pip], pts[tip]
+        v1 = (a[0]-b[0], a[1]-b[1]); v2 = (c[0]-b[0], c[1]-b[1])
+        dot = v1[0]*v2[0] + v1[1]*v2[1]
+        n1 = math.hypot(*v1); n2 = math.hypot(*v2)
+        ang = 0.0 if (n1 == 0 or n2 == 0) else math.degrees(math.acos(max(-1.0, min(1.0, dot/(n1*n2)))))
+        was = finger_down[idx_f]
+        now_down = was
+        if was:
+            if ang >= ap.FINGER_RELEASE_DEG:
+                now_down = False
+        elif ang <= ap.FINGER_PRESS_DEG:
+            now_down = True
+            press_now += 1
+        finger_down[idx_f] = now_down
+        down_cnt += now_down
+    return down_cnt, press_now
+
+
+def fake_hands(rng, frames, hands=2):
+    """프레임마다 손 2개 - 펴진 손가락에 굽힘 잡음을 더한 랜드마크 (MediaPipe 객체 모양)"""
+    base = np.stack([np.linspace(0, 1, 21), np.linspace(0, 0.5, 21), np.zeros(21)], axis=1)
+    out = []
+    for _ in range(frames):
+        pts = base + rng.normal(0, 0.02, size=(hands, 21, 3))
+        out.append([SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand.tolist()])
+                    for hand in pts])
+    return out
+
+
+def finger_update(lm, finger_down: List[bool], use_z=False):
+    """지금 _process_hands_and_music의 손 하나 처리 (finger_angles 사용) → (down 수, 새로 눌린 수)"""
+    down_cnt = press_now = 0
+    for idx_f, ang in enumerate(ap.finger_angles(lm.landmark, use_z)):
+        was = finger_down[idx_f]
+        now_down = was
+        if was:
+            if ang >= ap.FINGER_RELEASE_DEG:
+                now_down = False
+        elif ang <= ap.FINGER_PRESS_DEG:
+            now_down = True
+            press_now += 1
+        finger_down[idx_f] = now_down
+        down_cnt += now_down
+    return down_cnt, press_now
+
+
+_FINGER_JOINTS = np.array(ap.HAND_FINGERS, dtype=np.intp)
+
+
+def numpy_finger_update(hands, down, use_z=False):
+    """비교용: 모든 손을 (손, 21, 3) 배열로 옮겨 각도/히스테리시스를 한 번에 → (새 상태, 새로 눌린 손가락)"""
+    flat = [v for lm in hands for p in lm.landmark for v in (p.x, p.y, p.z)]
+    pts = np.array(flat, dtype=np.float64).reshape(len(hands), 21, 3)
+    joints = pts[:, _FINGER_JOINTS, :3 if use_z else 2]
+    v = joints[:, :, ::2] - joints[:, :, 1:2]
+    dot = (v[:, :, 0] * v[:, :, 1]).sum(-1)
+    norms = np.sqrt((v * v).sum(-1).prod(-1))
+    valid = norms > 0
+    angles = np.where(valid, np.degrees(np.arccos(np.clip(dot / np.where(valid, norms, 1.0), -1.0, 1.0))), 0.0)
+    pressed = ~down & (angles <= ap.FINGER_PRESS_DEG)
+    return (down | pressed) & ~(down & (angles >= ap.FINGER_RELEASE_DEG)), pressed
+
+
+def bench_fingers(args):
+    frames = fake_hands(np.random.default_rng(0), args.frames)
+
+    # 2D 결과가 예전 루프와 같은지 먼저 확인
+    legacy_state = [[False] * ap._FINGER_COUNT for _ in range(2)]
+    state = [[False] * ap._FINGER_COUNT for _ in range(2)]
+    for hands in frames:
+        expected = [legacy_finger_update(lm, legacy_state[i]) for i, lm in enumerate(hands)]
+        assert expected == [finger_update(lm, state[i]) for i, lm in enumerate(hands)]
+
+    def loop(update, **kw):
+        def run():
+            down = [[False] * ap._FINGER_COUNT for _ in range(2)]
+            for hands in frames:
+                for i, lm in enumerate(hands):
+                    update(lm, down[i], **kw)
+        return run
+
+    def vectorized():
+        down = np.zeros((2, ap._FINGER_COUNT), dtype=bool)
+        for hands in frames:
+            down, pressed = numpy_finger_update(hands, down)
+            down.sum(axis=1).tolist(), pressed.sum(axis=1).tolist()
+
+    print(f"[BENCH] {len(frames)} frames x 2 hands x {ap._FINGER_COUNT} fingers")
+    for label, fn in (('old math loop', loop(legacy_finger_update)),
+                      ('finger_angles 2D', loop(finger_update)), ('finger_angles 3D', loop(finger_update, use_z=True)),
+                      ('NumPy arrays 2D', vectorized)):
+        best = float('inf')
+        for _ in range(args.repeat):  # 다른 프로세스 영향이 커서 가장 빠른 회차로 비교
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        print(f"[BENCH] {label:17s} {best / len(frames) * 1e6:7.1f} µs/frame (best of {args.repeat})")
+
+
+STARTUP_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import airpiano_gui as ap
+ap.DEBUG = False
+t1 = time.perf_counter()
+use = sys.argv[1] == '1'
+tables = ap.ChordTables.load(ap.CHORD_CSV_PATH, use_snapshot=use)
+store = ap.load_progressions(ap.PROG_CSV_PATH, tables, use_snapshot=use)
+t2 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'load': t2 - t1, 'pandas': 'pandas' in sys.modules}))
+"""
+
+
+def bench_startup(args):
+    def run(use_snapshot):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET, '1' if use_snapshot else '0'],
+                             capture_output=True, text=True, check=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def remove_snapshots():
+        for csv in (ap.CHORD_CSV_PATH, ap.PROG_CSV_PATH):
+            try:
+                os.remove(ap.snapshot_path(csv))
+            except FileNotFoundError:
+                pass
+
+    results = {'csv': [], 'build snapshot': [], 'snapshot': []}
+    for _ in range(args.runs):
+        results['csv'].append(run(False))
+        remove_snapshots()
+        results['build snapshot'].append(run(True))
+        results['snapshot'].append(run(True))
+    print(f"[BENCH] median of {args.runs} fresh processes (module import incl. cv2/mediapipe measured separately)")
+    for label, runs in results.items():
+        load = statistics.median(r['load'] for r in runs) * 1000
+        imp = statistics.median(r['import'] for r in runs) * 1000
+        pandas = 'pandas' if runs[-1]['pandas'] else 'no pandas'
+        print(f"[BENCH] {label:15s} tables {load:8.1f} ms  ({pandas}; airpiano_gui import {imp:.0f} ms)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='AirPiano micro-benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+    p = sub.add_parser('chords', help='코드 조회 (allowed_pcs / bass_pc_of)')
+    p.add_argument('--frames', type=int, default=20000)
+    p.set_defaults(func=bench_chords)
+    p = sub.add_parser('progressions', help='진행 선택/스텝/코드 해석')
+    p.add_argument('--frames', type=int, default=200000)
+    p.set_defaults(func=bench_progressions)
+    p = sub.add_parser('fingers', help='손가락 각도 + 히스테리시스')
+    p.add_argument('--frames', type=int, default=5000)
+    p.add_argument('--repeat', type=int, default=5)
+    p.set_defaults(func=bench_fingers)
+    p = sub.add_parser('startup', help='CSV vs 스냅샷 시작 시간')
+    p.add_argument('--runs', type=int, default=5)
+    p.set_defaults(func=bench_startup)
+    args = parser.parse_args()
+    args.func(args)
@@ -2,117 +2,293 @@
 # -*- coding: utf-8 -*-
 """
 Wikipedia API를 통해 작곡가 정보 및 이미지 수집
+    - 동시 요청 수 제한 (스레드 풀) + 연결을 재사용하는 requests.Session
+    - 토큰 버킷으로 초당 요청 수 제한, 429/5xx/연결 오류는 지수 백오프로 재시도 (Retry-After 존중)
+    - API 응답은 쿼리 기준으로 디스크에 캐시 (web_app/cache/wiki_api), 중단 후 다시 실행하면 이어서 진행
+    - composer_info.json에 없거나 오래된(--max-age-days) 작곡가만 다시 가져온다
+    - 초상화를 내려받아 크기별 WebP/JPEG 변형을 만든다 (web_app/portraits.py, --no-portraits로 생략)
+
+실행: python fetch_composer_info.py
+      python fetch_composer_info.py --api-url http://127.0.0.1:8900/w/api.php   (로컬 가짜 서버로 테스트,
+      web_app/benchmarks/fake_mediawiki.py)
 """
 
+import argparse
+import hashlib
 import json
-import requests
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import quote
 
-def fetch_wikipedia_info(composer_name):
-    """Wikipedia API로 작곡가 정보 가져오기"""
-    # Wikipedia API 엔드포인트
-    base_url = "https://en.wikipedia.org/w/api.php"
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, str(Path(__file__).parent / 'web_app'))
 
-    # User-Agent 헤더 추가
-    headers = {
-        'User-Agent': 'ClassicalMusicLibrary/1.0 (Educational Project)'
-    }
+import portraits  # noqa: E402
+
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR / 'web_app' / 'static' / 'data'
+CACHE_DIR = BASE_DIR / 'web_app' / 'cache' / 'wiki_api'
+API_URL = "https://en.wikipedia.org/w/api.php"
+USER_AGENT = 'ClassicalMusicLibrary/1.0 (Educational Project)'
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _print(message):
+    try:
+        print(message)
+    except UnicodeEncodeError:
+        print(message.encode('ascii', 'replace').decode('ascii'))
+
+
+def _write_atomic(target, data):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+class TokenBucket:
+    """초당 rate개, 최대 burst개까지 몰아 쓸 수 있는 요청 허가 (스레드 안전)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """(API URL, 쿼리 인자) → JSON 응답 디스크 캐시"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, url, params):
+        key = hashlib.sha1(json.dumps([url, sorted(params.items())], ensure_ascii=False).encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, url, params, max_age):
+        """max_age(초)보다 새로운 응답 (없으면 None)"""
+        try:
+            entry = json.loads(self.path(url, params).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+        if max_age is not None and time.time() - entry.get('fetched', 0) > max_age:
+            return None
+        return entry['body']
+
+    def put(self, url, params, body):
+        entry = {'fetched': time.time(), 'url': url, 'params': params, 'body': body}
+        _write_atomic(self.path(url, params), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
 
+
+class WikiClient:
+    """MediaWiki API 클라이언트 (공유 Session + 토큰 버킷 + 응답 캐시 + 재시도)"""
+
+    def __init__(self, api_url=API_URL, workers=4, rate=5.0, cache=None, max_age=None, retries=4, timeout=10):
+        self.api_url = api_url
+        self.bucket = TokenBucket(rate, burst=max(1, workers))
+        self.cache = cache or ResponseCache()
+        self.max_age = max_age
+        self.retries = retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        # 워커 수만큼 keep-alive 연결을 유지
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'retries': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get(self, url, params=None):
+        """토큰 버킷 + 재시도 GET → 성공 응답"""
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, delay = e, None
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f'HTTP {response.status_code}', response=response)
+                delay = response.headers.get('Retry-After')
+            if attempt == self.retries:
+                raise error
+            self._count('retries')
+            try:
+                wait = float(delay)
+            except (TypeError, ValueError):
+                wait = 0.5 * 2 ** attempt
+            time.sleep(min(wait, 30))
+
+    def query(self, params):
+        params = dict(params, format='json')
+        body = self.cache.get(self.api_url, params, self.max_age)
+        if body is not None:
+            self._count('cache_hits')
+            return body
+        body = self._get(self.api_url, params).json()
+        self.cache.put(self.api_url, params, body)
+        return body
+
+    def download(self, url):
+        """이미지 등 원본 바이트 (초상화 미러용, 응답 캐시는 portraits가 관리)"""
+        return self._get(url).content
+
+    def close(self):
+        self.session.close()
+
+
+def fetch_wikipedia_info(client, composer_name):
+    """Wikipedia API로 작곡가 정보 가져오기 (페이지가 없으면 None)"""
     # 1. 검색하여 정확한 페이지 찾기
-    search_params = {
+    data = client.query({
         'action': 'query',
-        'format': 'json',
         'list': 'search',
         'srsearch': composer_name + ' composer',
         'srlimit': 1
-    }
+    })
+    if not data.get('query', {}).get('search'):
+        return None
+    page_title = data['query']['search'][0]['title']
 
-    try:
-        response = requests.get(base_url, params=search_params, headers=headers, timeout=10)
-        data = response.json()
+    # 2. 페이지 상세 정보 가져오기 (요약 + 이미지)
+    data = client.query({
+        'action': 'query',
+        'titles': page_title,
+        'prop': 'extracts|pageimages',
+        'exintro': 1,
+        'explaintext': 1,
+        'pithumbsize': 300,
+        'redirects': 1
+    })
+    pages = data.get('query', {}).get('pages', {})
+    page = next(iter(pages.values()), {})
+    thumbnail = page.get('thumbnail', {})
 
-        if not data.get('query', {}).get('search'):
-            print("  [SKIP] No Wikipedia page found")
-            return None
+    return {
+        'name': composer_name,
+        'wikipedia_title': page_title,
+        'extract': page.get('extract', '').split('\n')[0][:500],  # 첫 문단 500자
+        'image_url': thumbnail.get('source', ''),
+        'image_width': thumbnail.get('width', 0),
+        'image_height': thumbnail.get('height', 0),
+        'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
 
-        page_title = data['query']['search'][0]['title']
-
-        # 2. 페이지 상세 정보 가져오기 (요약 + 이미지)
-        page_params = {
-            'action': 'query',
-            'format': 'json',
-            'titles': page_title,
-            'prop': 'extracts|pageimages',
-            'exintro': True,
-            'explaintext': True,
-            'pithumbsize': 300,
-            'redirects': 1
-        }
-
-        response = requests.get(base_url, params=page_params, headers=headers, timeout=10)
-        data = response.json()
-
-        pages = data.get('query', {}).get('pages', {})
-        page = next(iter(pages.values()))
-
-        # 추출된 정보
-        info = {
-            'name': composer_name,
-            'wikipedia_title': page_title,
-            'extract': page.get('extract', '').split('\n')[0][:500],  # 첫 문단 500자
-            'image_url': page.get('thumbnail', {}).get('source', ''),
-            'image_width': page.get('thumbnail', {}).get('width', 0),
-            'image_height': page.get('thumbnail', {}).get('height', 0)
-        }
 
-        try:
-            print(f"  [OK] {composer_name}")
-        except UnicodeEncodeError:
-            print("  [OK]")
-        return info
+def is_stale(entry, max_age_days):
+    """fetched_at이 없거나(이전 버전에서 수집) max_age_days보다 오래된 항목"""
+    if max_age_days is None:
+        return False
+    try:
+        fetched = datetime.fromisoformat(entry['fetched_at'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return (datetime.now(timezone.utc) - fetched).total_seconds() > max_age_days * 86400
 
-    except Exception as e:
-        try:
-            print(f"  [ERROR] {composer_name}: {e}")
-        except UnicodeEncodeError:
-            print(f"  [ERROR]: {e}")
-        return None
 
+def save(composer_info, order, output_path):
+    """composers.json 순서로 저장 (목록에서 빠진 작곡가 항목은 뒤에 그대로 유지)"""
+    ordered = {name: composer_info[name] for name in order if name in composer_info}
+    ordered.update(composer_info)
+    body = json.dumps(ordered, ensure_ascii=False, indent=2)
+    _write_atomic(output_path, body.encode('utf-8'))
 
-def main():
-    """모든 작곡가의 Wikipedia 정보 수집"""
-    # composers.json 로드
-    composers_path = Path(__file__).parent / 'web_app' / 'static' / 'data' / 'composers.json'
 
-    with open(composers_path, 'r', encoding='utf-8') as f:
-        composers_data = json.load(f)
+def main():
+    """없거나 오래된 작곡가의 Wikipedia 정보만 수집"""
+    parser = argparse.ArgumentParser(description='Fetch composer info from Wikipedia')
+    parser.add_argument('--api-url', default=os.environ.get('PIANO_WIKI_API', API_URL))
+    parser.add_argument('--composers', type=Path, default=DATA_DIR / 'composers.json')
+    parser.add_argument('--output', type=Path, default=DATA_DIR / 'composer_info.json')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('-j', '--workers', type=int, default=4, help='동시 요청 수')
+    parser.add_argument('--rate', type=float, default=5.0, help='초당 최대 요청 수')
+    parser.add_argument('--max-age-days', type=float, default=30.0, help='이보다 오래된 항목/응답 캐시는 다시 가져옴')
+    parser.add_argument('--refresh', action='store_true', help='모든 작곡가 다시 가져오기 (응답 캐시는 사용)')
+    parser.add_argument('--portrait-dir', type=Path, default=portraits.PORTRAIT_DIR)
+    parser.add_argument('--no-portraits', action='store_true', help='초상화 미러 생략')
+    args = parser.parse_args()
 
-    print(f"Fetching Wikipedia info for {len(composers_data)} composers...\n")
+    composers = json.loads(args.composers.read_text(encoding='utf-8'))
+    try:
+        composer_info = json.loads(args.output.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        composer_info = {}
 
-    # 각 작곡가의 Wikipedia 정보 수집
-    composer_info = {}
-    for i, composer_name in enumerate(composers_data.keys(), 1):
-        try:
-            print(f"[{i}/{len(composers_data)}] {composer_name}")
-        except UnicodeEncodeError:
-            print(f"[{i}/{len(composers_data)}] [name encoding issue]")
+    todo = [name for name in composers
+            if args.refresh or name not in composer_info or is_stale(composer_info[name], args.max_age_days)]
+    _print(f"Fetching Wikipedia info for {len(todo)} of {len(composers)} composers "
+           f"({args.workers} workers, {args.rate:g} req/s) from {args.api_url}\n")
 
-        info = fetch_wikipedia_info(composer_name)
+    client = WikiClient(args.api_url, args.workers, args.rate, ResponseCache(args.cache_dir),
+                        max_age=args.max_age_days * 86400)
+    t0 = time.perf_counter()
+    ok = failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(fetch_wikipedia_info, client, name): name for name in todo}
+            for i, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    info = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    failed += 1
+                    _print(f"[{i}/{len(todo)}] [ERROR] {name}: {e}")
+                    continue
+                if info is None:
+                    _print(f"[{i}/{len(todo)}] [SKIP] {name}: No Wikipedia page found")
+                    continue
+                ok += 1
+                if 'portrait' in composer_info.get(name, {}):
+                    info['portrait'] = composer_info[name]['portrait']  # image_url이 같으면 그대로 재사용
+                composer_info[name] = info
+                _print(f"[{i}/{len(todo)}] [OK] {name}")
+                # 작곡가마다 저장해 두면 중간에 멈춰도 다음 실행은 남은 것만 가져온다
+                save(composer_info, composers, args.output)
 
-        if info:
-            composer_info[composer_name] = info
+        if todo:
+            stats = client.stats
+            _print(f"\n[OK] {ok} fetched, {failed} failed in {time.perf_counter() - t0:.1f}s "
+                   f"({stats['requests']} requests, {stats['cache_hits']} cache hits, {stats['retries']} retries)")
 
-        # API 요청 제한 고려하여 대기
-        time.sleep(0.5)
+        if not args.no_portraits:
+            result = portraits.mirror(composer_info, client.download, args.portrait_dir, args.workers)
+            if result['built']:
+                save(composer_info, composers, args.output)
+    finally:
+        client.close()
 
-    # 저장
-    output_path = Path(__file__).parent / 'web_app' / 'static' / 'data' / 'composer_info.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(composer_info, f, ensure_ascii=False, indent=2)
+    _print(f"[OK] Saved {len(composer_info)} composer info to {args.output}")
 
-    print(f"\n[OK] Saved {len(composer_info)} composer info to {output_path}")
 
 if __name__ == '__main__':
     main()
@@ -2,61 +2,42 @@
 # -*- coding: utf-8 -*-
 """
 MAESTRO Dataset Parser
-CSV를 파싱하여 작곡가별 곡 목록을 JSON으로 저장
+CSV + MIDI 트리를 SQLite 카탈로그(web_app/cache/maestro_catalog.sqlite3)로 증분 갱신하고,
+호환용 작곡가별 곡 목록 JSON(web_app/static/data/composers.json)도 함께 저장
+(CSV/MIDI가 바뀌지 않았으면 다시 파싱하거나 JSON을 다시 쓰지 않음, 구현은 web_app/maestro_catalog.py)
+--features: 곡 특징(노트 밀도/음역/페달/조성 등)을 프로세스 풀로 추출해 카탈로그에 병합 (web_app/midi_features.py)
 """
 
-import csv
-import json
-from collections import defaultdict
+import argparse
+import sys
+import time
 from pathlib import Path
 
-def parse_maestro_csv():
-    """MAESTRO CSV를 파싱하여 작곡가별 곡 목록 생성"""
-    maestro_csv = Path(__file__).parent / 'maestro-v3.0.0' / 'maestro-v3.0.0.csv'
+sys.path.insert(0, str(Path(__file__).parent / 'web_app'))
 
-    # 작곡가별 곡 데이터 저장
-    composers = defaultdict(list)
+import maestro_catalog  # noqa: E402
+import midi_features  # noqa: E402
 
-    with open(maestro_csv, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            composer = row['canonical_composer']
-            title = row['canonical_title']
-            midi_file = row['midi_filename']
-            duration = float(row['duration'])
-            year = row['year']
 
-            composers[composer].append({
-                'title': title,
-                'midi_file': midi_file,
-                'duration': duration,
-                'year': year
-            })
+def parse_maestro_csv(root=None, db_path=None, json_path=None, force=False, features=False, workers=None):
+    """MAESTRO CSV를 파싱하여 작곡가별 곡 목록 생성 (바뀐 부분만)"""
+    root = root or Path(__file__).parent / 'maestro-v3.0.0'
+    db_path = db_path or maestro_catalog.CATALOG_PATH
+    t0 = time.perf_counter()
+    stats = maestro_catalog.build(root, db_path, json_path or maestro_catalog.COMPOSERS_JSON, force=force)
+    maestro_catalog.report(stats, time.perf_counter() - t0)
+    if features:
+        stats['features'] = midi_features.extract_all(root, db_path, workers=workers, force=force)
+    return stats
 
-    # 작곡가 목록 생성 (알파벳 순 정렬)
-    composer_data = {}
-    for composer in sorted(composers.keys()):
-        composer_data[composer] = {
-            'name': composer,
-            'pieces': composers[composer],
-            'piece_count': len(composers[composer])
-        }
-
-    # JSON 저장
-    output_path = Path(__file__).parent / 'web_app' / 'static' / 'data' / 'composers.json'
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(composer_data, f, ensure_ascii=False, indent=2)
-
-    print(f"[OK] Parsed {len(composer_data)} composers")
-    print(f"[OK] Total pieces: {sum(len(v['pieces']) for v in composer_data.values())}")
-    print(f"[OK] Saved to: {output_path}")
-
-    # 작곡가 목록 출력
-    print("\n작곡가 목록:")
-    for composer, data in composer_data.items():
-        print(f"  - {composer}: {data['piece_count']} pieces")
 
 if __name__ == '__main__':
-    parse_maestro_csv()
+    parser = argparse.ArgumentParser(description='Parse the MAESTRO dataset into the web app catalog')
+    parser.add_argument('--root', type=Path, default=None, help='MAESTRO 폴더 (기본값: ./maestro-v3.0.0)')
+    parser.add_argument('--db', type=Path, default=None)
+    parser.add_argument('--json', type=Path, default=None)
+    parser.add_argument('--force', action='store_true', help='모든 파일 다시 해시 (--features면 특징도 다시 추출)')
+    parser.add_argument('--features', action='store_true', help='곡 특징 추출 + 카탈로그 병합')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='특징 추출 프로세스 수')
+    args = parser.parse_args()
+    parse_maestro_csv(args.root, args.db, args.json, args.force, args.features, args.workers)
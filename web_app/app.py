@@ -5,15 +5,111 @@ Piano Games Web App - Flask Server
 자동피아노 + 터치모니터 환경을 위한 웹 게임 플랫폼
 """
 
-from flask import Flask, render_template, send_from_directory, jsonify, request
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Flask, render_template, send_from_directory, send_file, jsonify, request
+from werkzeug.security import safe_join
 from pathlib import Path
+import gzip
+import math
+import mimetypes
 import os
 import json
+import re
+import time
+
+from assets import AssetManifest
+from charts import ChartCache
+from compose import ComposeBusy, ComposeError, ComposeService
+from composer_index import ComposerIndex, ComposerInfoIndex
+from compression import Compressor
+from data_store import DataStore, load_csv_rows
+from maestro_catalog import MaestroCatalog
+from maestro_events import EventCache
+from metrics import Metrics, phase
+from midi_transform import TransformCache, TransformError, TransformSpec
+from music_catalog import MusicCatalog
+import piano_roll
+from playback import PlaybackError, PlaybackHub
+from progressions import ProgressionStore
+from search_index import SearchStore
+import smf
 
 app = Flask(__name__)
+# after_request는 등록 역순으로 실행 - Metrics를 먼저 등록해 압축 후 크기를 기록
+metrics = Metrics(app, slow_ms=float(os.environ.get('PIANO_SLOW_MS', 500)))
+compressor = Compressor(app)
 BASE_DIR = Path(__file__).parent
-MUSIC_ROOT = BASE_DIR.parent / 'mimipiano' / 'MusicRoot'
-MAESTRO_ROOT = BASE_DIR.parent / 'maestro-v3.0.0'
+# 벤치마크/테스트용 데이터 트리는 환경 변수로 바꿀 수 있다 (benchmarks/load_test.py)
+MUSIC_ROOT = Path(os.environ.get('PIANO_MUSIC_ROOT', BASE_DIR.parent / 'mimipiano' / 'MusicRoot'))
+MAESTRO_ROOT = Path(os.environ.get('PIANO_MAESTRO_ROOT', BASE_DIR.parent / 'maestro-v3.0.0'))
+CACHE_ROOT = Path(os.environ.get('PIANO_CACHE_DIR', BASE_DIR / 'cache'))
+
+# MusicRoot 인덱스 (시작 시 1회 구축, 폴더 mtime 변경 시에만 갱신)
+music_catalog = MusicCatalog(MUSIC_ROOT)
+music_catalog.refresh(force=True)
+
+# static/data 자산 (1회 파싱, 파일 변경 시 스냅샷 교체)
+data_store = DataStore(BASE_DIR / 'static' / 'data')
+data_store.register('composers', 'composers.json', ComposerIndex)
+data_store.register('composer_info', 'composer_info.json', ComposerInfoIndex)
+data_store.register('chords', 'chord.CSV', load_csv_rows, mimetype='text/csv')
+data_store.register('progressions', 'progression.CSV', load_csv_rows, mimetype='text/csv')
+data_store.register('expressions', 'expression.csv', load_csv_rows, mimetype='text/csv')
+
+# MAESTRO 카탈로그 (python ../parse_maestro.py 로 증분 빌드한 SQLite, 없으면 composers.json 사용)
+maestro_catalog = MaestroCatalog(CACHE_ROOT / 'maestro_catalog.sqlite3')
+
+# 코드 진행 테이블 (chord/progression CSV가 바뀔 때만 재구축)
+progression_store = ProgressionStore(data_store)
+progression_store.get()
+
+# 라이브러리 검색 인덱스 (composers.json이 바뀔 때만 재구축)
+search_store = SearchStore(data_store)
+search_store.get()
+
+# 그림 → 음악 작곡 (프로세스 풀 + 이미지+CSV 해시 캐시, web_app/cache/compositions)
+compose_service = ComposeService(data_store, cache_dir=CACHE_ROOT / 'compositions',
+                                 workers=int(os.environ.get('PIANO_COMPOSE_WORKERS', 2)))
+
+# MAESTRO 노트 이벤트 캐시 (원본 해시 기준, web_app/cache/maestro_events)
+maestro_event_cache = EventCache(CACHE_ROOT / 'maestro_events')
+
+# MIDI 변환 결과 캐시 (메모리 + web_app/cache/midi_transform, 원본 해시는 이벤트 캐시와 공유)
+midi_transform_cache = TransformCache(CACHE_ROOT / 'midi_transform', hasher=maestro_event_cache.source_hash)
+
+# 피아노 롤 미리보기 타일 (원본 해시/줌/타일 기준, web_app/cache/piano_roll)
+piano_roll_tiles = piano_roll.TileCache(maestro_event_cache, CACHE_ROOT / 'piano_roll')
+
+# 리듬 게임 채보 (원본 해시 기준, web_app/cache/charts, python charts.py 로 일괄 생성)
+chart_cache = ChartCache(maestro_event_cache, CACHE_ROOT / 'charts')
+
+# 작곡가 초상화 미러 (내용 해시 파일명, python ../fetch_composer_info.py 또는 portraits.py로 빌드)
+PORTRAIT_DIR = CACHE_ROOT / 'portraits'
+
+# 서버 스트리밍 재생 세션 (SSE 스트림 하나가 waitress 스레드 하나를 점유 - serve.py가 스레드 수에 맞춰 줄인다)
+playback_hub = PlaybackHub(max_sessions=int(os.environ.get('PIANO_PLAYBACK_SESSIONS', 4)))
+
+# 하드웨어 MIDI 브리지 (serve.py --midi-bridge 로 시작한 BridgeServer, 없으면 None)
+app.config.setdefault('MIDI_BRIDGE', None)
+
+# 해시 파일명 자산 manifest (python assets.py 로 빌드, 없으면 /static 원본 사용)
+asset_manifest = AssetManifest()
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+@app.context_processor
+def inject_assets():
+    """템플릿에서 asset_url('data/chord.CSV'), asset_manifest() 사용"""
+    return {'asset_url': asset_manifest.url_for, 'asset_manifest': asset_manifest.urls}
+
+def conditional_json(body, etag, last_modified):
+    """ETag/Last-Modified가 붙은 JSON 응답 (변경 없으면 304)"""
+    if not isinstance(body, bytes):
+        body = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/')
 def index():
@@ -57,35 +153,210 @@ def midi_test():
 
 @app.route('/static/data/<path:filename>')
 def serve_data(filename):
-    """CSV 및 데이터 파일 제공"""
-    return send_from_directory(BASE_DIR / 'static' / 'data', filename)
+    """CSV 및 데이터 파일 제공 (등록된 자산은 메모리에서)"""
+    asset = data_store.by_filename(filename)
+    if asset is None:
+        return send_from_directory(BASE_DIR / 'static' / 'data', filename)
+    response = app.response_class(asset.raw, mimetype=asset.mimetype)
+    response.set_etag(asset.etag)
+    response.last_modified = asset.mtime
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    """해시 파일명 데이터 자산 (사전 압축본 선택, immutable 캐시)"""
+    found = asset_manifest.variant(filename, request.accept_encodings)
+    if found is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    path, encoding = found
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/portraits/<filename>')
+def serve_portrait(filename):
+    """작곡가 초상화 변형 (내용 해시 파일명 → immutable 캐시, 오프라인에서도 제공)"""
+    response = send_from_directory(PORTRAIT_DIR, filename, max_age=ASSET_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/api/midi-files')
 def get_midi_files():
-    """MusicRoot 폴더의 모든 MIDI 파일 목록 반환"""
-    midi_files = {}
-
-    if not MUSIC_ROOT.exists():
+    """MusicRoot 폴더의 모든 MIDI 파일 목록 반환 (?details=1 이면 메타데이터 포함)"""
+    if not music_catalog.available:
         return jsonify({'error': 'MusicRoot folder not found'}), 404
 
-    # 각 키 폴더 순회
-    for key_folder in sorted(MUSIC_ROOT.iterdir()):
-        if key_folder.is_dir():
-            key_name = key_folder.name
-            # 해당 키 폴더의 모든 .mid 파일 찾기
-            files = sorted([f.name for f in key_folder.glob('*.mid')])
-            if files:
-                midi_files[key_name] = files
-
-    return jsonify(midi_files)
+    with phase('catalog'):
+        body = music_catalog.details() if request.args.get('details') else music_catalog.listing()
+    return jsonify(body)
 
 @app.route('/api/midi-file/<key>/<filename>')
 def serve_midi_file(key, filename):
     """특정 MIDI 파일 제공"""
-    file_path = MUSIC_ROOT / key / filename
-    if not file_path.exists():
+    file_path = music_catalog.lookup(key, filename)
+    if file_path is None:
+        return jsonify({'error': 'File not found'}), 404
+    return send_file(file_path, mimetype='audio/midi')
+
+def resolve_midi_source(filepath):
+    """music/<key>/<filename> 또는 maestro/<경로> → MIDI 파일 경로 (없으면 None)"""
+    source, _, rest = filepath.partition('/')
+    if source == 'music':
+        key, _, filename = rest.partition('/')
+        return music_catalog.lookup(key, filename)
+    if source == 'maestro':
+        file_path = safe_join(str(MAESTRO_ROOT), rest)
+        if file_path is not None and os.path.isfile(file_path):
+            return file_path
+    return None
+
+@app.route('/api/midi-transform/<path:filepath>')
+def get_midi_transform(filepath):
+    """조옮김 / 템포 배율 / 채널 필터를 적용한 MIDI
+    music/<key>/<filename> 또는 maestro/<경로>, ?transpose=반음&tempo=배율&channels=0,1
+    """
+    file_path = resolve_midi_source(filepath)
+    if file_path is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        spec = TransformSpec.parse(request.args.get('transpose'), request.args.get('tempo'),
+                                   request.args.get('channels'))
+    except TransformError as e:
+        return jsonify({'error': str(e)}), 400
+    if spec.identity:
+        return send_file(file_path, mimetype='audio/midi')
+
+    try:
+        with phase('transform'):
+            data, key = midi_transform_cache.get(file_path, spec)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    response = app.response_class(data, mimetype='audio/midi')
+    response.set_etag(key)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/piano-roll/<path:filepath>')
+def get_piano_roll_info(filepath):
+    """피아노 롤 타일 배치 정보 (music/<key>/<filename> 또는 maestro/<경로>)"""
+    file_path = resolve_midi_source(filepath)
+    if file_path is None:
+        return jsonify({'error': 'File not found'}), 404
+    try:
+        with phase('index'):
+            info = piano_roll_tiles.info(file_path)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    formats = ['webp', 'png'] if piano_roll.webp_supported() else ['png']
+    info['formats'] = formats
+    info['tile_url'] = f'/api/piano-roll-tile/{{zoom}}/{{tile}}/{filepath}?v={info["digest"]}'
+    response = jsonify(info)
+    response.set_etag(info['digest'])
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/piano-roll-tile/<int:zoom>/<int:tile>/<path:filepath>')
+def get_piano_roll_tile(zoom, tile, filepath):
+    """피아노 롤 타일 이미지 (?format=png|webp, 없으면 Accept에 따라 선택)
+    ?v=<원본 해시>가 현재 파일과 같으면 immutable 캐시 헤더를 붙인다
+    """
+    file_path = resolve_midi_source(filepath)
+    if file_path is None:
         return jsonify({'error': 'File not found'}), 404
-    return send_from_directory(MUSIC_ROOT / key, filename, mimetype='audio/midi')
+
+    fmt = request.args.get('format')
+    if fmt is None:
+        webp = piano_roll.webp_supported() and request.accept_mimetypes['image/webp']
+        fmt = 'webp' if webp else 'png'
+    # /api/piano-roll의 formats와 같은 기준 (WebP 없이 빌드된 Pillow면 png만)
+    if fmt not in piano_roll.FORMATS or (fmt == 'webp' and not piano_roll.webp_supported()):
+        return jsonify({'error': 'Unsupported format'}), 400
+
+    try:
+        with phase('tile'):
+            data, key = piano_roll_tiles.get(file_path, zoom, tile, fmt)
+    except piano_roll.TileError as e:
+        return jsonify({'error': str(e)}), 404
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    response = app.response_class(data, mimetype=piano_roll.FORMATS[fmt])
+    if 'format' not in request.args:
+        response.vary.add('Accept')
+    response.set_etag(f'{key}.{fmt}')
+    if request.args.get('v') == key.split('.', 1)[0]:
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/charts/<path:filepath>')
+def get_chart(filepath):
+    """리듬 게임 5레인 채보 (music/<key>/<filename> 또는 maestro/<경로>, 미리 생성된 gzip JSON)"""
+    file_path = resolve_midi_source(filepath)
+    if file_path is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        with phase('chart'):
+            data, digest = chart_cache.get(file_path)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    if request.accept_encodings['gzip']:
+        response = app.response_class(data, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(gzip.decompress(data), mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    response.set_etag(digest)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# ===== Progression Routes =====
+
+def progression_filters():
+    """쿼리 인자 → ProgressionTable.query() 필터"""
+    chords = request.args.get('chords', '')
+    return {
+        'length': request.args.get('length', type=int),
+        'min_length': request.args.get('min_length', type=int),
+        'max_length': request.args.get('max_length', type=int),
+        'prefix': request.args.get('prefix') or None,
+        'chords': [c.strip() for c in chords.split(',') if c.strip()],
+    }
+
+@app.route('/api/progressions/random')
+def get_random_progression():
+    """조건에 맞는 코드 진행 하나를 무작위로 반환 (코드별 피치 클래스 포함)"""
+    table = progression_store.get()
+    if table is None:
+        return jsonify({'error': 'Progression data not found'}), 404
+    prog = table.random(**progression_filters())
+    if prog is None:
+        return jsonify({'error': 'No progression matches'}), 404
+    return jsonify(prog)
+
+@app.route('/api/progressions/<int:prog_id>')
+def get_progression(prog_id):
+    """id(progression.CSV 행 번호)로 코드 진행 반환"""
+    table = progression_store.get()
+    if table is None:
+        return jsonify({'error': 'Progression data not found'}), 404
+    prog = table.items.get(prog_id)
+    if prog is None:
+        return jsonify({'error': 'Progression not found'}), 404
+    return jsonify(prog)
 
 # ===== Draw to Music Routes =====
 
@@ -96,32 +367,31 @@ def draw_to_music():
 
 @app.route('/api/compose-from-image', methods=['POST'])
 def compose_from_image():
-    """그림을 분석하여 MIDI 생성"""
-    import base64
-    from io import BytesIO
-
-    data = request.get_json()
-    image_data = data.get('image')
-
-    # TODO: AI 분석 및 이미지 생성 (나중에 구현)
-    # 일단 더미 응답
-
-    # 분석 결과 (더미)
-    analysis = {
-        'description': 'A beautiful sunset over mountains with vibrant orange and purple colors',
-        'mood': 'peaceful and contemplative',
-        'suggested_genre': 'ambient classical'
-    }
-
-    # 테스트 MIDI 파일 경로 (MAESTRO에서 하나 가져오기)
-    test_midi = '2004/MIDI-Unprocessed_XP_06_R1_2004_03_ORIG_MID--AUDIO_06_R1_2004_03_Track03_wav.midi'
-
-    return jsonify({
-        'success': True,
-        'analysis': analysis,
-        'generated_image_url': '/static/images/placeholder_generated.jpg',  # TODO: 실제 생성 이미지
-        'midi_path': test_midi
-    })
+    """그림을 분석하여 MIDI 생성 (프로세스 풀, 같은 그림은 캐시된 결과)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        with phase('compose'):
+            result = compose_service.compose(data.get('image'))
+    except ComposeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ComposeBusy:
+        response = jsonify({'success': False, 'error': 'Too many drawings at once, please try again'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except FutureTimeoutError:
+        return jsonify({'success': False, 'error': 'Composition timed out'}), 504
+    return jsonify(dict(result, success=True))
+
+@app.route('/api/compositions/<digest>.mid')
+def get_composition_midi(digest):
+    """작곡 결과 MIDI 다운로드"""
+    if not re.fullmatch(r'[0-9a-f]{40}', digest):
+        return jsonify({'error': 'File not found'}), 404
+    path = compose_service.midi_path(digest)
+    if not path.is_file():
+        return jsonify({'error': 'File not found'}), 404
+    return send_file(path, mimetype='audio/midi', max_age=ASSET_MAX_AGE,
+                     download_name=f'drawing-{digest[:8]}.mid')
 
 # ===== Classical Library Routes =====
 
@@ -140,31 +410,119 @@ def piece_player(midi_path):
     """곡 재생 페이지"""
     return render_template('piece_player.html', midi_path=midi_path)
 
+def composer_catalog():
+    """SQLite 카탈로그 스냅샷, 없으면 composers.json 인덱스 (둘 다 Asset 인터페이스)"""
+    return maestro_catalog.get() or data_store.get('composers')
+
 @app.route('/api/composers')
 def get_composers():
     """작곡가 목록 및 곡 데이터 반환"""
-    composers_file = BASE_DIR / 'static' / 'data' / 'composers.json'
-    if not composers_file.exists():
+    asset = composer_catalog()
+    if asset is None:
+        return jsonify({'error': 'Composers data not found'}), 404
+    return conditional_json(asset.value.full_body, asset.etag, asset.mtime)
+
+@app.route('/api/composers/summary')
+def get_composers_summary():
+    """작곡가 요약 (이름, 곡 수, 총 재생 시간)"""
+    asset = composer_catalog()
+    if asset is None:
+        return jsonify({'error': 'Composers data not found'}), 404
+    return conditional_json(asset.value.summary_body, asset.etag_for('summary'), asset.mtime)
+
+@app.route('/api/composers/<composer_name>')
+def get_composer(composer_name):
+    """특정 작곡가의 곡 목록 반환"""
+    asset = composer_catalog()
+    if asset is None:
         return jsonify({'error': 'Composers data not found'}), 404
+    with phase('catalog'):
+        composer = asset.value.composer(composer_name)
+    if composer is None:
+        return jsonify({'error': 'Composer not found'}), 404
+    return conditional_json(composer, asset.etag_for(composer_name), asset.mtime)
 
-    with open(composers_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return jsonify(data)
+@app.route('/api/piece/<path:midi_path>')
+def get_piece(midi_path):
+    """MIDI 경로로 곡 정보 조회 (작곡가 포함)"""
+    asset = composer_catalog()
+    if asset is None:
+        return jsonify({'error': 'Composers data not found'}), 404
+    with phase('catalog'):
+        piece = asset.value.piece(midi_path)
+    if piece is None:
+        return jsonify({'error': 'Piece not found'}), 404
+    return conditional_json(piece, asset.etag_for(midi_path), asset.mtime)
+
+@app.route('/api/pieces')
+def query_pieces():
+    """곡 특징 기준 정렬/필터 (SQLite 카탈로그 필요, 특징은 parse_maestro.py --features)
+    ?composer=&key=C major&mode=minor&year=&min_<열>=&max_<열>=&sort=notes_per_sec&order=desc&page=&per_page=
+    """
+    asset = maestro_catalog.get()
+    if asset is None:
+        return jsonify({'error': 'Catalog not built'}), 404
+
+    filters = [(name, '=', request.args[name]) for name in ('composer', 'key', 'year') if request.args.get(name)]
+    if request.args.get('mode') in ('major', 'minor'):
+        filters.append(('key', 'mode', request.args['mode']))
+    for arg, value in request.args.items():
+        if arg.startswith(('min_', 'max_')):
+            try:
+                filters.append((arg[4:], '>=' if arg.startswith('min_') else '<=', float(value)))
+            except ValueError:
+                return jsonify({'error': f'{arg} must be a number'}), 400
+
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 20, type=int)), 500)
+    try:
+        with phase('catalog'):
+            total, pieces = asset.value.query_pieces(filters, request.args.get('sort'),
+                                                     request.args.get('order') == 'desc',
+                                                     (page - 1) * per_page, per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    body = {'total': total, 'page': page, 'per_page': per_page, 'pieces': pieces}
+    return conditional_json(body, asset.etag_for(request.query_string.decode('latin-1')), asset.mtime)
+
+@app.route('/api/search')
+def search_library():
+    """작곡가/곡 제목/연도/작품 번호 검색 (?q=&page=&per_page=)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing query'}), 400
+    index = search_store.get()
+    if index is None:
+        return jsonify({'error': 'Composers data not found'}), 404
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 20, type=int)), 50)
+    t0 = time.perf_counter()
+    with phase('search'):
+        result = index.search(query, page, per_page)
+    result['query'] = query
+    result['took_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+    return jsonify(result)
+
+@app.route('/api/composer-info')
+def get_composer_portraits():
+    """모든 작곡가의 초상화 URL (라이브러리 목록용)"""
+    asset = data_store.get('composer_info')
+    if asset is None:
+        return jsonify({'error': 'Composer info not found'}), 404
+    return conditional_json(asset.value.portraits_body, asset.etag_for('portraits'), asset.mtime)
 
 @app.route('/api/composer-info/<composer_name>')
 def get_composer_info(composer_name):
     """특정 작곡가의 Wikipedia 정보 반환"""
-    info_file = BASE_DIR / 'static' / 'data' / 'composer_info.json'
-    if not info_file.exists():
+    asset = data_store.get('composer_info')
+    if asset is None:
         return jsonify({'error': 'Composer info not found'}), 404
 
-    with open(info_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    if composer_name not in data:
+    info = asset.value.records.get(composer_name)
+    if info is None:
         return jsonify({'error': 'Composer not found'}), 404
 
-    return jsonify(data[composer_name])
+    return conditional_json(info, asset.etag_for(composer_name), asset.mtime)
 
 @app.route('/api/maestro-midi/<path:filepath>')
 def serve_maestro_midi(filepath):
@@ -177,6 +535,143 @@ def serve_maestro_midi(filepath):
     filename = file_path.name
     return send_from_directory(directory, filename, mimetype='audio/midi')
 
+@app.route('/api/maestro-events/<path:filepath>')
+def get_maestro_events(filepath):
+    """MAESTRO 곡의 사전 인코딩된 노트 이벤트 (컬럼형 JSON, 서스테인 반영)"""
+    file_path = safe_join(str(MAESTRO_ROOT), filepath)
+    if file_path is None or not os.path.isfile(file_path):
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        with phase('encode'):
+            data, digest = maestro_event_cache.get(file_path)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    if request.accept_encodings['gzip']:
+        response = app.response_class(data, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(gzip.decompress(data), mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    response.set_etag(digest)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/maestro-range/<path:filepath>')
+def get_maestro_range(filepath):
+    """MAESTRO 곡의 [t0, t1) 구간 이벤트 + t0 시점에 울리고 있는 노트/페달 상태 (초 단위 인자)"""
+    file_path = safe_join(str(MAESTRO_ROOT), filepath)
+    if file_path is None or not os.path.isfile(file_path):
+        return jsonify({'error': 'File not found'}), 404
+
+    t0 = request.args.get('t0', 0.0, type=float)
+    t1 = request.args.get('t1', t0 + 30.0, type=float)
+    if not (math.isfinite(t0) and math.isfinite(t1)) or t0 < 0 or t1 <= t0:
+        return jsonify({'error': 'Invalid time range'}), 400
+
+    try:
+        with phase('index'):
+            index = maestro_event_cache.time_index(file_path)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    # 곡 길이로 자른 뒤 ms 변환 (아주 큰 값은 * 1000에서 inf가 된다)
+    end = index.duration_ms / 1000
+    with phase('window'):
+        window = index.window(round(min(t0, end) * 1000), round(min(t1, end) * 1000))
+    return jsonify(window)
+
+# ===== MIDI Bridge =====
+
+@app.route('/api/midi-bridge')
+def get_midi_bridge():
+    """MIDI 브리지 사용 가능 여부 + WebSocket 포트 + 지연 시간 통계"""
+    server = app.config['MIDI_BRIDGE']
+    if server is None:
+        return jsonify({'available': False})
+    status = server.bridge.status()
+    response = jsonify(dict(status, available=status['running'], ws_port=server.server_address[1]))
+    response.cache_control.no_store = True
+    return response
+
+# ===== Streaming Playback Routes =====
+
+def playback_source(body):
+    """{'maestro': 경로} 또는 {'music': [key, filename]} → MIDI 파일 경로 (없으면 None)"""
+    if body.get('maestro'):
+        file_path = safe_join(str(MAESTRO_ROOT), str(body['maestro']))
+        return file_path if file_path is not None and os.path.isfile(file_path) else None
+    music = body.get('music')
+    if isinstance(music, (list, tuple)) and len(music) == 2:
+        return music_catalog.lookup(str(music[0]), str(music[1]))
+    return None
+
+@app.route('/api/playback', methods=['POST'])
+def create_playback():
+    """스트리밍 재생 세션 생성 → {id, duration, stream, control}"""
+    body = request.get_json(silent=True) or {}
+    file_path = playback_source(body)
+    if file_path is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        with phase('index'):
+            index = maestro_event_cache.time_index(file_path)
+    except (smf.MidiFormatError, IndexError):
+        return jsonify({'error': 'Invalid MIDI file'}), 422
+
+    try:
+        tempo = float(body.get('tempo', 1.0))
+        position = float(body.get('position', 0.0))
+    except (TypeError, ValueError):
+        tempo = position = math.nan
+    # inf/NaN은 round()에서 OverflowError/ValueError - 범위를 벗어나는 큰 값도 여기서 거른다
+    if not (math.isfinite(tempo) and math.isfinite(position)) or abs(position) > 1e9:
+        return jsonify({'error': 'Invalid tempo or position'}), 400
+    session = playback_hub.create(index, tempo=tempo, position_ms=round(position * 1000))
+    if session is None:
+        response = jsonify({'error': 'Too many playback sessions'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    return jsonify({
+        'id': session.id,
+        'duration': session.duration_ms / 1000,
+        'stream': f'/api/playback/{session.id}/stream',
+        'control': f'/api/playback/{session.id}',
+    }), 201
+
+@app.route('/api/playback/<sid>/stream')
+def stream_playback(sid):
+    """세션 이벤트 스트림 (text/event-stream)"""
+    session = playback_hub.get(sid)
+    if session is None:
+        return jsonify({'error': 'Playback session not found'}), 404
+
+    response = app.response_class(session.stream(), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    response.headers['X-Accel-Buffering'] = 'no'  # 리버스 프록시 버퍼링 방지
+    return response
+
+@app.route('/api/playback/<sid>', methods=['POST', 'DELETE'])
+def control_playback(sid):
+    """제어 메시지 {action: tempo|pause|resume|seek|stop, value} → 적용된 상태"""
+    if request.method == 'DELETE':
+        if not playback_hub.remove(sid):
+            return jsonify({'error': 'Playback session not found'}), 404
+        return '', 204
+
+    session = playback_hub.get(sid)
+    if session is None:
+        return jsonify({'error': 'Playback session not found'}), 404
+    body = request.get_json(silent=True) or {}
+    try:
+        state = session.control(body.get('action'), body.get('value'))
+    except PlaybackError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(state)
+
 if __name__ == '__main__':
     # 터치 모니터에서 접속 가능하도록 0.0.0.0 바인딩
     print("=" * 50)
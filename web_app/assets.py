@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+정적 데이터 자산 빌드 - 내용 해시 파일명 + gzip/brotli 사전 압축본 + manifest
+
+실행 (릴리스마다 1회):
+    python assets.py              → static/dist/ 에 생성
+서버는 /assets/<해시 파일명> 으로 제공하며 immutable 캐시 헤더를 붙인다
+"""
+
+from pathlib import Path
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택사항 - 없으면 gzip 사본만 생성
+    brotli = None
+
+from maestro_events import _write_atomic
+
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / 'static'
+DIST_DIR = STATIC_DIR / 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# static/ 기준 상대 경로
+DEFAULT_ASSETS = [
+    'data/chord.CSV',
+    'data/progression.CSV',
+    'data/expression.csv',
+    'data/composers.json',
+    'data/composer_info.json',
+]
+
+
+def hashed_name(rel_path, digest):
+    p = Path(rel_path)
+    return f'{p.stem}.{digest[:12]}{p.suffix}'
+
+
+def build(assets=DEFAULT_ASSETS, static_dir=STATIC_DIR, dist_dir=DIST_DIR, clean=False):
+    """자산마다 해시 파일명 원본 + .gz + .br 을 만들고 manifest.json 기록"""
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for rel in assets:
+        src = static_dir / rel
+        if not src.exists():
+            print(f"  [SKIP] {rel} (not found)")
+            continue
+        raw = src.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        name = hashed_name(rel, digest)
+        entry = {'file': name, 'size': len(raw), 'sha256': digest}
+
+        # 해시 파일명이라 한 번 생긴 파일은 다음 빌드에서 그대로 재사용된다
+        # 중단/동시 빌드로 잘린 파일이 남지 않게 모두 tmp + os.replace 로 기록
+        target = dist_dir / name
+        if not target.exists():
+            _write_atomic(target, raw)
+        gz = dist_dir / f'{name}.gz'
+        if not gz.exists():
+            _write_atomic(gz, gzip.compress(raw, compresslevel=9, mtime=0))
+        entry['gzip'] = gz.stat().st_size
+        if brotli is not None:
+            br = dist_dir / f'{name}.br'
+            if not br.exists():
+                _write_atomic(br, brotli.compress(raw, quality=11))
+            entry['br'] = br.stat().st_size
+
+        manifest[rel] = entry
+        sizes = f"{len(raw):,} B -> gzip {entry['gzip']:,} B"
+        if 'br' in entry:
+            sizes += f" / br {entry['br']:,} B"
+        print(f"  [OK] {rel} -> {name} ({sizes})")
+
+    body = json.dumps({'version': 1, 'assets': manifest}, indent=2)
+    _write_atomic(dist_dir / MANIFEST_NAME, body.encode('utf-8'))
+
+    if clean:
+        keep = {MANIFEST_NAME}
+        for e in manifest.values():
+            keep.update({e['file'], e['file'] + '.gz', e['file'] + '.br'})
+        for f in dist_dir.iterdir():
+            if f.name not in keep:
+                f.unlink()
+    return manifest
+
+
+class AssetManifest:
+    """static/dist/manifest.json 조회 (없으면 원본 /static 경로로 대체)"""
+
+    def __init__(self, dist_dir=DIST_DIR, url_prefix='/assets', check_interval=2.0):
+        self.dist_dir = Path(dist_dir)
+        self.url_prefix = url_prefix
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = 0.0
+        self._urls = {}    # 'data/chord.CSV' -> '/assets/chord.<hash>.CSV'
+        self._files = {}   # 'chord.<hash>.CSV' -> entry
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            path = self.dist_dir / MANIFEST_NAME
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                self._mtime, self._urls, self._files = None, {}, {}
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                assets = json.loads(path.read_text(encoding='utf-8'))['assets']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[Assets] Failed to load {path}: {e}")
+                return
+            self._mtime = mtime
+            self._urls = {rel: f"{self.url_prefix}/{e['file']}" for rel, e in assets.items()}
+            self._files = {e['file']: e for e in assets.values()}
+
+    def urls(self):
+        """{'data/chord.CSV': '/assets/chord.<hash>.CSV', ...}"""
+        self._refresh()
+        return self._urls
+
+    def url_for(self, rel_path):
+        self._refresh()
+        return self._urls.get(rel_path, f'/static/{rel_path}')
+
+    def variant(self, filename, accept_encodings):
+        """Accept-Encoding에 맞는 (파일 경로, Content-Encoding) - 미등록 파일이면 None"""
+        self._refresh()
+        entry = self._files.get(filename)
+        if entry is None:
+            return None
+        if 'br' in entry and accept_encodings['br']:
+            return self.dist_dir / f'{filename}.br', 'br'
+        if 'gzip' in entry and accept_encodings['gzip']:
+            return self.dist_dir / f'{filename}.gz', 'gzip'
+        return self.dist_dir / filename, None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build hashed, precompressed static data assets')
+    parser.add_argument('--clean', action='store_true', help='manifest에 없는 이전 빌드 파일 삭제')
+    args = parser.parse_args()
+    print(f"Building assets into {DIST_DIR}")
+    build(clean=args.clean)
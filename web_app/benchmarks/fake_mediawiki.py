@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 가짜 MediaWiki API + 이미지 서버 (fetch_composer_info.py / portraits.py 테스트용)
+
+/w/api.php 에서 list=search 와 prop=extracts|pageimages 두 가지 쿼리만 흉내 내고,
+썸네일 URL(/images/<제목>.png)에는 제목마다 다른 색의 PNG를 그려서 돌려준다.
+응답 지연과 429(Retry-After) 비율을 정할 수 있고, 끝낼 때 받은 요청 수를 출력한다.
+
+사용법 (web_app 폴더에서):
+    python benchmarks/fake_mediawiki.py --port 8900 --latency 0.2 --throttle 0.1
+    python ../fetch_composer_info.py --api-url http://127.0.0.1:8900/w/api.php --output /tmp/composer_info.json
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+import argparse
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+
+WEB_APP = Path(__file__).resolve().parent.parent
+
+
+class FakeWiki:
+    """작곡가 이름 → 가짜 문서 (검색어에서 ' composer'를 떼고 찾는다)"""
+
+    def __init__(self, names, latency=0.0, throttle=0.0, seed=0):
+        self.pages = {name: i + 1 for i, name in enumerate(names)}
+        self.latency = latency
+        self.throttle = throttle
+        self.random = random.Random(seed)
+        self.counts = {'search': 0, 'page': 0, 'image': 0, 'throttled': 0}
+        self.lock = threading.Lock()
+
+    def search(self, query):
+        name = query[:-len(' composer')] if query.endswith(' composer') else query
+        return [{'title': name, 'pageid': self.pages[name]}] if name in self.pages else []
+
+    def page(self, title, base_url):
+        pageid = self.pages.get(title)
+        if pageid is None:
+            return {'-1': {'title': title, 'missing': ''}}
+        return {str(pageid): {
+            'pageid': pageid,
+            'title': title,
+            'extract': f'{title} was a composer.\nSecond paragraph.',
+            'thumbnail': {'source': f'{base_url}/images/{quote(title)}.png', 'width': 300, 'height': 400},
+        }}
+
+    def image(self, title):
+        """제목별 결정적 PNG (300x400, 세로 그라데이션 + 투명 테두리) → bytes"""
+        from PIL import Image
+
+        r, g, b = hashlib.sha1(title.encode('utf-8')).digest()[:3]
+        image = Image.new('RGBA', (300, 400), (0, 0, 0, 0))
+        for y in range(10, 390):
+            shade = y / 400
+            image.paste((int(r * shade), int(g * shade), int(b * shade), 255), (10, y, 290, y + 1))
+        out = io.BytesIO()
+        image.save(out, 'PNG')
+        return out.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (클라이언트 연결 재사용 확인용)
+    wiki = None
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, body, headers=()):
+        self.send_bytes(status, json.dumps(body).encode('utf-8'), 'application/json; charset=utf-8', headers)
+
+    def send_bytes(self, status, data, content_type, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        wiki = self.wiki
+        title = unquote(url.path[len('/images/'):-len('.png')]) if url.path.startswith('/images/') else None
+        if url.path != '/w/api.php' and title not in wiki.pages:
+            self.send_json(404, {'error': 'not found'})
+            return
+        time.sleep(wiki.latency)
+        with wiki.lock:
+            throttled = wiki.random.random() < wiki.throttle
+            if throttled:
+                wiki.counts['throttled'] += 1
+        if throttled:
+            self.send_json(429, {'error': {'code': 'ratelimited'}}, [('Retry-After', '1')])
+            return
+
+        if title is not None:
+            with wiki.lock:
+                wiki.counts['image'] += 1
+            self.send_bytes(200, wiki.image(title), 'image/png')
+            return
+
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if params.get('list') == 'search':
+            with wiki.lock:
+                wiki.counts['search'] += 1
+            self.send_json(200, {'query': {'search': wiki.search(params.get('srsearch', ''))}})
+        elif 'titles' in params:
+            with wiki.lock:
+                wiki.counts['page'] += 1
+            base_url = f'http://{self.headers.get("Host")}'
+            self.send_json(200, {'query': {'pages': wiki.page(params['titles'], base_url)}})
+        else:
+            self.send_json(400, {'error': {'code': 'badquery'}})
+
+
+def serve(port, wiki):
+    """백그라운드 스레드로 서버 시작 → server (server.shutdown()으로 종료)"""
+    handler = type('BoundHandler', (Handler,), {'wiki': wiki})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the MediaWiki API and image host')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--composers', type=Path, default=WEB_APP / 'static' / 'data' / 'composers.json')
+    parser.add_argument('--latency', type=float, default=0.0, help='요청마다 지연 (초)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='429로 응답할 비율 (0~1)')
+    args = parser.parse_args()
+
+    names = json.loads(args.composers.read_text(encoding='utf-8'))
+    wiki = FakeWiki(names, args.latency, args.throttle)
+    server = serve(args.port, wiki)
+    print(f"Fake MediaWiki API on http://127.0.0.1:{args.port}/w/api.php ({len(names)} pages), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+    print(f"Requests: {wiki.counts}")
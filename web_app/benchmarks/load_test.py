@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+라우트별 부하 테스트 + 커밋 간 회귀 비교
+
+합성 MusicRoot / MAESTRO 트리와 임시 캐시 폴더로 로컬 서버(serve.py 또는 app.py)를 띄우고,
+app.py의 모든 라우트를 동시 요청으로 호출해 req/s 와 p50/p95/p99 지연 시간을 측정한다.
+결과는 benchmarks/results/<시각>-<커밋>.json 에 저장되며 --compare 로 이전 결과와 비교한다.
+
+사용법 (web_app 폴더에서):
+    python benchmarks/load_test.py                           # 동시성 1, 8, 32
+    python benchmarks/load_test.py --concurrency 16 --requests 500 --routes api
+    python benchmarks/load_test.py --compare latest          # 직전 결과와 비교 (회귀 시 exit 1)
+    python benchmarks/load_test.py --url http://kiosk:5000   # 실행 중인 서버 측정 (실제 데이터)
+"""
+
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+import argparse
+import base64
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+WEB_APP = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / 'results'
+sys.path.insert(0, str(WEB_APP))
+
+import smf  # noqa: E402
+from serving_throughput import start_server  # noqa: E402
+
+MUSIC_KEYS = ['C', 'D', 'E', 'F', 'G', 'A']
+PIANO_LOW, PIANO_HIGH = 21, 108
+
+
+# ---------- 합성 데이터 ----------
+
+def synthetic_midi(seconds, seed, notes_per_sec=8.0):
+    """피아노 연주 비슷한 SMF (노트 + 서스테인 페달, 120 BPM)"""
+    rng = random.Random(seed)
+    ticks_per_sec = 960  # 480 tpb, 120 BPM
+    items = [(0, 0xFF, smf.tempo_event(120).data, smf.META_TEMPO)]
+    t = 0.0
+    while t < seconds:
+        pitch = max(PIANO_LOW, min(PIANO_HIGH, int(rng.gauss(64, 12))))
+        start = int(t * ticks_per_sec)
+        dur = int(rng.uniform(0.08, 1.2) * ticks_per_sec)
+        items.append((start, smf.NOTE_ON, (pitch, rng.randint(30, 110)), None))
+        items.append((start + dur, smf.NOTE_OFF, (pitch, 0), None))
+        t += rng.expovariate(notes_per_sec)
+    for k in range(int(seconds // 2)):
+        items.append((int(k * 2 * ticks_per_sec), smf.CONTROL_CHANGE, (smf.CC_SUSTAIN, 127), None))
+        items.append((int((k * 2 + 1.5) * ticks_per_sec), smf.CONTROL_CHANGE, (smf.CC_SUSTAIN, 0), None))
+    return smf.serialize(smf.MidiFile(0, 480, [smf.track_from_ticks(items)]))
+
+
+def build_synthetic_tree(root, pieces=24, files_per_key=8, piece_seconds=300):
+    """root/MusicRoot/<키>/*.mid + root/maestro/<composers.json 경로> 생성"""
+    music_root = root / 'MusicRoot'
+    for k, key in enumerate(MUSIC_KEYS):
+        (music_root / key).mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_key):
+            name = f'{key}_{i:02d}.mid'
+            (music_root / key / name).write_bytes(synthetic_midi(30, seed=k * 1000 + i))
+
+    composers = json.loads((WEB_APP / 'static' / 'data' / 'composers.json').read_text(encoding='utf-8'))
+    all_pieces = sorted({p['midi_file']: (name, p) for name, c in composers.items() for p in c['pieces']}.items())
+    step = max(1, len(all_pieces) // pieces)
+    chosen = all_pieces[::step][:pieces]
+    maestro_root = root / 'maestro'
+    for i, (path, (_, piece)) in enumerate(chosen):
+        target = maestro_root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        seconds = min(piece_seconds, piece.get('duration') or piece_seconds)
+        target.write_bytes(synthetic_midi(seconds, seed=i))
+    return music_root, maestro_root, [(name, path) for path, (name, _) in chosen]
+
+
+def synthetic_drawing(seed):
+    """draw_to_music 캔버스와 같은 흰 배경 PNG data URL"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    img = Image.new('RGB', (400, 300), 'white')
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        color = tuple(rng.randint(0, 255) for _ in range(3))
+        draw.line([(rng.randint(0, 400), rng.randint(0, 300)) for _ in range(6)], fill=color, width=5)
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buf.getvalue()).decode()
+
+
+# ---------- 라우트 목록 ----------
+
+def get_json(host, port, path):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request('GET', path)
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return json.loads(body) if resp.status == 200 else None
+
+
+def discover_routes(host, port, maestro_pieces=None):
+    """서버에서 실제 키/파일/작곡가 이름을 조회해 라우트별 요청 목록 생성
+    반환: [(이름, 그룹, method, [(path, body), ...])]
+    """
+    routes = []
+
+    def add(name, group, paths, method='GET'):
+        paths = [p if isinstance(p, tuple) else (p, None) for p in paths if p]
+        if paths:
+            routes.append((name, group, method, paths))
+
+    for page in ('/', '/conductor', '/airpiano', '/singing', '/mimipiano', '/touch-piano',
+                 '/rhythm-game', '/midi-test', '/draw-to-music', '/classical-library'):
+        add(f'page {page}', 'page', [page])
+
+    summary = get_json(host, port, '/api/composers/summary') or {}
+    # 'A / B' 처럼 '/'가 들어간 이름은 <composer_name> 라우트로 조회되지 않으므로 제외
+    names = [n for n in sorted(summary) if '/' not in n][:20]
+    if maestro_pieces is None:
+        composers = get_json(host, port, '/api/composers') or {}
+        maestro_pieces = [(n, p['midi_file']) for n in names for p in composers[n]['pieces'][:1]]
+    pieces = [path for _, path in maestro_pieces]
+
+    add('page /composer/<name>', 'page', [f'/composer/{quote(n)}' for n in names])
+    add('page /piece/<path>', 'page', [f'/piece/{p}' for p in pieces])
+
+    for f in ('chord.CSV', 'progression.CSV', 'expression.csv', 'composers.json'):
+        add(f'static data/{f}', 'static', [f'/static/data/{f}'])
+    add('static js/common.js', 'static', ['/static/js/common.js'])
+    manifest = WEB_APP / 'static' / 'dist' / 'manifest.json'
+    if manifest.exists():
+        assets = json.loads(manifest.read_text(encoding='utf-8'))['assets']
+        add('assets (hashed)', 'static', [f"/assets/{e['file']}" for e in assets.values()])
+
+    listing = get_json(host, port, '/api/midi-files') or {}
+    midi_files = [f'/api/midi-file/{k}/{quote(f)}' for k, files in sorted(listing.items()) for f in files[:4]]
+    add('api midi-files', 'api', ['/api/midi-files'])
+    add('api midi-files?details=1', 'api', ['/api/midi-files?details=1'])
+    add('api midi-file/<key>/<file>', 'midi', midi_files)
+
+    add('api progressions/random', 'api', ['/api/progressions/random'])
+    add('api progressions/<id>', 'api', [f'/api/progressions/{i}' for i in range(0, 200, 7)])
+    add('api composers', 'api', ['/api/composers'])
+    add('api composers/summary', 'api', ['/api/composers/summary'])
+    add('api composers/<name>', 'api', [f'/api/composers/{quote(n)}' for n in names])
+    add('api piece/<path>', 'api', [f'/api/piece/{p}' for p in pieces])
+    add('api composer-info', 'api', ['/api/composer-info'])
+    add('api composer-info/<name>', 'api', [f'/api/composer-info/{quote(n)}' for n in names])
+    add('api search', 'api', [f'/api/search?q={quote(q)}' for q in
+                              ('chopin', 'beethoven sonata', 'op 28', 'bwv', 'rachmaninof', 'liszt hung')])
+
+    add('maestro midi', 'midi', [f'/api/maestro-midi/{p}' for p in pieces])
+    add('maestro events', 'midi', [f'/api/maestro-events/{p}' for p in pieces])
+    add('maestro range', 'midi', [f'/api/maestro-range/{p}?t0={t}&t1={t + 30}'
+                                  for p in pieces for t in (0, 60, 120)])
+
+    try:
+        drawings = [json.dumps({'image': synthetic_drawing(i)}).encode() for i in range(4)]
+    except ImportError:  # Pillow 없으면 작곡 라우트 생략
+        drawings = []
+    add('compose-from-image', 'compose', [('/api/compose-from-image', d) for d in drawings], method='POST')
+    add('metrics', 'api', ['/metrics'])
+    return routes
+
+
+# ---------- 부하 생성 ----------
+
+def run_route(host, port, method, paths, total, concurrency, accept_encoding):
+    """closed-loop 부하: concurrency개 연결이 total번 요청을 나눠 보냄"""
+    latencies, sizes = [], []
+    errors = {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        local, local_sizes = [], []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            path, body = paths[i % len(paths)]
+            h = dict(headers, **({'Content-Type': 'application/json'} if body else {}))
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=h)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            local.append(time.perf_counter() - t0)
+            local_sizes.append(len(data))
+            if resp.status >= 400:
+                with lock:
+                    errors[str(resp.status)] = errors.get(str(resp.status), 0) + 1
+            if resp.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            sizes.extend(local_sizes)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return summarize(latencies, sizes, errors, elapsed)
+
+
+def summarize(latencies, sizes, errors, elapsed):
+    if len(latencies) < 2:
+        return {'requests': len(latencies), 'errors': errors, 'rps': 0.0,
+                'p50': None, 'p95': None, 'p99': None, 'mean_bytes': 0}
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50': round(q[49] * 1000, 2),
+        'p95': round(q[94] * 1000, 2),
+        'p99': round(q[98] * 1000, 2),
+        'mean_bytes': round(sum(sizes) / len(sizes)),
+    }
+
+
+# ---------- 결과 저장 / 비교 ----------
+
+def git_revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=WEB_APP,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=WEB_APP,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(report):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(report['timestamp']))
+    path = RESULTS_DIR / f"{stamp}-{report['commit']}.json"
+    path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    return path
+
+
+def find_baseline(spec, exclude=None):
+    """'latest' / 파일 경로 / 커밋 해시 접두어 → 결과 파일"""
+    if spec and Path(spec).is_file():
+        return Path(spec)
+    files = sorted(f for f in RESULTS_DIR.glob('*.json') if f != exclude)
+    if spec != 'latest':
+        files = [f for f in files if f.stem.split('-', 2)[-1].startswith(spec)]
+    return files[-1] if files else None
+
+
+def compare(report, baseline, threshold):
+    """p95 또는 req/s가 threshold(%) 이상 나빠진 라우트 수 반환"""
+    print(f"\nCompared with {baseline['commit']} ({time.strftime('%Y-%m-%d %H:%M', time.localtime(baseline['timestamp']))})")
+    print(f"{'concurrency':>4}  {'route':<34} {'p95 ms':>16} {'req/s':>18}")
+    regressions = 0
+    for conc, routes in report['results'].items():
+        base_routes = baseline['results'].get(conc, {})
+        for name, r in routes.items():
+            b = base_routes.get(name)
+            if not b or not b['p95'] or not r['p95'] or not b['rps']:
+                continue
+            d_p95 = (r['p95'] - b['p95']) / b['p95'] * 100
+            d_rps = (r['rps'] - b['rps']) / b['rps'] * 100
+            bad = d_p95 > threshold or d_rps < -threshold
+            regressions += bad
+            mark = '  <-- regression' if bad else ''
+            print(f"{conc:>4}  {name:<34} {b['p95']:>7.1f} -> {r['p95']:<7.1f} "
+                  f"{b['rps']:>7.0f} -> {r['rps']:<7.0f}{mark}")
+    print(f"{regressions} regression(s) over {threshold:.0f}%")
+    return regressions
+
+
+# ---------- main ----------
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-route load test for the Piano Games web app')
+    parser.add_argument('--concurrency', default='1,8,32', help='동시 연결 수 목록 (쉼표 구분)')
+    parser.add_argument('--requests', type=int, default=300, help='라우트·동시성별 요청 수')
+    parser.add_argument('--routes', default='', help='라우트 이름/그룹 필터 (쉼표 구분, 예: api,midi)')
+    parser.add_argument('--mode', choices=('prod', 'dev'), default='prod', help='띄울 서버 종류')
+    parser.add_argument('--url', help='이미 실행 중인 서버 측정 (합성 데이터 생략)')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--pieces', type=int, default=24, help='합성 MAESTRO 곡 수')
+    parser.add_argument('--piece-seconds', type=float, default=300, help='합성 곡 최대 길이 (초)')
+    parser.add_argument('--accept-encoding', default='gzip, br')
+    parser.add_argument('--no-save', action='store_true', help='결과 파일 저장 안 함')
+    parser.add_argument('--compare', help="비교할 결과: 'latest', 파일 경로, 커밋 해시")
+    parser.add_argument('--threshold', type=float, default=15.0, help='회귀 판정 기준 (%%)')
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    filters = [f.strip() for f in args.routes.split(',') if f.strip()]
+    workdir = proc = None
+    try:
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+            maestro_pieces = None
+        else:
+            workdir = Path(tempfile.mkdtemp(prefix='piano-bench-'))
+            t0 = time.perf_counter()
+            music_root, maestro_root, maestro_pieces = build_synthetic_tree(
+                workdir, args.pieces, piece_seconds=args.piece_seconds)
+            print(f"Synthetic tree: {len(MUSIC_KEYS)} keys, {len(maestro_pieces)} MAESTRO pieces "
+                  f"in {time.perf_counter() - t0:.1f}s ({workdir})")
+            env = dict(os.environ, PIANO_MUSIC_ROOT=str(music_root), PIANO_MAESTRO_ROOT=str(maestro_root),
+                       PIANO_CACHE_DIR=str(workdir / 'cache'), PIANO_SLOW_MS='60000')
+            host, port = '127.0.0.1', args.port
+            proc = start_server(args.mode, port, env)
+
+        routes = discover_routes(host, port, maestro_pieces)
+        if filters:
+            routes = [r for r in routes if any(f == r[1] or f in r[0] for f in filters)]
+
+        report = {
+            'commit': git_revision(),
+            'timestamp': time.time(),
+            'mode': 'external' if args.url else args.mode,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'requests': args.requests,
+            'results': {},
+        }
+        for conc in levels:
+            print(f"\n== concurrency {conc} ==")
+            print(f"{'route':<34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'bytes':>9}  errors")
+            results = report['results'][str(conc)] = {}
+            for name, group, method, paths in routes:
+                # 워밍업: 디스크 캐시(이벤트 인코딩, 작곡) 생성 + 연결 준비
+                run_route(host, port, method, paths, len(paths), min(conc, len(paths)), args.accept_encoding)
+                r = run_route(host, port, method, paths, args.requests, conc, args.accept_encoding)
+                results[name] = r
+                p = [f"{r[k]:>8.1f}" if r[k] is not None else f"{'-':>8}" for k in ('p50', 'p95', 'p99')]
+                errors = ', '.join(f'{k}x{v}' for k, v in r['errors'].items()) or '-'
+                print(f"{name:<34} {r['rps']:>8.1f} {' '.join(p)} {r['mean_bytes']:>9}  {errors}")
+
+        saved = None
+        if not args.no_save:
+            saved = save_results(report)
+            print(f"\nSaved {saved.relative_to(WEB_APP)}")
+        if args.compare:
+            baseline = find_baseline(args.compare, exclude=saved)
+            if baseline is None:
+                print(f"No baseline result matches '{args.compare}'")
+            elif compare(report, json.loads(baseline.read_text(encoding='utf-8')), args.threshold):
+                sys.exit(1)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+개발 서버(app.py) vs 프로덕션 서버(serve.py) 처리량 비교
+
+각 모드로 서버를 띄운 뒤 같은 URL 묶음을 동시 요청으로 호출하고
+req/s 와 p50/p95 지연 시간을 출력한다.
+
+사용법 (web_app 폴더에서):
+    python benchmarks/serving_throughput.py --concurrency 16 --requests 2000
+"""
+
+from pathlib import Path
+import argparse
+import http.client
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+WEB_APP = Path(__file__).resolve().parent.parent
+
+URLS = [
+    '/',
+    '/api/midi-files',
+    '/api/composers/summary',
+    '/static/data/progression.CSV',
+    '/static/js/common.js',
+]
+
+MODES = {
+    'dev': [sys.executable, '-c',
+            "import sys; from app import app; "
+            "app.run(host='127.0.0.1', port=int(sys.argv[1]), debug=True, use_reloader=False)"],
+    'prod': [sys.executable, 'serve.py', '--bind'],
+}
+
+
+def start_server(mode, port, env=None):
+    cmd = list(MODES[mode])
+    cmd.append(str(port) if mode == 'dev' else f'127.0.0.1:{port}')
+    proc = subprocess.Popen(cmd, cwd=WEB_APP, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def run_load(port, total, concurrency, accept_encoding):
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            t0 = time.perf_counter()
+            conn.request('GET', URLS[i % len(URLS)], headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            local.append(time.perf_counter() - t0)
+            if resp.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    return {'rps': len(latencies) / elapsed, 'p50': q[49] * 1000, 'p95': q[94] * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dev vs production serving throughput')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--accept-encoding', default='gzip, br')
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in ('dev', 'prod'):
+        proc = start_server(mode, args.port)
+        try:
+            run_load(args.port, min(200, args.requests), args.concurrency, args.accept_encoding)  # warm-up
+            r = run_load(args.port, args.requests, args.concurrency, args.accept_encoding)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{mode:<6} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+리듬 게임 채보 생성 (MAESTRO / MusicRoot MIDI → 5레인 채보)
+    1. 30ms 안에 시작하는 노트를 하나의 타격 지점(onset)으로 묶는다
+    2. 곡의 음높이 분포를 1차원 k-평균으로 5개 음역대로 나눠 레인을 정한다 (맨 윗음 기준)
+    3. 타격 지점마다 세기/화음 크기/앞 쉼표 길이로 중요도를 매기고, 난이도별 최소 간격을
+       지키며 중요한 것부터 고른다. hard 이상은 큰 화음의 베이스를 두 번째 레인으로 추가
+    4. 결과 밀도(초당 노트 수, 4초 구간 최고 밀도)로 난이도 수치를 매긴다
+
+포맷 (JSON, gzip 저장, 원본 해시 기준 web_app/cache/charts)
+    duration  곡 길이 (초)
+    centers   레인별 음역 중심 (MIDI 노트 번호)
+    levels    [{name, rating, count, nps, peak_nps, t[], lane[], pitch[]}]
+              t는 이전 노트와의 간격 (ms, 첫 노트는 곡 시작 기준), pitch는 타격 시 낼 음
+
+실행: python charts.py                     → MAESTRO_ROOT + MusicRoot 전체 채보 일괄 생성 (프로세스 풀)
+      python charts.py song.mid            → 채보 요약 출력
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+import metrics
+import smf
+from maestro_events import MAESTRO_ROOT, NOTE, _write_atomic, encode
+
+FORMAT_VERSION = 1
+LANES = 5
+ONSET_MERGE_MS = 30
+# 난이도 이름 → (노트 사이 최소 간격 ms, 동시에 칠 수 있는 레인 수)
+LEVELS = {
+    'easy': (450, 1),
+    'normal': (250, 1),
+    'hard': (150, 2),
+    'expert': (90, 2),
+}
+PEAK_WINDOW_MS = 4000
+
+BASE_DIR = Path(__file__).parent
+MUSIC_ROOT = BASE_DIR.parent / 'mimipiano' / 'MusicRoot'
+CACHE_DIR = BASE_DIR / 'cache' / 'charts'
+
+
+def onsets(events):
+    """컬럼형 이벤트 → 타격 지점 배열 dict (time, top, bottom, vel, size)"""
+    kind = np.asarray(events['type'], dtype=np.int8)
+    is_note = kind == NOTE
+    t = np.asarray(events['t'], dtype=np.int64)[is_note]
+    pitch = np.asarray(events['pitch'], dtype=np.int64)[is_note]
+    vel = np.asarray(events['vel'], dtype=np.int64)[is_note]
+    if len(t) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return {'time': empty, 'top': empty, 'bottom': empty, 'vel': empty, 'size': empty}
+
+    # 이전 노트와 ONSET_MERGE_MS 넘게 떨어지면 새 타격 지점 (굴린 화음은 하나로 묶임)
+    starts = np.flatnonzero(np.diff(t, prepend=t[0] - ONSET_MERGE_MS - 1) > ONSET_MERGE_MS)
+    return {
+        'time': t[starts],
+        'top': np.maximum.reduceat(pitch, starts),
+        'bottom': np.minimum.reduceat(pitch, starts),
+        'vel': np.maximum.reduceat(vel, starts),
+        'size': np.diff(np.append(starts, len(t))),
+    }
+
+
+def register_centers(pitches, lanes=LANES, iterations=20):
+    """음높이 분포 → 오름차순 음역 중심 lanes개 (1차원 k-평균, 분위수로 초기화)"""
+    p = np.asarray(pitches, dtype=np.float64)
+    distinct = np.unique(p)
+    if len(distinct) <= lanes:
+        return distinct
+    centers = np.quantile(p, (np.arange(lanes) + 0.5) / lanes)
+    for _ in range(iterations):
+        nearest = np.abs(p[:, None] - centers[None, :]).argmin(axis=1)
+        counts = np.bincount(nearest, minlength=lanes)
+        sums = np.bincount(nearest, weights=p, minlength=lanes)
+        updated = np.where(counts > 0, sums / np.maximum(counts, 1), centers)
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    return np.sort(centers)
+
+
+def lanes_for(pitches, centers, lanes=LANES):
+    """가장 가까운 음역 중심 → 레인 번호. 중심이 lanes개보다 적으면 레인 전체에 고르게 펼친다"""
+    nearest = np.abs(np.asarray(pitches, dtype=np.float64)[:, None] - centers[None, :]).argmin(axis=1)
+    if len(centers) < lanes:
+        if len(centers) == 1:
+            return np.full(len(nearest), lanes // 2, dtype=np.int64)
+        return np.rint(nearest * (lanes - 1) / (len(centers) - 1)).astype(np.int64)
+    return nearest.astype(np.int64)
+
+
+def salience(on):
+    """타격 지점 중요도: 세기 + 화음 크기 + 앞 쉼표 길이 + 주변보다 센 악센트"""
+    vel = on['vel'] / 127.0
+    gap = np.diff(on['time'], prepend=on['time'][:1] - 1000) if len(vel) else vel
+    local = np.convolve(vel, np.ones(9) / 9, mode='same') if len(vel) else vel
+    return (vel + 0.25 * np.log2(on['size']) + 0.5 * np.minimum(gap, 1000) / 1000
+            + np.maximum(vel - local, 0))
+
+
+def select(times, score, min_gap):
+    """중요도 순으로 고르되, 이미 고른 지점과 min_gap(ms) 안쪽이면 버린다 → 고른 인덱스 (시간순)"""
+    taken_t = []
+    taken = []
+    for i in np.argsort(-score, kind='stable'):
+        t = times[i]
+        k = bisect.bisect_left(taken_t, t)
+        if k > 0 and t - taken_t[k - 1] < min_gap:
+            continue
+        if k < len(taken_t) and taken_t[k] - t < min_gap:
+            continue
+        taken_t.insert(k, t)
+        taken.insert(k, i)
+    return np.asarray(taken, dtype=np.int64)
+
+
+def rating(times, duration_ms):
+    """채보 밀도 → (난이도 수치, 평균 초당 노트, 4초 구간 최고 초당 노트)"""
+    if len(times) == 0:
+        return 1.0, 0.0, 0.0
+    span = max(1000.0, float(times[-1] - times[0]) or duration_ms)
+    nps = len(times) * 1000.0 / span
+    ends = np.searchsorted(times, times + PEAK_WINDOW_MS)
+    peak = float((ends - np.arange(len(times))).max()) * 1000.0 / PEAK_WINDOW_MS
+    return round(float(np.clip(1 + 1.5 * nps + 0.5 * peak, 1, 20)), 1), round(nps, 2), round(peak, 2)
+
+
+def build(events, levels=LEVELS):
+    """컬럼형 이벤트 (maestro_events.encode 결과) → 채보 dict"""
+    on = onsets(events)
+    duration_ms = round(events['duration'] * 1000)
+    centers = register_centers(np.concatenate([on['top'], on['bottom']]))
+    top_lane = lanes_for(on['top'], centers) if len(centers) else on['top']
+    bottom_lane = lanes_for(on['bottom'], centers) if len(centers) else on['bottom']
+    score = salience(on)
+    # 큰 화음 중 중요도 상위 30%만 베이스를 두 번째 레인으로
+    chord = (on['size'] >= 3) & (bottom_lane != top_lane)
+    if len(score):
+        chord &= score >= np.quantile(score, 0.7)
+
+    charted = []
+    for name, (min_gap, max_lanes) in levels.items():
+        picked = select(on['time'], score, min_gap)
+        t = on['time'][picked]
+        lane = top_lane[picked]
+        pitch = on['top'][picked]
+        if max_lanes > 1 and len(picked):
+            double = chord[picked]
+            t = np.concatenate([t, t[double]])
+            lane = np.concatenate([lane, bottom_lane[picked][double]])
+            pitch = np.concatenate([pitch, on['bottom'][picked][double]])
+            order = np.lexsort((lane, t))
+            t, lane, pitch = t[order], lane[order], pitch[order]
+        level, nps, peak = rating(np.unique(t), duration_ms)
+        charted.append({
+            'name': name,
+            'rating': level,
+            'count': int(len(t)),
+            'nps': nps,
+            'peak_nps': peak,
+            't': np.diff(t, prepend=0).tolist(),
+            'lane': lane.tolist(),
+            'pitch': pitch.tolist(),
+        })
+
+    return {
+        'version': FORMAT_VERSION,
+        'duration': events['duration'],
+        'lanes': LANES,
+        'centers': [round(float(c), 1) for c in centers],
+        'levels': charted,
+    }
+
+
+def encode_chart(chart):
+    body = json.dumps(chart, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(body, compresslevel=9)
+
+
+def cache_path(cache_dir, digest):
+    return Path(cache_dir) / digest[:2] / f'{digest}.v{FORMAT_VERSION}.json.gz'
+
+
+class ChartCache:
+    """원본 해시 → gzip JSON 채보 디스크 캐시 (없으면 이벤트 캐시로 바로 생성)"""
+
+    def __init__(self, event_cache, cache_dir=CACHE_DIR):
+        self.event_cache = event_cache
+        self.cache_dir = Path(cache_dir)
+
+    def get(self, path):
+        """원본 MIDI 경로 → (gzip 바이트, 원본 해시)"""
+        digest = self.event_cache.source_hash(Path(path))
+        target = cache_path(self.cache_dir, digest)
+        try:
+            data = target.read_bytes()
+        except FileNotFoundError:
+            metrics.cache_event('charts', False)
+        else:
+            metrics.cache_event('charts', True)
+            return data, digest
+
+        events, digest = self.event_cache.get(path)
+        data = encode_chart(build(json.loads(gzip.decompress(events))))
+        _write_atomic(target, data)
+        return data, digest
+
+
+# ---------- 일괄 생성 (프로세스 풀) ----------
+
+def _chart_job(path, cache_dir, force=False):
+    """워커: MIDI 한 곡 → 채보 파일. (상태, 원본 바이트, 채보 바이트, 메시지)"""
+    try:
+        raw = Path(path).read_bytes()
+        target = cache_path(cache_dir, hashlib.sha1(raw).hexdigest())
+        if not force and target.exists():
+            return 'cached', len(raw), target.stat().st_size, ''
+        data = encode_chart(build(encode(smf.parse(raw))))
+        _write_atomic(target, data)
+        return 'built', len(raw), len(data), ''
+    except (OSError, smf.MidiFormatError, IndexError, ValueError) as e:
+        return 'error', 0, 0, str(e)
+
+
+def midi_files(roots):
+    files = []
+    for root in roots:
+        root = Path(root)
+        if root.is_dir():
+            files += sorted(p for p in root.rglob('*') if p.suffix.lower() in ('.mid', '.midi'))
+    return files
+
+
+def build_all(roots=(MAESTRO_ROOT, MUSIC_ROOT), cache_dir=CACHE_DIR, workers=None, force=False):
+    """라이브러리 전체 채보 일괄 생성 (이미 있는 채보는 건너뜀)"""
+    files = midi_files(roots)
+    workers = workers or os.cpu_count() or 1
+    print(f"Charting {len(files)} MIDI files with {workers} workers → {cache_dir}")
+    t0 = time.time()
+    counts = {'built': 0, 'cached': 0, 'error': 0}
+    src_bytes = out_bytes = 0
+    # spawn: 서버 프로세스에서 불러도 listen 소켓을 물려주지 않도록 compose.py와 같은 방식
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(_chart_job, str(f), str(cache_dir), force): f for f in files}
+        for i, future in enumerate(as_completed(futures), 1):
+            status, src, out, message = future.result()
+            counts[status] += 1
+            src_bytes += src
+            out_bytes += out
+            if status == 'error':
+                print(f"  [ERROR] {futures[future]}: {message}")
+            if i % 100 == 0:
+                print(f"  [{i}/{len(files)}]")
+    elapsed = time.time() - t0
+    print(f"[OK] {counts['built']} built, {counts['cached']} cached, {counts['error']} failed "
+          f"in {elapsed:.1f}s ({len(files) / max(elapsed, 1e-9):.1f} files/s), "
+          f"{src_bytes / 1e6:.1f} MB MIDI -> {out_bytes / 1e6:.2f} MB charts")
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rhythm-game chart generator')
+    parser.add_argument('midi', nargs='?', type=Path, help='MIDI 파일 (없으면 라이브러리 전체 일괄 생성)')
+    parser.add_argument('--root', type=Path, action='append', help='MIDI 폴더 (여러 번 지정 가능)')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='이미 있는 채보도 다시 생성')
+    args = parser.parse_args()
+
+    if args.midi is None:
+        build_all(args.root or (MAESTRO_ROOT, MUSIC_ROOT), args.cache_dir, args.workers, args.force)
+    else:
+        start = time.perf_counter()
+        chart = build(encode(smf.read(args.midi)))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{args.midi}: {chart['duration']:.1f}s, lanes centered at {chart['centers']} ({elapsed:.0f}ms)")
+        for level in chart['levels']:
+            print(f"  {level['name']:<7} rating {level['rating']:>4}  {level['count']:>5} notes  "
+                  f"{level['nps']:>5} nps (peak {level['peak_nps']})")
+        print(f"  {len(encode_chart(chart))} bytes gzip")
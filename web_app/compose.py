@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+그림 → 음악 (Draw to Music)
+캔버스 PNG에서 색/획/밀도 특징을 NumPy로 추출하고,
+progression.CSV 진행 + chord.CSV 코드 구성음으로 멜로디/반주를 만들어 MIDI로 저장한다
+
+무거운 작업(디코딩/특징 추출/작곡)은 크기가 제한된 프로세스 풀에서 실행하며,
+결과는 (이미지, chord/progression 스냅샷) 해시 기준으로 web_app/cache/compositions 에 캐시한다
+
+실행: python compose.py drawing.png  → 풀 없이 바로 작곡해 결과 요약 출력
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import argparse
+import base64
+import binascii
+import hashlib
+import io
+import json
+import multiprocessing
+import re
+import threading
+
+import numpy as np
+from PIL import Image
+
+import metrics
+import smf
+from maestro_events import _write_atomic, encode
+from progressions import ProgressionTable
+
+FORMAT_VERSION = 1
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / 'cache' / 'compositions'
+
+MAX_IMAGE_BYTES = 4 * 1024 * 1024
+ANALYSIS_SIZE = 128     # 특징 추출 해상도 (긴 변 픽셀)
+INK_THRESHOLD = 0.15    # 흰 배경 대비 이 이상 어두우면 그린 픽셀
+MIN_INK = 0.002         # 그린 픽셀 비율이 이보다 작으면 빈 그림
+
+TICKS_PER_BEAT = 480
+STEP_BEATS = 2          # 진행 한 칸 = 2박
+STEPS = 32
+MELODY_RANGE = (60, 84)
+CHORD_RANGE = (52, 67)
+BASS_RANGE = (36, 48)
+
+# 색상(hue) → 조성 (스크랴빈 색-음 대응을 단순화)
+HUE_KEYS = [(0, 0), (30, 7), (60, 2), (120, 9), (190, 4), (230, 11), (270, 6), (300, 1), (330, 5), (360, 0)]
+KEY_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B']
+COLOR_NAMES = [(15, 'red'), (45, 'orange'), (70, 'yellow'), (160, 'green'), (200, 'cyan'),
+               (255, 'blue'), (290, 'purple'), (335, 'pink'), (360, 'red')]
+
+_MINOR_RE = re.compile(r'^[A-G][#b]?m(?:_|$)')
+
+
+class ComposeError(ValueError):
+    """잘못된 입력 (디코딩 실패, 빈 그림 등)"""
+
+
+class ComposeBusy(RuntimeError):
+    """대기 중인 작곡 작업이 너무 많음"""
+
+
+def decode_data_url(data_url):
+    """'data:image/png;base64,...' → PNG 바이트"""
+    if not isinstance(data_url, str):
+        raise ComposeError('Missing image')
+    _, _, payload = data_url.partition('base64,')
+    if len(payload) > MAX_IMAGE_BYTES * 4 // 3 + 4:
+        raise ComposeError('Image too large')
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ComposeError('Invalid image data')
+
+
+# ---------- 특징 추출 ----------
+
+def load_rgb(png):
+    """PNG 바이트 → 흰 배경에 합성한 (h, w, 3) float32 [0, 1] 배열 (ANALYSIS_SIZE로 축소)"""
+    try:
+        img = Image.open(io.BytesIO(png))
+        img.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+        img = img.convert('RGBA')
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ComposeError('Invalid image data')
+    background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+    rgb = Image.alpha_composite(background, img).convert('RGB')
+    return np.asarray(rgb, dtype=np.float32) / 255.0
+
+
+def hsv(rgb):
+    """(h, w, 3) RGB → hue(도), saturation, value"""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    mx = rgb.max(axis=2)
+    mn = rgb.min(axis=2)
+    d = mx - mn
+    safe = np.where(d > 0, d, 1.0)
+    hue = np.select([mx == r, mx == g], [((g - b) / safe) % 6, (b - r) / safe + 2], (r - g) / safe + 4)
+    hue = np.where(d > 0, hue * 60.0, 0.0)
+    sat = np.where(mx > 0, d / np.where(mx > 0, mx, 1.0), 0.0)
+    return hue, sat, mx
+
+
+def extract_features(rgb, steps=STEPS):
+    """그림 특징 (색/획/밀도 + 가로 구간별 윤곽)"""
+    h, w, _ = rgb.shape
+    ink = (1.0 - rgb.min(axis=2)) > INK_THRESHOLD
+    n_ink = int(ink.sum())
+    density = n_ink / ink.size
+    if density < MIN_INK:
+        raise ComposeError('Empty drawing')
+
+    hue, sat, val = hsv(rgb)
+    colored = ink & (sat > 0.25)
+    n_colored = int(colored.sum())
+    color_ratio = n_colored / n_ink
+
+    if n_colored:
+        angles = np.deg2rad(hue[colored])
+        weights = sat[colored]
+        mean_hue = float(np.rad2deg(np.arctan2((np.sin(angles) * weights).sum(),
+                                               (np.cos(angles) * weights).sum())) % 360)
+        hues = hue[colored]
+        warm = ((hues < 70) | (hues >= 300)).mean()
+        cool = ((hues >= 150) & (hues < 270)).mean()
+        hist = np.histogram(hues, bins=12, range=(0, 360))[0] / n_colored
+        palette = int((hist > 0.05).sum())
+        bins = np.minimum((hues // 30).astype(int), 11)
+        top_hues = [int(hues[bins == i].mean()) for i in np.argsort(hist)[::-1][:2] if hist[i] > 0.15]
+    else:
+        mean_hue, warm, cool, palette, top_hues = 0.0, 0.0, 0.0, 0, []
+
+    # 획: 경계(잉크/배경 전환) 수 - 가는 선이 많을수록 큼
+    transitions = int((ink[:, 1:] != ink[:, :-1]).sum() + (ink[1:] != ink[:-1]).sum())
+    edge_density = transitions / (h * w)
+    fill = n_ink / max(1, transitions)   # 굵게 칠한 면일수록 큼
+
+    ys, xs = np.nonzero(ink)
+    center_y = 1.0 - ys.mean() / max(1, h - 1)   # 위쪽일수록 1
+    spread_x = (xs.max() - xs.min() + 1) / w
+
+    # 가로 구간별 활동량 / 가장 높은 잉크 위치 (멜로디 윤곽)
+    bounds = np.linspace(0, w, steps + 1).astype(int)
+    col_ink = ink.sum(axis=0)
+    top = np.where(col_ink > 0, ink.argmax(axis=0), h)
+    starts = np.minimum(bounds[:-1], w - 1)
+    counts = np.add.reduceat(col_ink, starts)
+    widths = np.maximum(1, bounds[1:] - bounds[:-1])
+    activity = np.clip(counts / (widths * h) * 4.0, 0.0, 1.0)
+    highest = np.minimum.reduceat(top, starts)
+    contour = [None if t >= h else round(1.0 - t / max(1, h - 1), 3) for t in highest.tolist()]
+
+    return {
+        'density': round(density, 4),
+        'color_ratio': round(color_ratio, 3),
+        'hue': round(mean_hue, 1),
+        'top_hues': top_hues,
+        'saturation': round(float(sat[ink].mean()), 3),
+        'brightness': round(float(val[ink].mean()), 3),
+        'warmth': round(float(warm - cool), 3),
+        'palette': palette,
+        'edge_density': round(edge_density, 4),
+        'fill': round(fill, 2),
+        'center_y': round(float(center_y), 3),
+        'spread_x': round(float(spread_x), 3),
+        'activity': [round(a, 3) for a in activity.tolist()],
+        'contour': contour,
+    }
+
+
+# ---------- 특징 → 음악 파라미터 ----------
+
+def _hue_name(h):
+    return next(name for bound, name in COLOR_NAMES if h < bound)
+
+
+def key_for(features):
+    """주 색상 → 조성 (거의 검은 선만 있으면 C)"""
+    if features['color_ratio'] < 0.2:
+        return 0
+    h = features['hue']
+    return min(HUE_KEYS, key=lambda hk: abs(hk[0] - h))[1]
+
+
+def parameters(features):
+    energy = float(np.clip(0.6 * min(1.0, features['edge_density'] * 6)
+                           + 0.25 * min(1.0, features['palette'] / 5)
+                           + 0.15 * min(1.0, features['density'] * 4), 0.0, 1.0))
+    brightness = float(np.clip(0.5 + 0.35 * features['warmth']
+                               + 0.3 * (features['center_y'] - 0.5)
+                               + 0.2 * (features['color_ratio'] - 0.5), 0.0, 1.0))
+    return {
+        'energy': round(energy, 3),
+        'major': round(brightness, 3),
+        'key': key_for(features),
+        'tempo': int(round(66 + 70 * energy)),
+        'velocity': int(round(56 + 36 * features['saturation'] + 10 * energy)),
+        'register': int(round((features['center_y'] - 0.5) * 10)),
+    }
+
+
+def describe(features, params):
+    colors = [_hue_name(h) for h in features['top_hues']]
+    if not colors:
+        palette = 'black-and-white'
+    elif len(colors) == 1:
+        palette = colors[0]
+    else:
+        palette = f'{colors[0]} and {colors[1]}'
+    strokes = 'bold, filled shapes' if features['fill'] > 3 else 'light, flowing lines'
+    size = 'big ' if features['density'] > 0.2 else 'delicate ' if features['density'] < 0.03 else ''
+    phrase = f'{size}{palette} drawing'
+    article = 'An' if phrase[0] in 'aeiou' else 'A'
+    description = f'{article} {phrase} with {strokes}'
+
+    energy, major = params['energy'], params['major']
+    if major >= 0.55:
+        mood = 'bright and playful' if energy >= 0.5 else 'warm and peaceful'
+    else:
+        mood = 'dramatic and restless' if energy >= 0.5 else 'calm and wistful'
+    genre = ('lively etude' if energy >= 0.7 else 'waltz' if energy >= 0.45
+             else 'pastoral ballad' if major >= 0.55 else 'nocturne')
+    return {'description': description, 'mood': mood, 'suggested_genre': genre}
+
+
+# ---------- 작곡 ----------
+
+def minor_ratio(item):
+    return sum(1 for s in item['seq'] if _MINOR_RE.match(s.split('/', 1)[0])) / len(item['seq'])
+
+
+class ProgressionChooser:
+    """코드가 모두 해석되는 진행만 골라 단조 비율로 정렬해 둔다"""
+
+    def __init__(self, table):
+        self.table = table
+        ids = [i for i in table.ids if all(step['known'] for step in table.items[i]['steps'])]
+        self.ids = np.array(ids, dtype=np.int64)
+        self.minor = np.array([minor_ratio(table.items[i]) for i in ids], dtype=np.float32)
+
+    def choose(self, major, seed, pool=16):
+        """단조 비율이 (1 - major)에 가까운 진행 중 seed로 하나 선택"""
+        if not len(self.ids):
+            raise ComposeError('No usable progressions')
+        nearest = np.argsort(np.abs(self.minor - (1.0 - major)), kind='stable')[:pool]
+        return self.table.items[int(self.ids[nearest[seed % len(nearest)]])]
+
+
+def nearest_pc(pcs, target, low, high):
+    """pcs 중 target에 가장 가까운 [low, high] 음"""
+    best = None
+    for note in range(low, high + 1):
+        if note % 12 in pcs and (best is None or abs(note - target) < abs(best - target)):
+            best = note
+    return best
+
+
+def voicing(pcs, prev, low=CHORD_RANGE[0], high=CHORD_RANGE[1]):
+    """구성음 최대 4개를 이전 보이싱 중심 가까이 배치 (부드러운 성부 진행)"""
+    center = sum(prev) / len(prev) if prev else (low + high) / 2
+    notes = sorted({nearest_pc({pc}, center, low, high) for pc in pcs} - {None})
+    while len(notes) > 4:
+        notes.pop(0 if abs(notes[0] - center) > abs(notes[-1] - center) else -1)
+    return notes
+
+
+def compose(features, progression, params):
+    """특징 + 진행 → MidiFile"""
+    step_ticks = STEP_BEATS * TICKS_PER_BEAT
+    shift = params['key'] if params['key'] <= 6 else params['key'] - 12
+    mel_lo = MELODY_RANGE[0] + params['register']
+    mel_hi = MELODY_RANGE[1] + params['register']
+    base_vel = params['velocity']
+    arpeggio = params['energy'] >= 0.4
+
+    melody, accomp = [], []
+
+    def note(track, tick, pitch, dur, vel):
+        vel = int(np.clip(vel, 1, 127))
+        track.append((tick, smf.NOTE_ON, (pitch, vel), None))
+        track.append((tick + dur, smf.NOTE_OFF, (pitch, 0), None))
+
+    steps = progression['steps'][:STEPS]
+    contour, activity = features['contour'], features['activity']
+    prev_voicing = []
+    for i, step in enumerate(steps):
+        tick = i * step_ticks
+        pcs = {(pc + shift) % 12 for pc in step['pcs']}
+        bass_pc = step['bass'] if step['bass'] is not None else (min(step['pcs']) if step['pcs'] else 0)
+        bass_pc = (bass_pc + shift) % 12
+
+        # 반주: 베이스 + 보이싱 (에너지가 크면 8분음표 아르페지오)
+        bass = nearest_pc({bass_pc}, (BASS_RANGE[0] + BASS_RANGE[1]) / 2, *BASS_RANGE)
+        note(accomp, tick, bass, step_ticks - 10, base_vel - 8)
+        chord = voicing(pcs - {bass_pc} or pcs, prev_voicing)
+        prev_voicing = chord or prev_voicing
+        if arpeggio and chord:
+            eighth = TICKS_PER_BEAT // 2
+            pattern = chord + chord[-2:0:-1]
+            for k in range(step_ticks // eighth):
+                note(accomp, tick + k * eighth, pattern[k % len(pattern)], eighth, base_vel - 18)
+        else:
+            for pitch in chord:
+                note(accomp, tick, pitch, step_ticks - 10, base_vel - 20)
+
+        # 멜로디: 가로 구간의 가장 높은 잉크 위치 → 음높이, 활동량 → 음 개수
+        col = i * len(contour) // max(1, len(steps))
+        height = contour[col]
+        if height is None or not pcs:
+            continue
+        nxt = contour[col + 1] if col + 1 < len(contour) and contour[col + 1] is not None else height
+        a = activity[col]
+        subdivisions = 1 if a < 0.15 else 2 if a < 0.4 else 4
+        sub_ticks = step_ticks // subdivisions
+        for k in range(subdivisions):
+            frac = height + (nxt - height) * k / subdivisions
+            target = mel_lo + frac * (mel_hi - mel_lo)
+            pitch = nearest_pc(pcs, target, mel_lo, mel_hi)
+            accent = 10 if k == 0 else 0
+            note(melody, tick + k * sub_ticks, pitch, sub_ticks - 20, base_vel + accent)
+
+    end_tick = len(steps) * step_ticks
+    conductor = [smf.Event(0, 0xFF, b'Draw to Music', smf.META_TRACK_NAME), smf.tempo_event(params['tempo'])]
+    tracks = [conductor]
+    for name, items in (('Melody', melody), ('Accompaniment', accomp)):
+        events = smf.track_from_ticks([(0, 0xFF, name.encode(), smf.META_TRACK_NAME)] + items)
+        last = sum(ev.delta for ev in events)
+        events.append(smf.Event(max(0, end_tick - last), 0xFF, b'', smf.META_END_OF_TRACK))
+        tracks.append(events)
+    return smf.MidiFile(1, TICKS_PER_BEAT, tracks)
+
+
+def run(png, digest, chooser):
+    """PNG → (결과 dict, MIDI 바이트), digest는 결과 ID (진행 선택은 이미지 해시로 결정)"""
+    features = extract_features(load_rgb(png))
+    params = parameters(features)
+    progression = chooser.choose(params['major'], int(hashlib.sha1(png).hexdigest()[:8], 16))
+    mf = compose(features, progression, params)
+    midi = smf.serialize(mf)
+    events = encode(smf.parse(midi))
+    result = {
+        'version': FORMAT_VERSION,
+        'hash': digest,
+        'analysis': describe(features, params),
+        'features': {k: v for k, v in features.items() if k not in ('activity', 'contour')},
+        'music': {
+            'progression': progression['name'],
+            'progression_id': progression['id'],
+            'key': KEY_NAMES[params['key']],
+            'mode': 'major' if params['major'] >= 0.5 else 'minor',
+            'tempo': params['tempo'],
+            'duration': events['duration'],
+            'note_count': events['note_count'],
+        },
+        'midi_url': f'/api/compositions/{digest}.mid',
+        'events': events,
+    }
+    return result, midi
+
+
+# ---------- 프로세스 풀 워커 ----------
+
+_worker_chooser = None
+
+
+def _init_worker(chord_rows, prog_rows):
+    global _worker_chooser
+    _worker_chooser = ProgressionChooser(ProgressionTable(chord_rows, prog_rows))
+
+
+def _worker_job(png, digest, cache_dir):
+    result, midi = run(png, digest, _worker_chooser)
+    cache_dir = Path(cache_dir)
+    _write_atomic(cache_dir / f'{digest}.v{FORMAT_VERSION}.mid', midi)
+    _write_atomic(cache_dir / f'{digest}.v{FORMAT_VERSION}.json',
+                  json.dumps(result, separators=(',', ':')).encode('utf-8'))
+    return result
+
+
+def composition_digest(png, data_key):
+    """결과 캐시 키: 이미지 + (chord etag, progression etag) - CSV가 바뀌면 새로 작곡"""
+    h = hashlib.sha1(png)
+    for etag in data_key:
+        h.update(b'\0' + etag.encode('utf-8'))
+    return h.hexdigest()
+
+
+class ComposeService:
+    """작곡 작업 풀 + 이미지/데이터 해시 캐시
+    max_pending을 넘는 동시 요청은 ComposeBusy로 거절해 Flask 스레드가 모두 묶이지 않게 한다
+    같은 그림이 동시에 들어오면 하나의 작업을 공유한다
+    """
+
+    def __init__(self, data_store, chords='chords', progressions='progressions',
+                 cache_dir=CACHE_DIR, workers=2, max_pending=4, timeout=30.0):
+        self.data_store = data_store
+        self.names = (chords, progressions)
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._key = None
+        self._pending = {}  # digest -> (pool, Future)
+
+    def midi_path(self, digest):
+        return self.cache_dir / f'{digest}.v{FORMAT_VERSION}.mid'
+
+    def cached(self, digest):
+        try:
+            return json.loads((self.cache_dir / f'{digest}.v{FORMAT_VERSION}.json').read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _data(self):
+        """현재 chord/progression 스냅샷 → ((chord etag, prog etag), (chord rows, prog rows))"""
+        chord_asset = self.data_store.get(self.names[0])
+        prog_asset = self.data_store.get(self.names[1])
+        if chord_asset is None or prog_asset is None:
+            raise ComposeError('Progression data not found')
+        return (chord_asset.etag, prog_asset.etag), (chord_asset.value, prog_asset.value)
+
+    def _executor(self, key, rows):
+        """chord/progression 스냅샷이 바뀌면 새 풀로 교체 (lock 안에서 호출)"""
+        if key != self._key or self._pool is None:
+            old = self._pool
+            # spawn: fork하면 워커가 서버의 listen 소켓을 물려받아 서버 종료 후에도 포트를 잡고 있음
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker,
+                                             initargs=rows)
+            self._key = key
+            if old is not None:
+                old.shutdown(wait=False)
+        return self._pool
+
+    def _discard(self, pool):
+        """깨진 풀(워커가 죽음)을 버린다 - 다음 _executor()가 새로 만든다 (lock 안에서 호출)"""
+        if self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool, self._key = None, None
+
+    def _submit(self, png, digest, key, rows):
+        """진행 중인 같은 작업이 있으면 공유, 없으면 풀에 제출 → (pool, future)"""
+        with self._lock:
+            pool, future = self._pending.get(digest, (None, None))
+            if future is not None and not future.done():
+                return pool, future
+            if len(self._pending) >= self.max_pending:
+                raise ComposeBusy('Too many compositions in progress')
+            pool = self._executor(key, rows)
+            try:
+                future = pool.submit(_worker_job, png, digest, str(self.cache_dir))
+            except BrokenProcessPool:
+                self._discard(pool)
+                pool = self._executor(key, rows)
+                future = pool.submit(_worker_job, png, digest, str(self.cache_dir))
+            self._pending[digest] = pool, future
+        # lock 밖에서 등록: 이미 끝난 future면 콜백이 바로 실행되어 _done()이 lock을 잡는다
+        future.add_done_callback(lambda f, d=digest: self._done(d, f))
+        return pool, future
+
+    def compose(self, data_url):
+        png = decode_data_url(data_url)
+        key, rows = self._data()
+        digest = composition_digest(png, key)
+        result = self.cached(digest)
+        metrics.cache_event('compose', result is not None)
+        if result is not None:
+            return result
+
+        pool, future = self._submit(png, digest, key, rows)
+        try:
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # 워커 하나가 죽으면(OOM 등) 풀 전체가 깨진다 - 풀을 버리고 한 번만 다시 시도
+            with self._lock:
+                self._discard(pool)
+            pool, future = self._submit(png, digest, key, rows)
+            return future.result(timeout=self.timeout)
+
+    def _done(self, digest, future):
+        with self._lock:
+            if self._pending.get(digest, (None, None))[1] is future:
+                self._pending.pop(digest)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool, self._key = None, None
+
+
+if __name__ == '__main__':
+    from data_store import load_csv_rows
+
+    parser = argparse.ArgumentParser(description='Compose a MIDI file from a drawing')
+    parser.add_argument('image', type=Path, help='PNG 그림 파일')
+    parser.add_argument('-o', '--output', type=Path, help='MIDI 저장 경로')
+    args = parser.parse_args()
+
+    data_dir = BASE_DIR / 'static' / 'data'
+    table = ProgressionTable(load_csv_rows((data_dir / 'chord.CSV').read_bytes()),
+                             load_csv_rows((data_dir / 'progression.CSV').read_bytes()))
+    png = args.image.read_bytes()
+    result, midi = run(png, hashlib.sha1(png).hexdigest(), ProgressionChooser(table))
+    print(json.dumps({k: result[k] for k in ('analysis', 'features', 'music')}, indent=2))
+    if args.output:
+        args.output.write_bytes(midi)
+        print(f"[OK] {args.output}")
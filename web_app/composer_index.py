@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+composers.json / composer_info.json 인덱스
+요약/작곡가별/곡별 조회를 미리 계산해 둔다 (DataStore 로더로 사용)
+"""
+
+import json
+
+
+def _compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class ComposerIndex:
+    """composers.json 한 버전에서 만든 불변 인덱스"""
+
+    def __init__(self, raw):
+        data = json.loads(raw.decode('utf-8'))
+        self.composers = data
+        self.full_body = _compact(data)
+
+        self.summary = {}
+        self.pieces = {}  # midi_file -> piece + composer
+        for name, entry in data.items():
+            pieces = entry.get('pieces', [])
+            self.summary[name] = {
+                'name': name,
+                'piece_count': entry.get('piece_count', len(pieces)),
+                'total_duration': round(sum(p.get('duration') or 0 for p in pieces), 3),
+            }
+            for p in pieces:
+                self.pieces.setdefault(p['midi_file'], dict(p, composer=name))
+        self.summary_body = _compact(self.summary)
+
+    def composer(self, name):
+        return self.composers.get(name)
+
+    def piece(self, midi_file):
+        return self.pieces.get(midi_file)
+
+
+class ComposerInfoIndex:
+    """composer_info.json 인덱스 - 작곡가 1명 조회와 목록용 초상화 요약"""
+
+    def __init__(self, raw):
+        data = json.loads(raw.decode('utf-8'))
+        self.records = data
+        # portrait: 로컬 미러 변형 (portraits.py, 없으면 image_url만)
+        self.portraits = {}
+        for name, info in data.items():
+            self.portraits[name] = {'image_url': info.get('image_url', '')}
+            if 'portrait' in info:
+                self.portraits[name]['portrait'] = info['portrait']
+        self.portraits_body = _compact(self.portraits)
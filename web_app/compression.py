@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+응답 압축 (gzip / brotli)
+큰 CSV/JSON/정적 텍스트 응답을 Accept-Encoding에 맞춰 압축한다.
+ETag가 있는 응답은 압축 결과를 메모리에 캐시해 같은 자산을 매번 다시 압축하지 않는다.
+압축한 응답의 ETag에는 인코딩을 붙인다 ("<etag>-gzip", "<etag>-br").
+"""
+
+from collections import OrderedDict
+import gzip
+import threading
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택사항 - 없으면 gzip만 사용
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'text/javascript',
+    'text/csv', 'text/css', 'text/html', 'text/plain', 'image/svg+xml',
+}
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+class Compressor:
+    def __init__(self, app=None, min_size=1024, max_size=8 * 1024 * 1024, cache_entries=64):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()  # (etag, encoding) -> bytes
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+    def choose_encoding(self, accept_encodings):
+        if brotli is not None and accept_encodings['br']:
+            return 'br'
+        if accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def _cached(self, key, data, encoding):
+        if key is None:
+            return compress(data, encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+        metrics.cache_event('compression', body is not None)
+        if body is not None:
+            return body
+        body = compress(data, encoding)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return body
+
+    def _after_request(self, response):
+        from flask import request
+
+        # 제너레이터 스트리밍(SSE 등)은 제외, send_file 응답은 허용
+        streaming = response.is_streamed and not response.direct_passthrough
+        if (response.status_code != 200 or streaming
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        length = response.content_length
+        if length is not None and not (self.min_size <= length <= self.max_size):
+            return response
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        # send_file 응답(정적 파일)도 크기 제한 안에서는 읽어서 압축
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        response.set_data(self._cached((etag, encoding) if etag else None, data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # 표현(인코딩)마다 다른 검증자 (RFC 9110 8.8.3) - identity와 같은 ETag면 If-Range/공유 캐시가 섞인다
+            # 뷰의 make_conditional은 원래 ETag로 비교했으므로 "<etag>-br" 재검증은 여기서 304로 바꾼다
+            response.set_etag(f'{etag}-{encoding}', weak)
+            response.make_conditional(request)
+        return response
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+static/data 공용 데이터 저장소
+JSON/CSV 자산을 한 번만 파싱해 메모리에 두고, 파일이 바뀌면 새 스냅샷으로 교체한다
+"""
+
+from pathlib import Path
+import csv
+import hashlib
+import io
+import json
+import mimetypes
+import threading
+import time
+
+_CSV_ENCODINGS = ['utf-8-sig', 'cp949', 'euc-kr', 'latin1']
+
+
+def load_json(raw):
+    return json.loads(raw.decode('utf-8'))
+
+
+def load_csv_rows(raw):
+    """헤더 없는 CSV → 행 리스트 (AirPiano와 같은 인코딩 순서로 시도)"""
+    for enc in _CSV_ENCODINGS:
+        try:
+            text = raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        return [row for row in csv.reader(io.StringIO(text)) if row]
+    return []
+
+
+class Asset:
+    """자산 하나의 불변 스냅샷 (원본 바이트 + 파싱 결과)"""
+
+    def __init__(self, name, filename, raw, value, mtime, mimetype):
+        self.name = name
+        self.filename = filename
+        self.raw = raw
+        self.value = value
+        self.mtime = mtime
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(raw).hexdigest()[:20]
+
+    def etag_for(self, key):
+        return hashlib.sha1(f'{self.etag}:{key}'.encode('utf-8')).hexdigest()[:20]
+
+
+class DataStore:
+    def __init__(self, base_dir, check_interval=2.0):
+        self.base_dir = Path(base_dir)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._specs = {}       # name -> (filename, loader, mimetype)
+        self._by_file = {}     # filename -> name
+        self._assets = {}      # name -> Asset
+        self._checked = {}     # name -> 마지막 mtime 확인 시각
+
+    def register(self, name, filename, loader, mimetype=None):
+        if mimetype is None:
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self._specs[name] = (filename, loader, mimetype)
+        self._by_file[filename] = name
+        self.get(name)
+
+    def _load(self, name):
+        filename, loader, mimetype = self._specs[name]
+        path = self.base_dir / filename
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            self._assets.pop(name, None)
+            return
+        current = self._assets.get(name)
+        if current is not None and current.mtime == mtime:
+            return
+        try:
+            raw = path.read_bytes()
+            self._assets[name] = Asset(name, filename, raw, loader(raw), mtime, mimetype)
+        except (OSError, ValueError) as e:
+            # 파싱 실패 시 이전 스냅샷 유지
+            print(f"[DataStore] Failed to load {path}: {e}")
+
+    def get(self, name):
+        """현재 스냅샷 (없으면 None). check_interval마다 mtime 확인 후 교체"""
+        now = time.monotonic()
+        if now - self._checked.get(name, 0.0) >= self.check_interval:
+            with self._lock:
+                self._checked[name] = now
+                self._load(name)
+        return self._assets.get(name)
+
+    def by_filename(self, filename):
+        name = self._by_file.get(filename)
+        return self.get(name) if name else None
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MAESTRO 카탈로그 (SQLite)
+    maestro-v3.0.0.csv + MIDI 트리를 색인된 SQLite 파일 하나로 만들어 웹 앱이 바로 조회한다
+    (작곡가별 곡 목록 / 곡 하나 / 요약). composers.json 전체를 파싱해 둘 필요가 없다.
+
+증분 갱신
+    CSV    크기/mtime이 같으면 건너뛰고, 다르면 내용 해시를 비교한 뒤 행 단위로 스트리밍 비교
+           (행 해시 + 순서가 바뀐 곡만 UPSERT, CSV에서 빠진 곡은 삭제)
+    MIDI   곡마다 크기/mtime이 바뀐 파일만 다시 해시 (midi_sha1, 없는 파일은 NULL)
+    바뀐 것이 있을 때만 generation을 올리고 기존 composers.json을 같은 형식으로 다시 쓴다
+    곡 특징(features 테이블)은 MIDI 내용 해시 기준으로 midi_features.py가 채운다
+
+빌드: python ../parse_maestro.py  (또는 python maestro_catalog.py --root <MAESTRO 폴더>)
+"""
+
+from pathlib import Path
+import argparse
+import csv
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from maestro_events import MAESTRO_ROOT, _write_atomic
+
+SCHEMA_VERSION = 2
+BASE_DIR = Path(__file__).parent
+CATALOG_PATH = BASE_DIR / 'cache' / 'maestro_catalog.sqlite3'
+COMPOSERS_JSON = BASE_DIR / 'static' / 'data' / 'composers.json'
+CSV_NAME = 'maestro-v3.0.0.csv'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pieces (
+    midi_file TEXT PRIMARY KEY,
+    composer TEXT NOT NULL,
+    title TEXT NOT NULL,
+    year TEXT NOT NULL,
+    duration REAL,
+    split TEXT,
+    audio_file TEXT,
+    position INTEGER NOT NULL,
+    row_hash TEXT NOT NULL,
+    midi_size INTEGER,
+    midi_mtime_ns INTEGER,
+    midi_sha1 TEXT
+);
+CREATE INDEX IF NOT EXISTS pieces_composer ON pieces (composer, position);
+CREATE INDEX IF NOT EXISTS pieces_midi_sha1 ON pieces (midi_sha1);
+CREATE TABLE IF NOT EXISTS features (
+    midi_sha1 TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    note_count INTEGER,
+    notes_per_sec REAL,
+    pitch_min INTEGER,
+    pitch_max INTEGER,
+    pitch_range INTEGER,
+    polyphony_mean REAL,
+    polyphony_max INTEGER,
+    pedal_ratio REAL,
+    pedal_presses INTEGER,
+    velocity_mean REAL,
+    velocity_std REAL,
+    velocity_min INTEGER,
+    velocity_max INTEGER,
+    key TEXT,
+    key_confidence REAL
+);
+CREATE INDEX IF NOT EXISTS features_key ON features (key);
+"""
+# features 테이블의 특징 열 (midi_features.extract 결과 키와 같음)
+FEATURE_COLUMNS = ('note_count', 'notes_per_sec', 'pitch_min', 'pitch_max', 'pitch_range',
+                   'polyphony_mean', 'polyphony_max', 'pedal_ratio', 'pedal_presses',
+                   'velocity_mean', 'velocity_std', 'velocity_min', 'velocity_max', 'key', 'key_confidence')
+PIECE_COLUMNS = ('title', 'midi_file', 'duration', 'year', 'composer')
+SORT_COLUMNS = ('title', 'composer', 'year', 'duration') + tuple(c for c in FEATURE_COLUMNS if c != 'key')
+
+
+def _compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------- 빌드 ----------
+
+def connect(db_path):
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+        # 스키마가 바뀌면 처음부터 다시 만든다 (원본에서 언제든 재생성 가능)
+        conn.executescript('DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS sources; DROP TABLE IF EXISTS pieces;'
+                           ' DROP TABLE IF EXISTS features;')
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _source_changed(conn, path, force):
+    """CSV가 마지막 빌드 이후 바뀌었나 → (바뀜 여부, stat, sha1)"""
+    st = path.stat()
+    row = conn.execute('SELECT size, mtime_ns, sha1 FROM sources WHERE path = ?', (str(path),)).fetchone()
+    if row and not force and (row[0], row[1]) == (st.st_size, st.st_mtime_ns):
+        return False, st, row[2]
+    sha1 = _file_sha1(path)
+    conn.execute('INSERT OR REPLACE INTO sources (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)',
+                 (str(path), st.st_size, st.st_mtime_ns, sha1))
+    return force or row is None or row[2] != sha1, st, sha1
+
+
+def _sync_rows(conn, csv_path):
+    """CSV를 한 행씩 읽어 바뀐 곡만 반영 → (추가, 수정, 삭제, 순서만 바뀜)"""
+    existing = {mf: (h, pos) for mf, h, pos in conn.execute('SELECT midi_file, row_hash, position FROM pieces')}
+    seen = set()
+    added = updated = moved = 0
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for position, row in enumerate(csv.DictReader(f)):
+            midi_file = row['midi_filename']
+            fields = (row['canonical_composer'], row['canonical_title'], row['year'],
+                      row['duration'], row.get('split', ''), row.get('audio_filename', ''))
+            row_hash = hashlib.sha1('\x1f'.join(fields).encode('utf-8')).hexdigest()
+            seen.add(midi_file)
+            old = existing.get(midi_file)
+            if old == (row_hash, position):
+                continue
+            if old is not None and old[0] == row_hash:
+                # 앞 행이 추가/삭제되어 순서만 밀린 곡
+                conn.execute('UPDATE pieces SET position = ? WHERE midi_file = ?', (position, midi_file))
+                existing[midi_file] = (row_hash, position)
+                moved += 1
+                continue
+            if old is not None:
+                updated += 1
+            else:
+                added += 1
+            composer, title, year, duration, split, audio = fields
+            conn.execute(
+                'INSERT INTO pieces (midi_file, composer, title, year, duration, split, audio_file, position, row_hash)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT (midi_file) DO UPDATE SET composer = excluded.composer, title = excluded.title,'
+                ' year = excluded.year, duration = excluded.duration, split = excluded.split,'
+                ' audio_file = excluded.audio_file, position = excluded.position, row_hash = excluded.row_hash',
+                (midi_file, composer, title, year, float(duration), split, audio, position, row_hash))
+            existing[midi_file] = (row_hash, position)
+    removed = [(mf,) for mf in existing if mf not in seen]
+    conn.executemany('DELETE FROM pieces WHERE midi_file = ?', removed)
+    return added, updated, len(removed), moved
+
+
+def _sync_midi(conn, root, force):
+    """크기/mtime이 바뀐 MIDI만 다시 해시 → (다시 해시한 수, 내용이 바뀐 수, 없는 파일 수)"""
+    hashed = changed = missing = 0
+    rows = conn.execute('SELECT midi_file, midi_size, midi_mtime_ns, midi_sha1 FROM pieces').fetchall()
+    for midi_file, size, mtime_ns, sha1 in rows:
+        try:
+            st = (root / midi_file).stat()
+        except OSError:
+            missing += 1
+            if sha1 is not None:
+                changed += 1
+                conn.execute('UPDATE pieces SET midi_size = NULL, midi_mtime_ns = NULL, midi_sha1 = NULL'
+                             ' WHERE midi_file = ?', (midi_file,))
+            continue
+        if not force and sha1 is not None and (size, mtime_ns) == (st.st_size, st.st_mtime_ns):
+            continue
+        digest = _file_sha1(root / midi_file)
+        hashed += 1
+        changed += digest != sha1
+        conn.execute('UPDATE pieces SET midi_size = ?, midi_mtime_ns = ?, midi_sha1 = ? WHERE midi_file = ?',
+                     (st.st_size, st.st_mtime_ns, digest, midi_file))
+    return hashed, changed, missing
+
+
+def bump_generation(conn):
+    """카탈로그 내용이 바뀌었음을 기록 (웹 앱 ETag가 바뀐다) → 새 generation"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+    generation = int(row[0]) + 1 if row else 1
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),))
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('updated', ?)", (str(time.time()),))
+    return generation
+
+
+def legacy_composers(conn):
+    """기존 composers.json 구조 (작곡가 이름순, 곡은 CSV 순서)"""
+    composers = {}
+    for composer, title, midi_file, duration, year in conn.execute(
+            'SELECT composer, title, midi_file, duration, year FROM pieces ORDER BY position'):
+        composers.setdefault(composer, []).append(
+            {'title': title, 'midi_file': midi_file, 'duration': duration, 'year': year})
+    return {name: {'name': name, 'pieces': composers[name], 'piece_count': len(composers[name])}
+            for name in sorted(composers)}
+
+
+def build(root=MAESTRO_ROOT, db_path=CATALOG_PATH, json_path=COMPOSERS_JSON, csv_path=None, force=False):
+    """카탈로그 증분 갱신 → 통계 dict"""
+    root = Path(root)
+    csv_path = Path(csv_path) if csv_path else root / CSV_NAME
+    conn = connect(db_path)
+    try:
+        with conn:
+            csv_changed, _, csv_sha1 = _source_changed(conn, csv_path, force)
+            added = updated = removed = moved = 0
+            if csv_changed:
+                added, updated, removed, moved = _sync_rows(conn, csv_path)
+            rows_changed = bool(added or updated or removed or moved)
+            hashed, midi_changed, missing = _sync_midi(conn, root, force)
+
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+            if rows_changed or midi_changed or 'generation' not in meta:
+                generation = bump_generation(conn)
+            else:
+                generation = int(meta['generation'])
+
+            # 곡 목록이 바뀌었거나 JSON이 없거나 손으로 고쳐졌을 때만 다시 쓴다
+            json_written = False
+            if json_path is not None:
+                json_path = Path(json_path)
+                try:
+                    current = _file_sha1(json_path)
+                except FileNotFoundError:
+                    current = None
+                if rows_changed or current is None or current != meta.get('json_sha1'):
+                    body = json.dumps(legacy_composers(conn), ensure_ascii=False, indent=2).encode('utf-8')
+                    digest = hashlib.sha1(body).hexdigest()
+                    if digest != current:
+                        _write_atomic(json_path, body)
+                        json_written = True
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('json_sha1', ?)", (digest,))
+
+            pieces, composers = conn.execute('SELECT COUNT(*), COUNT(DISTINCT composer) FROM pieces').fetchone()
+    finally:
+        conn.close()
+    return {
+        'csv': 'parsed' if csv_changed else 'unchanged', 'csv_sha1': csv_sha1,
+        'added': added, 'updated': updated, 'removed': removed,
+        'midi_hashed': hashed, 'midi_changed': midi_changed, 'midi_missing': missing,
+        'composers': composers, 'pieces': pieces, 'generation': generation, 'json_written': json_written,
+    }
+
+
+# ---------- 조회 (웹 앱) ----------
+
+class CatalogView:
+    """카탈로그 한 세대(generation)에 대한 조회. ComposerIndex와 같은 모양으로 응답한다"""
+
+    def __init__(self, catalog, generation):
+        self._catalog = catalog
+        self.generation = generation
+        self._lock = threading.Lock()
+        self._full_body = None
+        self._summary_body = None
+        self._composers = {}
+
+    def _query(self, sql, args=()):
+        return self._catalog.connection().execute(sql, args).fetchall()
+
+    def composer(self, name):
+        cached = self._composers.get(name)
+        if cached is not None:
+            return cached
+        rows = self._query('SELECT title, midi_file, duration, year FROM pieces WHERE composer = ? ORDER BY position',
+                           (name,))
+        if not rows:
+            return None
+        pieces = [{'title': t, 'midi_file': mf, 'duration': d, 'year': y} for t, mf, d, y in rows]
+        entry = {'name': name, 'pieces': pieces, 'piece_count': len(pieces)}
+        self._composers[name] = entry  # 작곡가 수만큼만 쌓인다 (세대가 바뀌면 새 뷰)
+        return entry
+
+    def piece(self, midi_file):
+        """곡 하나 (특징을 추출했으면 features 포함)"""
+        rows = self._query(f'SELECT {_select_columns()} FROM pieces p LEFT JOIN features f USING (midi_sha1)'
+                           ' WHERE p.midi_file = ?', (midi_file,))
+        return _piece_row(rows[0]) if rows else None
+
+    def query_pieces(self, filters=(), sort=None, descending=False, offset=0, limit=20):
+        """특징 기준 정렬/필터 → (전체 개수, 곡 목록)
+        filters: [(열, 연산자, 값)], 연산자는 '=', '>=', '<=' 또는 'mode' (key가 '... major|minor')
+        sort가 None이면 CSV 순서
+        """
+        where, args = [], []
+        for column, op, value in filters:
+            if op == 'mode':
+                where.append('f.key LIKE ?')
+                args.append(f'% {value}')
+            elif column in PIECE_COLUMNS + FEATURE_COLUMNS and op in ('=', '>=', '<='):
+                where.append(f'{"p" if column in PIECE_COLUMNS else "f"}.{column} {op} ?')
+                args.append(value)
+            else:
+                raise ValueError(f'Unsupported filter: {column} {op}')
+        if sort is not None and sort not in SORT_COLUMNS:
+            raise ValueError(f'Unsupported sort column: {sort}')
+        clause = f' WHERE {" AND ".join(where)}' if where else ''
+        base = f' FROM pieces p LEFT JOIN features f USING (midi_sha1){clause}'
+        order = 'p.position'
+        if sort is not None:
+            direction = 'DESC' if descending else 'ASC'
+            order = f'{"p" if sort in PIECE_COLUMNS else "f"}.{sort} {direction} NULLS LAST, p.position'
+        total = self._query(f'SELECT COUNT(*){base}', args)[0][0]
+        rows = self._query(f'SELECT {_select_columns()}{base} ORDER BY {order} LIMIT ? OFFSET ?',
+                           args + [limit, offset])
+        return total, [_piece_row(row) for row in rows]
+
+    def midi_digest(self, midi_file):
+        """곡 MIDI의 내용 해시 (빌드 시점, 파일이 없으면 None)"""
+        rows = self._query('SELECT midi_sha1 FROM pieces WHERE midi_file = ?', (midi_file,))
+        return rows[0][0] if rows else None
+
+    @property
+    def full_body(self):
+        with self._lock:
+            if self._full_body is None:
+                conn = self._catalog.connection()
+                self._full_body = _compact(legacy_composers(conn))
+            return self._full_body
+
+    @property
+    def summary_body(self):
+        with self._lock:
+            if self._summary_body is None:
+                summary = {}
+                for composer, duration in self._query(
+                        'SELECT composer, duration FROM pieces ORDER BY composer, position'):
+                    entry = summary.setdefault(composer, {'name': composer, 'piece_count': 0, 'total_duration': 0})
+                    entry['piece_count'] += 1
+                    entry['total_duration'] += duration or 0
+                for entry in summary.values():
+                    entry['total_duration'] = round(entry['total_duration'], 3)
+                self._summary_body = _compact(summary)
+            return self._summary_body
+
+
+def _select_columns():
+    return ', '.join([f'p.{c}' for c in PIECE_COLUMNS] + ['f.version'] + [f'f.{c}' for c in FEATURE_COLUMNS])
+
+
+def _piece_row(row):
+    piece = dict(zip(PIECE_COLUMNS, row))
+    if row[len(PIECE_COLUMNS)] is not None:
+        piece['features'] = dict(zip(FEATURE_COLUMNS, row[len(PIECE_COLUMNS) + 1:]))
+    return piece
+
+
+class CatalogAsset:
+    """DataStore Asset과 같은 인터페이스 (etag / mtime / value / etag_for)"""
+
+    def __init__(self, view, mtime, inode):
+        self.value = view
+        self.mtime = mtime
+        self.inode = inode
+        self.etag = hashlib.sha1(f'maestro-catalog:{inode}:{view.generation}'.encode()).hexdigest()[:20]
+
+    def etag_for(self, key):
+        return hashlib.sha1(f'{self.etag}:{key}'.encode('utf-8')).hexdigest()[:20]
+
+
+class MaestroCatalog:
+    """웹 앱용 읽기 전용 카탈로그. check_interval마다 파일을 확인하고 generation이 바뀌면 새 스냅샷"""
+
+    def __init__(self, db_path=CATALOG_PATH, check_interval=2.0):
+        self.db_path = Path(db_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._asset = None
+        self._checked = 0.0
+
+    def connection(self):
+        """스레드별 읽기 전용 연결 (파일이 새로 만들어지면 다시 연결)"""
+        inode = self._asset.inode if self._asset else None
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.inode != inode:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(f'{self.db_path.as_uri()}?mode=ro', uri=True, timeout=5)
+            self._local.conn, self._local.inode = conn, inode
+        return conn
+
+    def get(self):
+        """현재 스냅샷 (카탈로그가 없으면 None)"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._asset
+        with self._lock:
+            self._checked = now
+            try:
+                st = self.db_path.stat()
+            except OSError:
+                self._asset = None
+                return None
+            current = self._asset
+            if current is not None and (current.mtime, current.inode) == (st.st_mtime, st.st_ino):
+                return current
+            try:
+                probe = sqlite3.connect(f'{self.db_path.as_uri()}?mode=ro', uri=True, timeout=5)
+                try:
+                    row = probe.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+                finally:
+                    probe.close()
+            except sqlite3.Error as e:
+                print(f"[MaestroCatalog] Failed to open {self.db_path}: {e}")
+                return current
+            if row is None:
+                return current
+            generation = int(row[0])
+            if current is not None and current.inode == st.st_ino and current.value.generation == generation:
+                current.mtime = st.st_mtime
+                return current
+            self._asset = CatalogAsset(CatalogView(self, generation), st.st_mtime, st.st_ino)
+            return self._asset
+
+
+def report(stats, elapsed):
+    print(f"[OK] CSV {stats['csv']}: +{stats['added']} ~{stats['updated']} -{stats['removed']} pieces")
+    print(f"[OK] MIDI: {stats['midi_hashed']} hashed, {stats['midi_changed']} changed, "
+          f"{stats['midi_missing']} missing")
+    print(f"[OK] {stats['composers']} composers, {stats['pieces']} pieces "
+          f"(generation {stats['generation']}) in {elapsed:.2f}s")
+    print(f"[OK] composers.json {'written' if stats['json_written'] else 'unchanged'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the MAESTRO SQLite catalog incrementally')
+    parser.add_argument('--root', type=Path, default=MAESTRO_ROOT)
+    parser.add_argument('--csv', type=Path, default=None, help=f'기본값: <root>/{CSV_NAME}')
+    parser.add_argument('--db', type=Path, default=CATALOG_PATH)
+    parser.add_argument('--json', type=Path, default=COMPOSERS_JSON, help='기존 composers.json 출력 경로')
+    parser.add_argument('--force', action='store_true', help='크기/mtime이 같아도 모두 다시 해시')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    report(build(args.root, args.db, args.json, args.csv, args.force), time.perf_counter() - t0)
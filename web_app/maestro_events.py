@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MAESTRO MIDI → 컴팩트 컬럼형 이벤트 포맷
+서스테인 페달을 노트 길이에 반영하고, 결과를 원본 해시 기준으로 디스크에 캐시한다
+
+포맷 (JSON, gzip 저장):
+    t     절대 시간 (ms)
+    type  0 = 노트, 1 = 서스테인 페달
+    pitch 노트 번호 (페달은 CC 번호 64)
+    vel   벨로시티 (페달은 127 = 밟음, 0 = 뗌)
+    dur   노트 길이 (ms, 페달은 0)
+
+실행: python maestro_events.py  → MAESTRO_ROOT 전체를 미리 인코딩
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+import metrics
+import smf
+
+FORMAT_VERSION = 1
+NOTE, PEDAL = 0, 1
+COLUMNS = ('t', 'type', 'pitch', 'vel', 'dur')
+CHECKPOINT_MS = 10000  # 타임 인덱스 체크포인트 간격
+
+BASE_DIR = Path(__file__).parent
+MAESTRO_ROOT = BASE_DIR.parent / 'maestro-v3.0.0'
+CACHE_DIR = BASE_DIR / 'cache' / 'maestro_events'
+
+
+def extract(mf):
+    """MidiFile → (notes, pedals, duration)
+    notes: [(start, end, pitch, velocity)], pedals: [(time, 127|0)] (초 단위)
+    """
+    notes = []
+    pedals = []
+    held = {}        # (ch, pitch) -> [(start, vel), ...] 건반을 누르고 있는 노트
+    sustained = {}   # (ch, pitch) -> [(start, vel), ...] 건반은 뗐지만 페달로 유지 중
+    pedal_down = {}  # ch -> bool
+    end_time = 0.0
+
+    def release(key, now):
+        for start, v in sustained.pop(key, ()):
+            notes.append((start, now, key[1], v))
+
+    for now, _, ev in smf.timed(mf):
+        end_time = now
+        if ev.status >= 0xF0:
+            continue
+        ch = ev.status & 0x0F
+        kind = ev.status & 0xF0
+        if smf.is_note_on(ev):
+            key = (ch, ev.data[0])
+            release(key, now)  # 페달로 유지되던 같은 음은 재타건 시 종료
+            held.setdefault(key, []).append((now, ev.data[1]))
+        elif smf.is_note_off(ev):
+            key = (ch, ev.data[0])
+            stack = held.get(key)
+            if not stack:
+                continue
+            start, v = stack.pop(0)
+            if pedal_down.get(ch):
+                sustained.setdefault(key, []).append((start, v))
+            else:
+                notes.append((start, now, key[1], v))
+        elif kind == smf.CONTROL_CHANGE and ev.data[0] == smf.CC_SUSTAIN:
+            down = ev.data[1] >= 64
+            if down == pedal_down.get(ch, False):
+                continue
+            pedal_down[ch] = down
+            pedals.append((now, 127 if down else 0))
+            if not down:
+                for key in [k for k in sustained if k[0] == ch]:
+                    release(key, now)
+
+    for key in list(sustained):
+        release(key, end_time)
+    for key, stack in held.items():
+        for start, v in stack:
+            notes.append((start, end_time, key[1], v))
+
+    notes.sort()
+    return notes, pedals, end_time
+
+
+def encode(mf):
+    """MidiFile → 컬럼형 dict"""
+    notes, pedals, duration = extract(mf)
+    rows = [(round(s * 1000), NOTE, p, v, round((e - s) * 1000)) for s, e, p, v in notes]
+    rows += [(round(t * 1000), PEDAL, smf.CC_SUSTAIN, v, 0) for t, v in pedals]
+    rows.sort(key=lambda r: (r[0], r[1]))
+    cols = list(zip(*rows)) if rows else [(), (), (), (), ()]
+    return {
+        'version': FORMAT_VERSION,
+        'duration': round(duration, 3),
+        'note_count': len(notes),
+        't': list(cols[0]),
+        'type': list(cols[1]),
+        'pitch': list(cols[2]),
+        'vel': list(cols[3]),
+        'dur': list(cols[4]),
+    }
+
+
+class TimeIndex:
+    """구간 조회용 타임 인덱스
+    CHECKPOINT_MS마다 그 시점에 울리고 있는 노트 인덱스 목록을 저장해 두고,
+    임의 시점의 활성 노트는 가장 가까운 체크포인트 + 그 이후 시작한 노트로 계산한다
+    """
+
+    def __init__(self, events, checkpoints=None, step=CHECKPOINT_MS):
+        self.events = events
+        self.step = step
+        self.t = events['t']
+        self.duration_ms = round(events['duration'] * 1000)
+        self.pedal_t = [t for t, k in zip(self.t, events['type']) if k == PEDAL]
+        self.pedal_v = [v for v, k in zip(events['vel'], events['type']) if k == PEDAL]
+        self.checkpoints = checkpoints if checkpoints is not None else self._build()
+
+    def _build(self):
+        checkpoints = [[] for _ in range(self.duration_ms // self.step + 1)]
+        for i, (start, kind, dur) in enumerate(zip(self.t, self.events['type'], self.events['dur'])):
+            if kind != NOTE:
+                continue
+            # start < k*step < start + dur 인 체크포인트에 등록
+            for k in range(start // self.step + 1, min(len(checkpoints), (start + dur - 1) // self.step + 1)):
+                checkpoints[k].append(i)
+        return checkpoints
+
+    def to_bytes(self):
+        body = json.dumps({'step': self.step, 'checkpoints': self.checkpoints}, separators=(',', ':'))
+        return gzip.compress(body.encode('utf-8'), compresslevel=6)
+
+    @classmethod
+    def from_bytes(cls, events, data):
+        payload = json.loads(gzip.decompress(data))
+        return cls(events, payload['checkpoints'], payload['step'])
+
+    def active_at(self, t0):
+        """t0(ms)에 울리고 있는 노트 인덱스 (t0에 시작하는 노트는 제외)"""
+        k = min(max(0, t0 // self.step), len(self.checkpoints) - 1) if self.checkpoints else 0
+        base = k * self.step
+        candidates = list(self.checkpoints[k]) if self.checkpoints else []
+        candidates += range(bisect.bisect_left(self.t, base), bisect.bisect_left(self.t, t0))
+        kinds, durs = self.events['type'], self.events['dur']
+        return sorted({i for i in candidates
+                       if kinds[i] == NOTE and self.t[i] < t0 < self.t[i] + durs[i]})
+
+    def pedal_at(self, t0):
+        i = bisect.bisect_left(self.pedal_t, t0) - 1
+        return self.pedal_v[i] if i >= 0 else 0
+
+    def window(self, t0, t1):
+        """[t0, t1) 구간 이벤트 + t0 시점의 노트/페달 상태 (ms)"""
+        lo = bisect.bisect_left(self.t, t0)
+        hi = bisect.bisect_left(self.t, t1)
+        active = self.active_at(t0)
+        return {
+            't0': t0,
+            't1': t1,
+            'duration': self.events['duration'],
+            'pedal': self.pedal_at(t0),
+            'active': {c: [self.events[c][i] for i in active] for c in ('t', 'pitch', 'vel', 'dur')},
+            'events': {c: self.events[c][lo:hi] for c in COLUMNS},
+            'done': t1 >= self.duration_ms,
+        }
+
+
+def _write_atomic(target, data):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+class EventCache:
+    """원본 해시 → gzip JSON 디스크 캐시 (+ 최근 사용한 타임 인덱스 메모리 LRU)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_indexes=8):
+        self.cache_dir = Path(cache_dir)
+        self.max_indexes = max_indexes
+        self._lock = threading.Lock()
+        self._hashes = {}  # path -> (mtime, size, sha1)
+        self._indexes = OrderedDict()  # sha1 -> TimeIndex
+
+    def source_hash(self, path):
+        st = path.stat()
+        memo = self._hashes.get(path)
+        if memo and memo[0] == st.st_mtime and memo[1] == st.st_size:
+            return memo[2]
+        digest = hashlib.sha1(path.read_bytes()).hexdigest()
+        self._hashes[path] = (st.st_mtime, st.st_size, digest)
+        return digest
+
+    def cache_path(self, digest):
+        return self.cache_dir / f'{digest}.v{FORMAT_VERSION}.json.gz'
+
+    def get(self, path):
+        """원본 MIDI 경로 → (gzip 바이트, 원본 해시). 캐시가 없으면 인코딩 후 저장"""
+        path = Path(path)
+        digest = self.source_hash(path)
+        target = self.cache_path(digest)
+        try:
+            data = target.read_bytes()
+        except FileNotFoundError:
+            metrics.cache_event('maestro_events', False)
+        else:
+            metrics.cache_event('maestro_events', True)
+            return data, digest
+
+        body = json.dumps(encode(smf.read(path)), separators=(',', ':')).encode('utf-8')
+        data = gzip.compress(body, compresslevel=6)
+        _write_atomic(target, data)
+        return data, digest
+
+    def time_index(self, path):
+        """원본 MIDI 경로 → TimeIndex. 첫 조회 시 만들어 디스크에 저장"""
+        digest = self.source_hash(Path(path))
+        with self._lock:
+            index = self._indexes.get(digest)
+            if index is not None:
+                self._indexes.move_to_end(digest)
+        metrics.cache_event('maestro_index', index is not None)
+        if index is not None:
+            return index
+
+        data, digest = self.get(path)
+        events = json.loads(gzip.decompress(data))
+        target = self.cache_dir / f'{digest}.v{FORMAT_VERSION}.index.json.gz'
+        try:
+            index = TimeIndex.from_bytes(events, target.read_bytes())
+        except (FileNotFoundError, ValueError, KeyError):
+            index = TimeIndex(events)
+            _write_atomic(target, index.to_bytes())
+
+        with self._lock:
+            self._indexes[digest] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+
+def build_all(root=MAESTRO_ROOT, cache_dir=CACHE_DIR):
+    """MAESTRO 트리 전체 사전 인코딩 (오프라인 빌드)"""
+    cache = EventCache(cache_dir)
+    files = sorted(Path(root).rglob('*.mid*'))
+    print(f"Encoding {len(files)} MIDI files from {root}")
+    t0 = time.time()
+    src_bytes = out_bytes = 0
+    for i, f in enumerate(files, 1):
+        try:
+            data, _ = cache.get(f)
+        except (OSError, smf.MidiFormatError, IndexError) as e:
+            print(f"  [ERROR] {f}: {e}")
+            continue
+        src_bytes += f.stat().st_size
+        out_bytes += len(data)
+        if i % 100 == 0:
+            print(f"  [{i}/{len(files)}]")
+    elapsed = time.time() - t0
+    print(f"[OK] {len(files)} files in {elapsed:.1f}s, "
+          f"{src_bytes / 1e6:.1f} MB MIDI -> {out_bytes / 1e6:.1f} MB encoded")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-encode MAESTRO MIDI files')
+    parser.add_argument('--root', type=Path, default=MAESTRO_ROOT)
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    args = parser.parse_args()
+    build_all(args.root, args.cache_dir)
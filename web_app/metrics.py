@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+요청 지표 수집 + /metrics (Prometheus 텍스트 포맷)
+    라우트별 지연 시간 히스토그램, 응답 바이트 수, 처리 중 요청 수,
+    데이터 캐시 적중/실패 횟수, 느린 요청 로그 (구간별 소요 시간 포함)
+
+캐시 쪽에서는 metrics.cache_event('이름', hit) 만 호출하면 된다 (Flask 없이도 동작)
+라우트 안의 구간 시간은 with metrics.phase('encode'): ... 로 기록한다
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+# 초 단위 히스토그램 버킷
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(**labels):
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{k}="{v}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Registry:
+    """프로세스 전역 지표 저장소"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.requests = {}    # (route, method, status) -> count
+        self.latency = {}     # (route, method) -> [bucket counts..., +Inf], sum
+        self.bytes_sent = {}  # route -> bytes
+        self.slow = {}        # route -> count
+        self.cache = {}       # (cache, 'hit'|'miss') -> count
+        self.in_flight = 0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, route, method, status, seconds, size, slow=False):
+        with self._lock:
+            self.in_flight -= 1
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.latency.get((route, method))
+            if hist is None:
+                hist = self.latency[(route, method)] = [[0] * (len(self.buckets) + 1), 0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[0][i] += 1
+                    break
+            else:
+                hist[0][-1] += 1
+            hist[1] += seconds
+            if size:
+                self.bytes_sent[route] = self.bytes_sent.get(route, 0) + size
+            if slow:
+                self.slow[route] = self.slow.get(route, 0) + 1
+
+    def cache_event(self, cache, hit):
+        key = (cache, 'hit' if hit else 'miss')
+        with self._lock:
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def render(self):
+        """Prometheus 텍스트 포맷"""
+        with self._lock:
+            requests = dict(self.requests)
+            latency = {k: (list(v[0]), v[1]) for k, v in self.latency.items()}
+            bytes_sent = dict(self.bytes_sent)
+            slow = dict(self.slow)
+            cache = dict(self.cache)
+            in_flight = self.in_flight
+
+        out = [
+            '# HELP piano_http_requests_total HTTP requests by route, method and status.',
+            '# TYPE piano_http_requests_total counter',
+        ]
+        for (route, method, status), n in sorted(requests.items()):
+            out.append(f'piano_http_requests_total{_labels(route=route, method=method, status=status)} {n}')
+
+        out += ['# HELP piano_http_request_duration_seconds Request latency including response body transfer.',
+                '# TYPE piano_http_request_duration_seconds histogram']
+        for (route, method), (counts, total) in sorted(latency.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                out.append('piano_http_request_duration_seconds_bucket'
+                           f'{_labels(route=route, method=method, le=bound)} {cumulative}')
+            out.append(f'piano_http_request_duration_seconds_sum{_labels(route=route, method=method)} {total:.6f}')
+            out.append(f'piano_http_request_duration_seconds_count{_labels(route=route, method=method)} {cumulative}')
+
+        out += ['# HELP piano_http_response_bytes_total Response body bytes sent by route.',
+                '# TYPE piano_http_response_bytes_total counter']
+        for route, n in sorted(bytes_sent.items()):
+            out.append(f'piano_http_response_bytes_total{_labels(route=route)} {n}')
+
+        out += ['# HELP piano_http_slow_requests_total Requests slower than the slow-request threshold.',
+                '# TYPE piano_http_slow_requests_total counter']
+        for route, n in sorted(slow.items()):
+            out.append(f'piano_http_slow_requests_total{_labels(route=route)} {n}')
+
+        out += ['# HELP piano_http_requests_in_flight Requests currently being handled.',
+                '# TYPE piano_http_requests_in_flight gauge',
+                f'piano_http_requests_in_flight {in_flight}']
+
+        out += ['# HELP piano_cache_requests_total Data cache lookups by cache and result.',
+                '# TYPE piano_cache_requests_total counter']
+        for (name, result), n in sorted(cache.items()):
+            out.append(f'piano_cache_requests_total{_labels(cache=name, result=result)} {n}')
+        return '\n'.join(out) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def cache_event(cache, hit):
+    REGISTRY.cache_event(cache, hit)
+
+
+@contextmanager
+def phase(name):
+    """요청 처리 중 한 구간의 소요 시간을 기록 (느린 요청 로그에 표시)"""
+    from flask import g, has_request_context
+
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            g.setdefault('_metrics_phases', []).append((name, time.perf_counter() - t0))
+
+
+class Metrics:
+    """Flask 훅으로 요청마다 지표 기록 + /metrics 엔드포인트 등록"""
+
+    def __init__(self, app=None, registry=REGISTRY, slow_ms=500.0, endpoint='/metrics'):
+        self.registry = registry
+        self.slow_ms = slow_ms
+        self.endpoint = endpoint
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(self.endpoint, 'metrics', self._render)
+
+    def _render(self):
+        from flask import current_app
+
+        response = current_app.response_class(self.registry.render(), content_type=CONTENT_TYPE)
+        response.cache_control.no_store = True
+        return response
+
+    def _before_request(self):
+        from flask import g
+
+        g._metrics_start = time.perf_counter()
+        self.registry.started()
+
+    def _after_request(self, response):
+        from flask import g, request
+
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        method = request.method
+        phases = g.pop('_metrics_phases', [])
+        handled = time.perf_counter()
+
+        # 조건부 요청(If-None-Match / If-Modified-Since)은 HTTP 캐시 적중/실패로 집계
+        if request.if_none_match or request.if_modified_since:
+            self.registry.cache_event('http_conditional', response.status_code == 304)
+
+        status = response.status_code
+        size = response.content_length
+        if size is None and not response.is_streamed:
+            size = len(response.get_data())
+        request_path = request.full_path.rstrip('?')
+        # 이벤트 스트림은 연결이 유지되는 동안이 곧 응답 시간이므로 느린 요청에서 제외
+        long_lived = response.mimetype == 'text/event-stream'
+
+        # 본문 전송까지 끝난 시점(close)에 기록해 전송 시간도 포함
+        def finish():
+            now = time.perf_counter()
+            total = now - start
+            slow = not long_lived and total * 1000 >= self.slow_ms
+            self.registry.finished(route, method, status, total, size, slow)
+            if slow:
+                parts = [f'{name}={sec * 1000:.1f}ms' for name, sec in phases]
+                parts.append(f'handler={(handled - start) * 1000:.1f}ms')
+                parts.append(f'send={(now - handled) * 1000:.1f}ms')
+                print(f"[Slow] {method} {route} {status} {total * 1000:.1f}ms "
+                      f"({', '.join(parts)}) {request_path}")
+
+        if response.direct_passthrough:
+            # 파일 래퍼를 그대로 넘기는 응답은 close 훅이 호출되지 않으므로 바로 기록
+            finish()
+        else:
+            response.call_on_close(finish)
+        return response
+
+    def _teardown_request(self, exc):
+        from flask import g
+
+        # 처리되지 않은 예외로 after_request가 건너뛰어진 요청
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            from flask import request
+
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            total = time.perf_counter() - start
+            self.registry.finished(route, request.method, 500, total, 0, total * 1000 >= self.slow_ms)
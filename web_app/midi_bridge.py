@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 하드웨어 MIDI 브리지 (선택사항)
+    Web MIDI API가 없거나 지터가 큰 키오스크 브라우저용. 브라우저가 WebSocket으로 보낸
+    MIDI 메시지를 서버의 송신 스레드 하나가 mido 출력 포트(자동 피아노)로 내보낸다.
+
+    - 출력 포트 선택은 airpiano_gui.py의 PREFERRED_OUT_PORTS를 그대로 따른다
+    - 클라이언트별로 울리고 있는 노트/서스테인을 추적해 연결이 끊기면 모두 끈다
+    - 한꺼번에 들어온 메시지는 묶어서 한 번에 쓰고, 의미 없는 메시지(울리지 않는 음의
+      노트 오프, 곧바로 덮어써지는 같은 CC 값)는 버린다
+    - 왕복 지연(클라이언트 보고)과 큐 대기 시간 통계를 낸다
+
+WebSocket은 waitress가 소켓 업그레이드를 지원하지 않으므로 별도 포트에서 최소 구현
+(RFC 6455, 의존성 없음)으로 받는다. 기본은 127.0.0.1에만 바인드하고, 다른 사이트의 페이지가
+피아노를 울리지 못하도록 Origin 헤더가 허용 목록에 있는 핸드셰이크만 받는다.
+
+프로토콜 (텍스트 프레임, JSON)
+    클라이언트 → {"seq": n, "t": 전송 시각(ms), "events": [[status, d1, d2], ...], "rtt": 직전 왕복 ms}
+    서버 → {"ack": n, "t": 같은 t}  (포트에 쓴 뒤)
+
+실행: python midi_bridge.py --list   → 출력 포트 목록
+"""
+
+from collections import deque
+from pathlib import Path
+import argparse
+import ast
+import base64
+import hashlib
+import itertools
+import json
+import queue
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+try:
+    import mido
+except ImportError:  # mido는 선택사항 - 없으면 브리지 비활성화
+    mido = None
+
+BASE_DIR = Path(__file__).parent
+AIRPIANO_GUI = BASE_DIR.parent / 'airpiano' / 'airpiano_gui.py'
+DEFAULT_OUT_PORTS = ["MIDIOUT2 (ESI MIDIMATE eX) 2", "Microsoft GS Wavetable Synth"]
+DEFAULT_HOST = '127.0.0.1'
+
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_FRAME = 1 << 20
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+NOTE_OFF, NOTE_ON, CONTROL_CHANGE = 0x80, 0x90, 0xB0
+CC_SUSTAIN, CC_ALL_NOTES_OFF = 64, 123
+
+
+class BridgeError(RuntimeError):
+    """출력 포트를 열 수 없음"""
+
+
+def preferred_out_ports(path=AIRPIANO_GUI):
+    """airpiano_gui.py의 PREFERRED_OUT_PORTS (cv2/mediapipe import 없이 리터럴만 읽음)"""
+    try:
+        tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return list(DEFAULT_OUT_PORTS)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'PREFERRED_OUT_PORTS'):
+            try:
+                return list(ast.literal_eval(node.value))
+            except ValueError:
+                break
+    return list(DEFAULT_OUT_PORTS)
+
+
+def pick_output_port(names, preferred):
+    """airpiano_gui.pick_output_port와 같은 규칙: 선호 이름 부분 일치 → 첫 번째 포트"""
+    if not names:
+        return None
+    for pref in preferred:
+        for name in names:
+            if pref in name:
+                return name
+    return names[0]
+
+
+def open_output(name=None):
+    if mido is None:
+        raise BridgeError('mido is not installed')
+    try:
+        mido.set_backend('mido.backends.rtmidi')
+    except Exception:
+        pass
+    try:
+        names = mido.get_output_names()
+    except Exception as e:
+        raise BridgeError(f'Cannot list MIDI outputs: {e}') from e
+    name = name or pick_output_port(names, preferred_out_ports())
+    if not name:
+        raise BridgeError('No MIDI outputs found')
+    return mido.open_output(name)
+
+
+def web_origins(port=5000):
+    """같은 PC에서 연 웹 앱 페이지의 Origin 목록 (브리지 기본 허용 목록)"""
+    return [f'http://localhost:{port}', f'http://127.0.0.1:{port}']
+
+
+def parse_origins(value):
+    """'http://a:5000, http://b' → 정규화된 Origin 목록 (끝의 / 제거, 소문자)"""
+    if isinstance(value, str):
+        value = value.split(',')
+    return [o.strip().rstrip('/').lower() for o in value if o.strip()]
+
+
+def parse_events(raw):
+    """[[status, d1, d2], ...] → 검증된 채널 메시지 튜플 리스트"""
+    events = []
+    for ev in raw:
+        if not isinstance(ev, (list, tuple)) or not 2 <= len(ev) <= 3:
+            raise ValueError('event must be [status, data1, data2]')
+        status, *data = (int(x) for x in ev)
+        kind = status & 0xF0
+        if not 0x80 <= status <= 0xEF or any(not 0 <= d <= 127 for d in data):
+            raise ValueError(f'invalid MIDI message {ev}')
+        if kind in (0xC0, 0xD0):
+            data = data[:1]
+        elif len(data) != 2:
+            raise ValueError(f'invalid MIDI message {ev}')
+        events.append((status, *data))
+    return events
+
+
+class LatencyStats:
+    """최근 window개 샘플의 분위수 (ms)"""
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, ms):
+        with self._lock:
+            self.samples.append(ms)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            data = sorted(self.samples)
+            count = self.count
+        if not data:
+            return {'count': count}
+
+        def pct(p):
+            return round(data[min(len(data) - 1, int(p / 100 * len(data)))], 2)
+
+        return {'count': count, 'p50': pct(50), 'p95': pct(95), 'p99': pct(99), 'max': round(data[-1], 2)}
+
+
+class _Burst:
+    __slots__ = ('client', 'events', 'held', 'queued', 'done')
+
+    def __init__(self, client, events, held=frozenset()):
+        self.client = client
+        self.events = events
+        self.held = held  # 다른 클라이언트가 아직 누르고 있어 건너뛸 노트 오프의 위치
+        self.queued = time.perf_counter()
+        self.done = threading.Event()
+
+
+class MidiBridge:
+    """클라이언트 → 송신 스레드 → mido 출력 포트"""
+
+    def __init__(self, port=None, opener=open_output, port_name=None):
+        self.port = port
+        self.opener = opener
+        self.port_name = port_name
+        self.error = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = {}     # client -> {(ch, note)}
+        self._sustain = {}    # client -> {ch}
+        self._sounding = {}   # (ch, note) -> 누르고 있는 클라이언트 수
+        self._written = set()  # 송신 스레드 전용: 포트에 노트 온을 쓰고 아직 끄지 않은 음
+        self._ids = itertools.count(1)
+        self._thread = None
+        self.rtt = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self.counters = {'messages': 0, 'written': 0, 'dropped': 0, 'bursts': 0, 'writes': 0,
+                         'clients': 0, 'connected': 0}
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self.port is None:
+            try:
+                self.port = self.opener(self.port_name)
+            except Exception as e:
+                self.error = str(e)
+                raise BridgeError(self.error) from e
+        self.port_name = getattr(self.port, 'name', self.port_name)
+        self._thread = threading.Thread(target=self._run, name='midi-bridge-sender', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.port is not None:
+            try:
+                self.port.close()
+            except Exception:
+                pass
+            self.port = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    # ---------- Clients ----------
+    def connect(self):
+        client = next(self._ids)
+        with self._lock:
+            self._active[client] = set()
+            self._sustain[client] = set()
+            self.counters['clients'] += 1
+            self.counters['connected'] += 1
+        return client
+
+    def disconnect(self, client):
+        """끊긴 클라이언트가 누르고 있던 노트와 서스테인을 모두 해제"""
+        with self._lock:
+            notes = self._active.pop(client, set())
+            pedals = self._sustain.pop(client, set())
+            self.counters['connected'] -= 1
+        events = [(NOTE_OFF | ch, note, 0) for ch, note in sorted(notes)]
+        events += [(CONTROL_CHANGE | ch, CC_SUSTAIN, 0) for ch in sorted(pedals)]
+        if events:
+            self.submit(None, events, release=notes).done.wait(1.0)
+
+    def submit(self, client, events, release=()):
+        """이벤트 묶음을 송신 큐에 넣는다 (done 이벤트로 포트 쓰기 완료를 기다릴 수 있음)"""
+        held = set()
+        with self._lock:
+            active = self._active.get(client)
+            sustain = self._sustain.get(client)
+            for ch, note in release:
+                self._unsound((ch, note))
+            for i, (status, *data) in enumerate(events):
+                kind, ch = status & 0xF0, status & 0x0F
+                if kind == NOTE_OFF or (kind == NOTE_ON and data[1] == 0):
+                    if active is not None and (ch, data[0]) in active:
+                        active.discard((ch, data[0]))
+                        self._unsound((ch, data[0]))
+                    # 이 이벤트 시점의 상태로 판단 (뒤 묶음에서 다시 누르는 것과 섞이지 않게)
+                    if (ch, data[0]) in self._sounding:
+                        held.add(i)
+                if active is None:
+                    continue
+                if kind == NOTE_ON and data[1] > 0:
+                    if (ch, data[0]) not in active:
+                        active.add((ch, data[0]))
+                        self._sounding[(ch, data[0])] = self._sounding.get((ch, data[0]), 0) + 1
+                elif kind == CONTROL_CHANGE and data[0] == CC_SUSTAIN:
+                    (sustain.add if data[1] >= 64 else sustain.discard)(ch)
+                elif kind == CONTROL_CHANGE and data[0] == CC_ALL_NOTES_OFF:
+                    for key in [k for k in active if k[0] == ch]:
+                        active.discard(key)
+                        self._unsound(key)
+            self.counters['messages'] += len(events)
+            # lock 안에서 넣어 held 판단 순서와 큐 순서를 맞춘다
+            burst = _Burst(client, events, frozenset(held))
+            self._queue.put(burst)
+        return burst
+
+    def _unsound(self, key):
+        n = self._sounding.get(key, 0) - 1
+        if n > 0:
+            self._sounding[key] = n
+        else:
+            self._sounding.pop(key, None)
+
+    # ---------- Sender thread ----------
+    def _coalesce(self, bursts):
+        """여러 묶음 → 포트에 쓸 메시지 (불필요한 노트 오프, 연속된 같은 CC는 제거)"""
+        written = set(self._written)  # 포트 기준으로 울리고 있는 음
+        out = []
+        for burst in bursts:
+            for i, msg in enumerate(burst.events):
+                kind, ch = msg[0] & 0xF0, msg[0] & 0x0F
+                if kind == NOTE_OFF or (kind == NOTE_ON and msg[2] == 0):
+                    key = (ch, msg[1])
+                    # 다른 클라이언트가 아직 누르고 있거나, 애초에 울리지 않은 음은 건너뜀
+                    if i in burst.held or key not in written:
+                        continue
+                    written.discard(key)
+                elif kind == NOTE_ON:
+                    written.add((ch, msg[1]))
+                elif kind == CONTROL_CHANGE and out and out[-1][0] == msg[0] and out[-1][1] == msg[1]:
+                    out[-1] = msg
+                    continue
+                out.append(msg)
+        return out
+
+    def _run(self):
+        while True:
+            burst = self._queue.get()
+            if burst is None:
+                break
+            bursts = [burst]
+            while True:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                bursts.append(nxt)
+
+            messages = self._coalesce(bursts)
+            start = time.perf_counter()
+            for msg in messages:
+                kind, ch = msg[0] & 0xF0, msg[0] & 0x0F
+                try:
+                    self.port.send(mido.Message.from_bytes(msg))
+                except Exception as e:
+                    self.error = str(e)
+                    continue
+                if kind == NOTE_ON and msg[2] > 0:
+                    self._written.add((ch, msg[1]))
+                elif kind in (NOTE_OFF, NOTE_ON):
+                    self._written.discard((ch, msg[1]))
+                elif kind == CONTROL_CHANGE and msg[1] == CC_ALL_NOTES_OFF:
+                    self._written = {k for k in self._written if k[0] != ch}
+
+            with self._lock:
+                total = sum(len(b.events) for b in bursts)
+                self.counters['bursts'] += len(bursts)
+                self.counters['writes'] += 1
+                self.counters['written'] += len(messages)
+                self.counters['dropped'] += total - len(messages)
+            for b in bursts:
+                self.queue_wait.add((start - b.queued) * 1000)
+                b.done.set()
+
+    # ---------- Status ----------
+    def status(self):
+        with self._lock:
+            counters = dict(self.counters)
+            sounding = len(self._sounding)
+        return {
+            'running': self.running,
+            'port': self.port_name,
+            'error': self.error,
+            'sounding': sounding,
+            'counters': counters,
+            'latency_ms': {'round_trip': self.rtt.summary(), 'queue': self.queue_wait.summary()},
+        }
+
+    # ---------- WebSocket session ----------
+    def serve(self, ws):
+        """WebSocket 연결 하나 처리 (연결이 끊기면 해당 클라이언트 노트 해제)"""
+        client = self.connect()
+        try:
+            while True:
+                text = ws.receive()
+                if text is None:
+                    break
+                # 이미 도착해 있는 프레임은 한 묶음으로 처리
+                frames = [text]
+                while ws.pending():
+                    more = ws.receive()
+                    if more is None:
+                        break
+                    frames.append(more)
+
+                events, acks = [], []
+                for frame in frames:
+                    msg = {}
+                    try:
+                        msg = json.loads(frame)
+                        events += parse_events(msg.get('events', []))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        seq = msg.get('seq') if isinstance(msg, dict) else None
+                        ws.send(json.dumps({'error': str(e), 'seq': seq}))
+                        continue
+                    if isinstance(msg.get('rtt'), (int, float)) and msg['rtt'] >= 0:
+                        self.rtt.add(float(msg['rtt']))
+                    if 'seq' in msg:
+                        acks.append({'ack': msg['seq'], 't': msg.get('t')})
+                if events:
+                    self.submit(client, events).done.wait(0.5)
+                for ack in acks:
+                    ws.send(json.dumps(ack, separators=(',', ':')))
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.disconnect(client)
+
+
+# ===================== Minimal WebSocket server =====================
+
+class WebSocket:
+    """서버 측 RFC 6455 연결 (텍스트/바이너리, ping/pong, close만 지원)"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._buf = bytearray()
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def _read_exact(self, n):
+        while len(self._buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError('connection closed')
+            self._buf += chunk
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def _send_frame(self, opcode, payload):
+        header = bytes((0x80 | opcode,))
+        n = len(payload)
+        if n < 126:
+            header += bytes((n,))
+        elif n < 1 << 16:
+            header += bytes((126,)) + struct.pack('>H', n)
+        else:
+            header += bytes((127,)) + struct.pack('>Q', n)
+        with self._send_lock:
+            self.sock.sendall(header + payload)
+
+    def send(self, text):
+        self._send_frame(OP_TEXT, text.encode('utf-8'))
+
+    def pending(self):
+        """읽지 않은 데이터가 이미 도착해 있는지 (블록하지 않음)"""
+        return bool(self._buf) or bool(select.select([self.sock], [], [], 0)[0])
+
+    def receive(self):
+        """다음 텍스트/바이너리 메시지 (close면 None)"""
+        message, message_op = bytearray(), None
+        while not self.closed:
+            b0, b1 = self._read_exact(2)
+            fin, opcode = b0 & 0x80, b0 & 0x0F
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack('>H', self._read_exact(2))[0]
+            elif n == 127:
+                n = struct.unpack('>Q', self._read_exact(8))[0]
+            if n > MAX_FRAME or not b1 & 0x80:  # 클라이언트 프레임은 반드시 마스킹
+                self.close(1009 if n > MAX_FRAME else 1002)
+                return None
+            mask = self._read_exact(4)
+            payload = bytes(b ^ mask[i & 3] for i, b in enumerate(self._read_exact(n)))
+
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+            elif opcode == OP_CLOSE:
+                self.close()
+                return None
+            elif opcode in (OP_TEXT, OP_BINARY, OP_CONT):
+                if opcode != OP_CONT:
+                    message_op = opcode
+                message += payload
+                if len(message) > MAX_FRAME:
+                    self.close(1009)
+                    return None
+                if fin:
+                    if message_op != OP_TEXT:
+                        return bytes(message)
+                    try:
+                        return message.decode('utf-8')
+                    except UnicodeDecodeError:
+                        self.close(1007)  # 텍스트 프레임이 UTF-8이 아님
+                        return None
+        return None
+
+    def close(self, code=1000):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._send_frame(OP_CLOSE, struct.pack('>H', code))
+        except OSError:
+            pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    rbufsize = 0  # 핸드셰이크 뒤의 프레임이 rfile 버퍼에 남지 않도록
+
+    def handle(self):
+        request_line = self.rfile.readline(4096)
+        headers = {}
+        while True:
+            line = self.rfile.readline(4096)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if not request_line.startswith(b'GET ') or 'websocket' not in headers.get('upgrade', '').lower() or not key:
+            self.wfile.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            return
+        # 브라우저는 항상 Origin을 보낸다 - 허용 목록 밖(다른 사이트, 헤더 없음)은 거부
+        origin = headers.get('origin', '').rstrip('/').lower()
+        if origin not in self.server.origins:
+            self.wfile.write(b'HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode('ascii') + WS_GUID).digest()).decode('ascii')
+        self.wfile.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                          f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode('ascii'))
+        self.wfile.flush()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        ws = WebSocket(self.request)
+        self.server.bridge.serve(ws)
+        ws.close()
+
+
+class BridgeServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, bridge, host=DEFAULT_HOST, port=5001, origins=None):
+        super().__init__((host, port), _Handler)
+        self.bridge = bridge
+        self.origins = frozenset(parse_origins(web_origins() if origins is None else origins))
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name='midi-bridge-ws', daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.bridge.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MIDI bridge (WebSocket → mido output)')
+    parser.add_argument('--list', action='store_true', help='출력 포트 목록만 출력')
+    parser.add_argument('--bind', default=f'{DEFAULT_HOST}:5001', help=f'WebSocket host:port (기본값 {DEFAULT_HOST}:5001)')
+    parser.add_argument('--origins', default=','.join(web_origins()),
+                        help='허용할 웹 페이지 Origin (쉼표 구분, 기본값 localhost/127.0.0.1:5000)')
+    parser.add_argument('--port-name', help='MIDI 출력 포트 이름 (기본값: PREFERRED_OUT_PORTS 순서)')
+    args = parser.parse_args()
+
+    if args.list:
+        names = mido.get_output_names() if mido is not None else []
+        chosen = pick_output_port(names, preferred_out_ports())
+        for name in names:
+            print(('* ' if name == chosen else '  ') + name)
+        return
+
+    host, _, port = args.bind.rpartition(':')
+    bridge = MidiBridge(port_name=args.port_name).start()
+    server = BridgeServer(bridge, host or DEFAULT_HOST, int(port), args.origins)
+    print(f'[MidiBridge] {bridge.port_name} ← ws://{host or DEFAULT_HOST}:{port} (origins: {", ".join(sorted(server.origins))})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        bridge.close()
+
+
+if __name__ == '__main__':
+    main()
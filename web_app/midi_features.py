@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MIDI 곡 특징 추출 (프로세스 풀 일괄 작업) → MAESTRO 카탈로그 features 테이블
+    노트 수, 초당 노트 수, 음역, 동시 발음 수(평균/최대), 페달 사용 비율/횟수,
+    벨로시티 통계, 추정 조성 (Krumhansl-Schmuckler 프로파일 상관)
+
+    결과는 MIDI 내용 해시 기준으로 web_app/cache/midi_features에 캐시하므로
+    다시 실행하면 바뀐(해시가 새로운) 파일만 열어 본다
+
+실행: python midi_features.py             → 카탈로그의 모든 곡 특징 추출 + 병합 (처리량 출력)
+      python midi_features.py song.mid    → 한 곡 특징 출력
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+import maestro_catalog
+import smf
+from maestro_events import MAESTRO_ROOT, NOTE, PEDAL, _write_atomic, encode
+
+FEATURE_VERSION = 1
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / 'cache' / 'midi_features'
+
+KEY_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B']
+# Krumhansl-Kessler 조성 프로파일 (C 기준)
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+
+def _zscore(x):
+    x = x - x.mean(axis=-1, keepdims=True)
+    norm = np.sqrt((x * x).sum(axis=-1, keepdims=True))
+    return x / np.where(norm > 0, norm, 1)
+
+
+# 24개 조성 프로파일 (장조 12 + 단조 12), 행마다 표준화해 두면 상관계수 = 내적
+_PROFILES = _zscore(np.array([np.roll(MAJOR_PROFILE, k) for k in range(12)]
+                             + [np.roll(MINOR_PROFILE, k) for k in range(12)]))
+
+
+def estimate_key(pitch, dur):
+    """길이 가중 음이름 분포와 가장 상관이 높은 조성 → ('C major', 상관계수)"""
+    hist = np.bincount(pitch % 12, weights=np.maximum(dur, 1), minlength=12)
+    if not hist.any():
+        return None, 0.0
+    r = _PROFILES @ _zscore(hist)
+    best = int(r.argmax())
+    return f'{KEY_NAMES[best % 12]} {"major" if best < 12 else "minor"}', round(float(r[best]), 3)
+
+
+def polyphony(start, end):
+    """동시에 울리는 노트 수 → (소리가 나는 동안의 시간 가중 평균, 최대)"""
+    if len(start) == 0:
+        return 0.0, 0
+    times = np.concatenate([start, end])
+    deltas = np.concatenate([np.ones(len(start), np.int64), -np.ones(len(end), np.int64)])
+    order = np.lexsort((deltas, times))  # 같은 시각이면 끝(-1)을 먼저 → 이어 치는 노트는 겹치지 않음
+    times, level = times[order], np.cumsum(deltas[order])
+    span = np.diff(times)
+    level = level[:-1]
+    sounding = span[level > 0].sum()
+    mean = float((span * level).sum() / sounding) if sounding else 1.0
+    return round(mean, 3), int(level.max(initial=1))
+
+
+def extract(events):
+    """컬럼형 이벤트 (maestro_events.encode 결과) → 특징 dict (maestro_catalog.FEATURE_COLUMNS)"""
+    kind = np.asarray(events['type'], dtype=np.int8)
+    t = np.asarray(events['t'], dtype=np.int64)
+    pitch = np.asarray(events['pitch'], dtype=np.int64)
+    vel = np.asarray(events['vel'], dtype=np.int64)
+    dur = np.asarray(events['dur'], dtype=np.int64)
+    duration_ms = max(1, round(events['duration'] * 1000))
+
+    is_note = kind == NOTE
+    start, length = t[is_note], dur[is_note]
+    p, v = pitch[is_note], vel[is_note]
+    count = int(is_note.sum())
+
+    # 페달: 밟은 시점부터 다음 페달 이벤트(없으면 곡 끝)까지
+    pedal_t, pedal_down = t[kind == PEDAL], vel[kind == PEDAL] >= 64
+    held = np.diff(np.append(pedal_t, duration_ms))
+    mean_poly, max_poly = polyphony(start, start + length)
+    key, confidence = estimate_key(p, length)
+
+    return {
+        'note_count': count,
+        'notes_per_sec': round(count * 1000 / duration_ms, 3),
+        'pitch_min': int(p.min()) if count else None,
+        'pitch_max': int(p.max()) if count else None,
+        'pitch_range': int(p.max() - p.min()) if count else 0,
+        'polyphony_mean': mean_poly,
+        'polyphony_max': max_poly if count else 0,
+        'pedal_ratio': round(float(held[pedal_down].sum()) / duration_ms, 4),
+        'pedal_presses': int(pedal_down.sum()),
+        'velocity_mean': round(float(v.mean()), 2) if count else None,
+        'velocity_std': round(float(v.std()), 2) if count else None,
+        'velocity_min': int(v.min()) if count else None,
+        'velocity_max': int(v.max()) if count else None,
+        'key': key,
+        'key_confidence': confidence,
+    }
+
+
+def cache_path(cache_dir, digest):
+    return Path(cache_dir) / digest[:2] / f'{digest}.v{FEATURE_VERSION}.json'
+
+
+# ---------- 일괄 추출 (프로세스 풀) ----------
+
+def load_cached(cache_dir, digest):
+    try:
+        return json.loads(cache_path(cache_dir, digest).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _feature_job(path, cache_dir):
+    """워커: MIDI 한 곡 → (상태, 해시, 특징, 원본 바이트, 노트 수, 메시지)"""
+    digest = None
+    try:
+        raw = Path(path).read_bytes()
+        digest = hashlib.sha1(raw).hexdigest()
+        features = extract(encode(smf.parse(raw)))
+        _write_atomic(cache_path(cache_dir, digest), json.dumps(features, separators=(',', ':')).encode('utf-8'))
+        return 'extracted', digest, features, len(raw), features['note_count'], ''
+    except (OSError, smf.MidiFormatError, IndexError, ValueError) as e:
+        return 'error', digest, None, 0, 0, str(e)
+
+
+def extract_all(root=MAESTRO_ROOT, db_path=maestro_catalog.CATALOG_PATH, cache_dir=CACHE_DIR,
+                workers=None, force=False):
+    """카탈로그에서 특징이 없는 곡(새로운 MIDI 해시)만 추출해 features 테이블에 병합 → 통계 dict"""
+    root = Path(root)
+    conn = maestro_catalog.connect(db_path)
+    try:
+        if force:
+            todo = conn.execute('SELECT midi_file, midi_sha1 FROM pieces WHERE midi_sha1 IS NOT NULL'
+                                ' GROUP BY midi_sha1').fetchall()
+        else:
+            todo = conn.execute('SELECT p.midi_file, p.midi_sha1 FROM pieces p'
+                                ' LEFT JOIN features f ON f.midi_sha1 = p.midi_sha1 AND f.version = ?'
+                                ' WHERE p.midi_sha1 IS NOT NULL AND f.midi_sha1 IS NULL GROUP BY p.midi_sha1',
+                                (FEATURE_VERSION,)).fetchall()
+        t0 = time.perf_counter()
+        counts = {'extracted': 0, 'cached': 0, 'error': 0}
+        src_bytes = notes = 0
+        rows = []
+        pending = []
+        for midi_file, digest in todo:
+            # 해시별 캐시에 있으면 MIDI를 열지도, 워커에 넘기지도 않는다
+            features = None if force else load_cached(cache_dir, digest)
+            if features is None:
+                pending.append((midi_file, digest))
+                continue
+            counts['cached'] += 1
+            rows.append((digest, FEATURE_VERSION) + tuple(features[c] for c in maestro_catalog.FEATURE_COLUMNS))
+
+        workers = min(workers or os.cpu_count() or 1, max(1, len(pending)))
+        print(f"Features: {len(todo)} new MIDI hashes, {counts['cached']} from cache, "
+              f"{len(pending)} to extract with {workers} workers")
+        if pending:
+            # spawn: 서버와 같은 방식 (fork하면 listen 소켓을 물려받는다)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {pool.submit(_feature_job, str(root / mf), str(cache_dir)): (mf, digest)
+                           for mf, digest in pending}
+                for i, future in enumerate(as_completed(futures), 1):
+                    status, digest, features, size, note_count, message = future.result()
+                    counts[status] += 1
+                    src_bytes += size
+                    notes += note_count
+                    midi_file, expected = futures[future]
+                    if status == 'error':
+                        print(f"  [ERROR] {midi_file}: {message}")
+                    elif digest != expected:
+                        # 카탈로그 빌드 뒤에 파일이 바뀜 → parse_maestro.py를 다시 실행해야 연결된다
+                        print(f"  [STALE] {midi_file}: changed since the catalog was built")
+                    else:
+                        rows.append((digest, FEATURE_VERSION) + tuple(features[c] for c in maestro_catalog.FEATURE_COLUMNS))
+                    if i % 100 == 0:
+                        print(f"  [{i}/{len(pending)}]")
+        elapsed = time.perf_counter() - t0
+
+        with conn:
+            columns = ', '.join(('midi_sha1', 'version') + maestro_catalog.FEATURE_COLUMNS)
+            marks = ', '.join('?' * (len(maestro_catalog.FEATURE_COLUMNS) + 2))
+            conn.executemany(f'INSERT OR REPLACE INTO features ({columns}) VALUES ({marks})', rows)
+            # 더 이상 어느 곡도 가리키지 않는 해시의 특징은 정리
+            pruned = conn.execute('DELETE FROM features WHERE midi_sha1 NOT IN'
+                                  ' (SELECT midi_sha1 FROM pieces WHERE midi_sha1 IS NOT NULL)').rowcount
+            if rows or pruned:
+                maestro_catalog.bump_generation(conn)
+    finally:
+        conn.close()
+
+    print(f"[OK] {counts['extracted']} extracted, {counts['cached']} from cache, {counts['error']} failed, "
+          f"{len(rows)} merged, {pruned} pruned in {elapsed:.1f}s")
+    if elapsed > 0 and counts['extracted']:
+        # 처리량은 실제로 MIDI를 연 파일 기준
+        print(f"[OK] {counts['extracted'] / elapsed:.1f} files/s, {src_bytes / 1e6 / elapsed:.2f} MB/s, "
+              f"{notes / elapsed:,.0f} notes/s")
+    return dict(counts, merged=len(rows), pruned=pruned, seconds=round(elapsed, 3))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract per-piece MIDI features into the MAESTRO catalog')
+    parser.add_argument('midi', nargs='?', type=Path, help='MIDI 파일 (없으면 카탈로그 전체)')
+    parser.add_argument('--root', type=Path, default=MAESTRO_ROOT)
+    parser.add_argument('--db', type=Path, default=maestro_catalog.CATALOG_PATH)
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='캐시를 무시하고 모두 다시 추출')
+    args = parser.parse_args()
+
+    if args.midi is None:
+        extract_all(args.root, args.db, args.cache_dir, args.workers, args.force)
+    else:
+        start = time.perf_counter()
+        features = extract(encode(smf.read(args.midi)))
+        print(json.dumps(features, indent=2))
+        print(f"({(time.perf_counter() - start) * 1000:.0f}ms)")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MIDI 변환 (조옮김 / 템포 배율 / 채널 필터) + 크기 제한 LRU 캐시
+    원본 하나로 모든 키와 템포 변형을 서버에서 만들어 준다 (/api/midi-transform)
+    결과는 (원본 해시, 변환 인자) 기준으로 메모리 LRU와 디스크 LRU에 둘 다 캐시한다
+
+실행: python midi_transform.py in.mid -o out.mid --transpose 2 --tempo 1.25 --channels 0,1
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import argparse
+import hashlib
+import os
+import threading
+
+import metrics
+import smf
+from maestro_events import _write_atomic
+
+FORMAT_VERSION = 1
+TRANSPOSE_RANGE = (-24, 24)
+TEMPO_RANGE = (0.25, 4.0)
+DRUM_CHANNEL = 9
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / 'cache' / 'midi_transform'
+
+# 조옮김 대상: 노트 오프/온, 폴리 애프터터치
+_PITCHED = (smf.NOTE_OFF, smf.NOTE_ON, 0xA0)
+
+
+class TransformError(ValueError):
+    """잘못된 변환 인자"""
+
+
+class TransformSpec:
+    """정규화된 변환 인자 (캐시 키에 사용)"""
+
+    def __init__(self, transpose=0, tempo=1.0, channels=None):
+        self.transpose = transpose
+        self.tempo = tempo
+        self.channels = channels  # frozenset 또는 None (전체)
+
+    @classmethod
+    def parse(cls, transpose=None, tempo=None, channels=None):
+        """쿼리 문자열 값 → TransformSpec (범위를 벗어나면 TransformError)"""
+        try:
+            semitones = int(transpose) if transpose not in (None, '') else 0
+            factor = float(tempo) if tempo not in (None, '') else 1.0
+        except ValueError:
+            raise TransformError('transpose must be an integer and tempo a number') from None
+        if not TRANSPOSE_RANGE[0] <= semitones <= TRANSPOSE_RANGE[1]:
+            raise TransformError(f'transpose must be within {TRANSPOSE_RANGE[0]}..{TRANSPOSE_RANGE[1]}')
+        if not TEMPO_RANGE[0] <= factor <= TEMPO_RANGE[1]:
+            raise TransformError(f'tempo must be within {TEMPO_RANGE[0]}..{TEMPO_RANGE[1]}')
+
+        chans = None
+        if channels not in (None, ''):
+            try:
+                chans = frozenset(int(c) for c in str(channels).split(',') if c.strip())
+            except ValueError:
+                raise TransformError('channels must be a comma-separated list of 0-15') from None
+            if not chans or any(not 0 <= c <= 15 for c in chans):
+                raise TransformError('channels must be a comma-separated list of 0-15')
+        return cls(semitones, round(factor, 4), chans)
+
+    @property
+    def identity(self):
+        return self.transpose == 0 and self.tempo == 1.0 and self.channels is None
+
+    def key(self):
+        chans = ','.join(str(c) for c in sorted(self.channels)) if self.channels is not None else '*'
+        return f't{self.transpose:+d}_x{self.tempo:g}_c{chans}'
+
+
+def transform(mf, spec):
+    """MidiFile → 변환된 새 MidiFile"""
+    tracks = [_transform_track(events, spec) for events in mf.tracks]
+    if spec.tempo != 1.0:
+        if mf.division < 0:
+            # SMPTE 타이밍은 템포 이벤트가 없으므로 델타 tick 자체를 늘이거나 줄인다
+            tracks = [_scale_deltas(events, 1.0 / spec.tempo) for events in tracks]
+        else:
+            tracks = _scale_tempo(tracks, spec.tempo)
+    return smf.MidiFile(mf.format, mf.division, tracks)
+
+
+def _transform_track(events, spec):
+    out = []
+    carry = 0  # 버린 이벤트의 델타는 다음 이벤트로 넘긴다
+    for ev in events:
+        delta = ev.delta + carry
+        if ev.status < 0xF0:
+            ch = ev.status & 0x0F
+            if spec.channels is not None and ch not in spec.channels:
+                carry = delta
+                continue
+            if spec.transpose and (ev.status & 0xF0) in _PITCHED and ch != DRUM_CHANNEL:
+                pitch = ev.data[0] + spec.transpose
+                if not 0 <= pitch <= 127:
+                    carry = delta
+                    continue
+                ev = ev._replace(data=bytes((pitch,)) + ev.data[1:])
+        carry = 0
+        out.append(ev._replace(delta=delta) if delta != ev.delta else ev)
+    return out
+
+
+def _scale_tempo(tracks, factor):
+    """모든 템포 이벤트를 factor배 빠르게. 곡 시작에 템포가 없으면 기본 템포 기준으로 추가"""
+    has_initial = False
+    scaled = []
+    for events in tracks:
+        out = []
+        tick = 0
+        for ev in events:
+            tick += ev.delta
+            if ev.status == 0xFF and ev.meta_type == smf.META_TEMPO and len(ev.data) == 3:
+                has_initial = has_initial or tick == 0
+                us = (ev.data[0] << 16) | (ev.data[1] << 8) | ev.data[2]
+                us = min(0xFFFFFF, max(1, round(us / factor)))
+                ev = ev._replace(data=us.to_bytes(3, 'big'))
+            out.append(ev)
+        scaled.append(out)
+    if not has_initial and scaled:
+        scaled[0].insert(0, smf.tempo_event(60e6 / smf.DEFAULT_TEMPO * factor))
+    return scaled
+
+
+def _scale_deltas(events, ratio):
+    out = []
+    tick = scaled_last = 0
+    for ev in events:
+        tick += ev.delta
+        scaled = round(tick * ratio)
+        out.append(ev._replace(delta=scaled - scaled_last))
+        scaled_last = scaled
+    return out
+
+
+class TransformCache:
+    """(원본 해시, 변환 인자) → SMF 바이트. 메모리 LRU + 디스크 LRU (둘 다 바이트 수 제한)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, hasher=None, memory_bytes=32 << 20, disk_bytes=256 << 20):
+        self.cache_dir = Path(cache_dir)
+        self.hasher = hasher or _file_hash
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_size = 0
+        self._disk = None             # key -> size (첫 사용 시 디렉터리 스캔)
+        self._disk_size = 0
+
+    def cache_key(self, path, spec):
+        return hashlib.sha1(f'{self.hasher(Path(path))}:{spec.key()}:v{FORMAT_VERSION}'.encode()).hexdigest()
+
+    def get(self, path, spec):
+        """원본 경로 + TransformSpec → (SMF 바이트, 캐시 키)"""
+        key = self.cache_key(path, spec)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        if data is None:
+            data = self._read_disk(key)
+            if data is not None:
+                self._remember(key, data)
+        metrics.cache_event('midi_transform', data is not None)
+        if data is not None:
+            return data, key
+
+        data = smf.serialize(transform(smf.read(path), spec))
+        self._remember(key, data)
+        self._write_disk(key, data)
+        return data, key
+
+    # ---------- Memory ----------
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    # ---------- Disk ----------
+    def _path(self, key):
+        return self.cache_dir / f'{key}.mid'
+
+    def _scan_locked(self):
+        if self._disk is not None:
+            return
+        entries = []
+        if self.cache_dir.is_dir():
+            for p in self.cache_dir.glob('*.mid'):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, p.stem, st.st_size))
+        # 오래 쓰지 않은 것부터 (mtime = 마지막 사용 시각)
+        self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_size = sum(self._disk.values())
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._scan_locked()
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write_disk(self, key, data):
+        if len(data) > self.disk_bytes:
+            return
+        _write_atomic(self._path(key), data)
+        with self._lock:
+            self._scan_locked()
+            self._disk_size += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            evict = []
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evict.append(old_key)
+        for old_key in evict:
+            try:
+                self._path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            self._scan_locked()
+            return {'memory_entries': len(self._memory), 'memory_bytes': self._memory_size,
+                    'disk_entries': len(self._disk), 'disk_bytes': self._disk_size}
+
+
+def _file_hash(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MIDI transpose / tempo / channel filter')
+    parser.add_argument('input')
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--transpose', default=None, help='반음 단위 (-24..24)')
+    parser.add_argument('--tempo', default=None, help='템포 배율 (0.25..4)')
+    parser.add_argument('--channels', default=None, help='남길 채널 (0-15, 쉼표 구분)')
+    args = parser.parse_args()
+
+    spec = TransformSpec.parse(args.transpose, args.tempo, args.channels)
+    mf = transform(smf.read(args.input), spec)
+    smf.write(mf, args.output)
+    print(f'{args.input} → {args.output} ({spec.key()}) {smf.summarize(mf)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MusicRoot 카탈로그 - 키 폴더별 MIDI 목록과 메타데이터를 메모리에 유지
+폴더 mtime이 바뀐 경우에만 다시 스캔한다
+"""
+
+from pathlib import Path
+import threading
+import time
+
+import smf
+
+
+class MusicCatalog:
+    def __init__(self, root, check_interval=2.0):
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._root_mtime = None
+        self._dir_mtimes = {}      # key -> 폴더 mtime
+        self._entries = {}         # key -> {filename: meta}
+        self._listing = {}
+        self._details = {}
+        self._last_check = 0.0
+        self.generation = 0
+
+    # ---------- Scan ----------
+    def _scan_key(self, key_dir, previous):
+        entries = {}
+        for f in sorted(key_dir.glob('*.mid')):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            old = previous.get(f.name)
+            if old and old['size'] == st.st_size and old['mtime'] == st.st_mtime:
+                entries[f.name] = old
+                continue
+            meta = {'name': f.name, 'size': st.st_size, 'mtime': st.st_mtime,
+                    'path': f, 'duration': None, 'tracks': None, 'notes': None}
+            try:
+                meta.update(smf.summarize(smf.read(f)))
+            except (OSError, smf.MidiFormatError, IndexError) as e:
+                print(f"[Catalog] Metadata failed for {f}: {e}")
+            entries[f.name] = meta
+        return entries
+
+    def _refresh_locked(self):
+        try:
+            root_mtime = self.root.stat().st_mtime
+        except OSError:
+            if self._entries or self._root_mtime is not None:
+                self._root_mtime = None
+                self._dir_mtimes, self._entries = {}, {}
+                self._rebuild_views()
+            return
+
+        changed = False
+        if root_mtime != self._root_mtime:
+            # 키 폴더 추가/삭제 반영
+            self._root_mtime = root_mtime
+            keys = {d.name for d in self.root.iterdir() if d.is_dir()}
+            for gone in set(self._dir_mtimes) - keys:
+                self._entries.pop(gone, None)
+                self._dir_mtimes.pop(gone, None)
+                changed = True
+            for key in keys - set(self._dir_mtimes):
+                self._dir_mtimes[key] = None
+
+        for key in list(self._dir_mtimes):
+            key_dir = self.root / key
+            try:
+                mtime = key_dir.stat().st_mtime
+            except OSError:
+                continue
+            if mtime != self._dir_mtimes[key]:
+                self._entries[key] = self._scan_key(key_dir, self._entries.get(key, {}))
+                self._dir_mtimes[key] = mtime  # 스캔이 끝난 뒤에 기록 (실패하면 다음에 다시 스캔)
+                changed = True
+
+        if changed:
+            self._rebuild_views()
+
+    def _rebuild_views(self):
+        self._listing = {k: list(v) for k, v in sorted(self._entries.items()) if v}
+        self._details = {
+            k: [{f: m[f] for f in ('name', 'size', 'duration', 'tracks', 'notes')} for m in v.values()]
+            for k, v in sorted(self._entries.items()) if v
+        }
+        self.generation += 1
+
+    def refresh(self, force=False):
+        """변경된 폴더만 다시 스캔 (check_interval 내 재호출은 무시)"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            self._refresh_locked()
+
+    # ---------- Queries ----------
+    @property
+    def available(self):
+        self.refresh()
+        return self._root_mtime is not None
+
+    def listing(self):
+        """{key: [filename, ...]}"""
+        self.refresh()
+        return self._listing
+
+    def details(self):
+        """{key: [{name, size, duration, tracks, notes}, ...]}"""
+        self.refresh()
+        return self._details
+
+    def lookup(self, key, filename):
+        """인덱스에 등록된 파일의 Path (없으면 None)"""
+        self.refresh()
+        meta = self._entries.get(key, {}).get(filename)
+        return meta['path'] if meta else None
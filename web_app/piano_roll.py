@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+피아노 롤 미리보기 타일 (NumPy 벡터화 렌더링)
+    곡을 시간 구간별 타일(PNG/WebP)로 그린다. 줌 0은 곡 전체를 타일 하나에 담은 개요(썸네일),
+    줌 1~4는 초당 8/16/32/64 px로 자른 타일이다.
+    타일은 (원본 해시, 줌, 타일 번호, 포맷) 기준으로 디스크에 캐시한다 (web_app/cache/piano_roll)
+
+노트 사각형은 행(건반)마다 시작/끝 열에 +벨로시티/-벨로시티를 더한 뒤 누적합으로 채우므로
+노트 수와 관계없이 타일 하나를 배열 연산 몇 번으로 그린다.
+
+실행: python piano_roll.py                      → MAESTRO_ROOT 전체 개요 타일 미리 생성
+      python piano_roll.py song.mid -z 2 -t 0 -o tile.png
+"""
+
+from pathlib import Path
+import argparse
+import bisect
+import io
+import math
+import time
+
+import numpy as np
+from PIL import Image, features
+
+import metrics
+import smf
+from maestro_events import MAESTRO_ROOT, NOTE, EventCache, _write_atomic
+
+FORMAT_VERSION = 1
+TILE_WIDTH = 512
+KEY_LOW, KEY_HIGH = 21, 108  # 88건반
+ROW_PX = 2
+PEDAL_PX = 4
+HEIGHT = (KEY_HIGH - KEY_LOW + 1) * ROW_PX + PEDAL_PX
+OVERVIEW = 0
+ZOOM_PPS = {1: 8, 2: 16, 3: 32, 4: 64}  # 줌 → 초당 픽셀
+FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / 'cache' / 'piano_roll'
+
+# 라이브러리 테마 색 (골드 노트, 어두운 배경)
+NOTE_RGB = np.array([212, 175, 55], dtype=np.float32)
+ONSET_RGB = np.array([255, 236, 170], dtype=np.float32)
+WHITE_KEY_RGB = np.array([22, 22, 26], dtype=np.uint8)
+BLACK_KEY_RGB = np.array([12, 12, 15], dtype=np.uint8)
+C_LINE_RGB = np.array([48, 44, 36], dtype=np.uint8)
+PEDAL_RGB = np.array([90, 120, 200], dtype=np.uint8)
+
+
+class TileError(ValueError):
+    """존재하지 않는 줌/타일"""
+
+
+def _background():
+    pitches = np.arange(KEY_HIGH, KEY_LOW - 1, -1)  # 위쪽이 높은 음
+    black = np.isin(pitches % 12, (1, 3, 6, 8, 10))
+    rows = np.where(black[:, None], BLACK_KEY_RGB, WHITE_KEY_RGB)
+    rows[pitches % 12 == 0] = C_LINE_RGB  # 옥타브 경계(C) 표시
+    return rows  # (88, 3)
+
+
+_BACKGROUND = _background()
+
+
+def tile_count(duration_ms, zoom):
+    if zoom == OVERVIEW:
+        return 1
+    ms_per_tile = TILE_WIDTH * 1000 / ZOOM_PPS[zoom]
+    return max(1, math.ceil(duration_ms / ms_per_tile))
+
+
+def layout(duration_ms):
+    """클라이언트용 타일 배치 정보"""
+    zooms = [{'zoom': OVERVIEW, 'px_per_sec': round(TILE_WIDTH * 1000 / max(1, duration_ms), 4), 'tiles': 1}]
+    zooms += [{'zoom': z, 'px_per_sec': pps, 'tiles': tile_count(duration_ms, z)} for z, pps in ZOOM_PPS.items()]
+    return {'duration': duration_ms / 1000, 'tile_width': TILE_WIDTH, 'height': HEIGHT,
+            'key_low': KEY_LOW, 'key_high': KEY_HIGH, 'row_px': ROW_PX, 'zooms': zooms}
+
+
+def tile_span(duration_ms, zoom, tile):
+    """타일이 덮는 [t0, t1) (ms)"""
+    if zoom != OVERVIEW and zoom not in ZOOM_PPS:
+        raise TileError(f'Unknown zoom level: {zoom}')
+    if not 0 <= tile < tile_count(duration_ms, zoom):
+        raise TileError(f'Tile index out of range: {tile}')
+    if zoom == OVERVIEW:
+        return 0.0, float(max(1, duration_ms))
+    ms_per_tile = TILE_WIDTH * 1000 / ZOOM_PPS[zoom]
+    return tile * ms_per_tile, (tile + 1) * ms_per_tile
+
+
+def render(index, zoom, tile):
+    """TimeIndex → (HEIGHT, TILE_WIDTH, 3) uint8 RGB"""
+    t0, t1 = tile_span(index.duration_ms, zoom, tile)
+    ms_per_px = (t1 - t0) / TILE_WIDTH
+    events = index.events
+
+    # 타일 시작 시점에 이미 울리고 있는 노트 + 타일 안에서 시작하는 노트
+    lo = bisect.bisect_left(index.t, t0)
+    hi = bisect.bisect_left(index.t, t1)
+    active = index.active_at(int(t0))
+    base = min(active[0], lo) if active else lo
+    ids = np.concatenate([np.asarray(active, dtype=np.int64), np.arange(lo, hi)]) - base
+
+    def column(name, dtype):
+        # 필요한 구간만 배열로 변환
+        return np.asarray(events[name][base:hi], dtype=dtype)[ids]
+
+    is_note = column('type', np.int8) == NOTE
+    start = column('t', np.float64)[is_note]
+    end = start + column('dur', np.float64)[is_note]
+    pitch = column('pitch', np.int64)[is_note]
+    vel = column('vel', np.int64)[is_note]
+
+    keep = (pitch >= KEY_LOW) & (pitch <= KEY_HIGH)
+    start, end, pitch, vel = start[keep], end[keep], pitch[keep], vel[keep]
+    x0 = np.clip(np.floor((start - t0) / ms_per_px), 0, TILE_WIDTH).astype(np.int64)
+    x1 = np.clip(np.ceil((end - t0) / ms_per_px), 0, TILE_WIDTH).astype(np.int64)
+    x1 = np.maximum(x1, np.minimum(x0 + 1, TILE_WIDTH))  # 아주 짧은 노트도 1px
+    rows = KEY_HIGH - pitch
+
+    # 행별 차분 배열 → 누적합 = 각 픽셀을 덮는 노트들의 벨로시티 합
+    width = TILE_WIDTH + 1
+    diff = np.zeros((KEY_HIGH - KEY_LOW + 1) * width, dtype=np.int32)
+    np.add.at(diff, rows * width + x0, vel)
+    np.add.at(diff, rows * width + x1, -vel)
+    level = np.cumsum(diff.reshape(-1, width), axis=1)[:, :TILE_WIDTH]
+    onset = np.zeros_like(level, dtype=bool)
+    onset[rows[start >= t0], x0[start >= t0]] = True
+
+    shade = (0.45 + 0.55 * np.clip(level, 0, 127) / 127.0)[..., None]
+    notes = np.where(onset[..., None], ONSET_RGB, NOTE_RGB * shade)
+    keys = np.where((level > 0)[..., None], notes, _BACKGROUND[:, None, :]).astype(np.uint8)
+    keys = np.repeat(keys, ROW_PX, axis=0)
+
+    # 하단 띠: 서스테인 페달 구간
+    pedal = np.zeros((PEDAL_PX, TILE_WIDTH, 3), dtype=np.uint8)
+    if index.pedal_t:
+        centers = t0 + (np.arange(TILE_WIDTH) + 0.5) * ms_per_px
+        k = np.searchsorted(np.asarray(index.pedal_t), centers, side='right') - 1
+        down = (k >= 0) & (np.asarray(index.pedal_v)[np.maximum(k, 0)] >= 64)
+        pedal[:, down] = PEDAL_RGB
+    return np.concatenate([keys, pedal], axis=0)
+
+
+def encode_image(pixels, fmt):
+    buf = io.BytesIO()
+    image = Image.fromarray(pixels, 'RGB')
+    if fmt == 'webp':
+        image.save(buf, 'WEBP', lossless=True, method=2)
+    else:
+        image.save(buf, 'PNG', compress_level=6)
+    return buf.getvalue()
+
+
+def webp_supported():
+    return features.check('webp')
+
+
+class TileCache:
+    """(원본 해시, 줌, 타일, 포맷) → 이미지 바이트 디스크 캐시"""
+
+    def __init__(self, event_cache, cache_dir=CACHE_DIR):
+        self.event_cache = event_cache
+        self.cache_dir = Path(cache_dir)
+
+    def info(self, path):
+        index = self.event_cache.time_index(path)
+        return dict(layout(index.duration_ms), digest=self.event_cache.source_hash(Path(path)))
+
+    def get(self, path, zoom, tile, fmt='png'):
+        """원본 경로 → (이미지 바이트, 캐시 키). 범위를 벗어나면 TileError"""
+        digest = self.event_cache.source_hash(Path(path))
+        key = f'{digest}.z{zoom}.{tile}.v{FORMAT_VERSION}'
+        target = self.cache_dir / digest[:2] / f'{key}.{fmt}'
+        try:
+            data = target.read_bytes()
+        except FileNotFoundError:
+            metrics.cache_event('piano_roll', False)
+        else:
+            metrics.cache_event('piano_roll', True)
+            return data, key
+
+        index = self.event_cache.time_index(path)
+        data = encode_image(render(index, zoom, tile), fmt)
+        _write_atomic(target, data)
+        return data, key
+
+
+def build_overviews(root=MAESTRO_ROOT, cache_dir=CACHE_DIR, fmt='png'):
+    """MAESTRO 전체 개요 타일 미리 생성 (작곡가 페이지 썸네일)"""
+    tiles = TileCache(EventCache(), cache_dir)
+    files = sorted(Path(root).rglob('*.mid*'))
+    print(f"Rendering overview tiles for {len(files)} MIDI files from {root}")
+    t0 = time.time()
+    total = 0
+    for i, f in enumerate(files, 1):
+        try:
+            data, _ = tiles.get(f, OVERVIEW, 0, fmt)
+        except (OSError, smf.MidiFormatError, IndexError) as e:
+            print(f"  [ERROR] {f}: {e}")
+            continue
+        total += len(data)
+        if i % 100 == 0:
+            print(f"  [{i}/{len(files)}]")
+    print(f"[OK] {len(files)} files in {time.time() - t0:.1f}s, {total / 1e6:.1f} MB tiles")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Piano-roll preview tiles')
+    parser.add_argument('midi', nargs='?', type=Path, help='MIDI 파일 (없으면 MAESTRO 전체 개요 생성)')
+    parser.add_argument('-z', '--zoom', type=int, default=OVERVIEW)
+    parser.add_argument('-t', '--tile', type=int, default=0)
+    parser.add_argument('-o', '--output', type=Path)
+    parser.add_argument('--root', type=Path, default=MAESTRO_ROOT)
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='png')
+    args = parser.parse_args()
+
+    if args.midi is None:
+        build_overviews(args.root, args.cache_dir, args.format)
+    else:
+        index = EventCache().time_index(args.midi)
+        start = time.perf_counter()
+        pixels = render(index, args.zoom, args.tile)
+        elapsed = (time.perf_counter() - start) * 1000
+        output = args.output or args.midi.with_suffix(f'.z{args.zoom}.{args.tile}.{args.format}')
+        output.write_bytes(encode_image(pixels, args.format))
+        print(f"{output} ({pixels.shape[1]}x{pixels.shape[0]}, rendered in {elapsed:.1f}ms)")
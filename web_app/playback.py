@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+서버 스트리밍 재생 (Server-Sent Events)
+    MAESTRO / MusicRoot 곡의 노트 이벤트를 작은 선행 구간(lookahead) 단위로 잘라
+    세션 시계 기준 시각(ms)을 붙여 보낸다. 클라이언트는 받은 이벤트만 예약하면 된다.
+
+    일시정지 / 탐색 / 정지는 별도 POST 제어 메시지로 바꾸며, 바뀔 때마다 epoch가 올라간다.
+    클라이언트는 epoch가 바뀌면 예약해 둔 이벤트를 취소하고(울리는 음/페달 끔) 새로 받은 것만 재생한다.
+    템포 변경은 epoch를 두고 retime만 올린다: 현재 위치(cursor 번째 이벤트)부터 새 시각으로 다시 보내고,
+    클라이언트는 아직 내보내지 않은 cursor 이후 이벤트만 바꿔 넣는다 (울리는 음은 그대로).
+
+메시지 (event: 이름 / data: JSON)
+    state  {epoch, retime, cursor, now, tempo, paused, position, duration}  시작 + 제어 메시지 적용 시
+    notes  {epoch, retime, index, now, at[], type[], pitch[], vel[], dur[]}  index = 첫 이벤트 번호,
+           at/dur는 세션 시계 ms
+    end    {epoch, now}  마지막 이벤트까지 보낸 뒤 곡이 끝났을 때
+"""
+
+import bisect
+import json
+import threading
+import time
+import uuid
+
+TEMPO_RANGE = (0.25, 4.0)
+
+
+class PlaybackError(ValueError):
+    """잘못된 제어 메시지"""
+
+
+class PlaybackSession:
+    """TimeIndex 하나를 세션 시계에 맞춰 재생하는 상태 (점수 시간 ↔ 세션 시계 변환)"""
+
+    def __init__(self, index, tempo=1.0, position_ms=0, lookahead_ms=1500, interval_ms=250):
+        self.id = uuid.uuid4().hex[:16]
+        self.index = index
+        self.events = index.events
+        self.duration_ms = index.duration_ms
+        self.lookahead_ms = lookahead_ms
+        self.interval_ms = interval_ms
+        self.created = time.monotonic()
+        self.last_seen = self.created
+
+        self._cond = threading.Condition()
+        self.epoch = 0
+        self.retime = 0
+        self.tempo = _clamp_tempo(tempo)
+        self.paused = False
+        self.closed = False
+        self.started = False  # 첫 스트림이 붙을 때 재생 시작
+        self.streams = 0
+        # 기준점: 세션 시계 anchor_clock일 때 곡 위치 anchor_pos (둘 다 ms)
+        self.anchor_pos = min(max(0, position_ms), self.duration_ms)
+        self.anchor_clock = self.clock()
+        self.cursor = bisect.bisect_left(self.index.t, self.anchor_pos)
+        self._state_sent = None
+
+    def clock(self):
+        """세션 시계 (생성 시점부터 ms)"""
+        return (time.monotonic() - self.created) * 1000.0
+
+    def position_at(self, now):
+        if self.paused or not self.started:
+            return self.anchor_pos
+        return min(self.anchor_pos + (now - self.anchor_clock) * self.tempo, self.duration_ms)
+
+    def clock_at(self, pos):
+        return self.anchor_clock + (pos - self.anchor_pos) / self.tempo
+
+    # ---------- Control ----------
+    def control(self, action, value=None):
+        """tempo(배율) / pause / resume / seek(초) / stop 적용 → 현재 상태"""
+        with self._cond:
+            now = self.clock()
+            pos = self.position_at(now)
+            if action == 'tempo':
+                try:
+                    tempo = _clamp_tempo(float(value))
+                except (TypeError, ValueError):
+                    raise PlaybackError('tempo must be a number') from None
+                if tempo == self.tempo:
+                    return self._state(now)
+                # 재생은 끊지 않고 현재 위치부터 새 템포로 다시 보낸다
+                self.anchor_pos, self.anchor_clock = pos, now
+                self.tempo = tempo
+                self.cursor = bisect.bisect_left(self.index.t, pos)
+                self.retime += 1
+                self._cond.notify_all()
+                return self._state(now)
+            elif action == 'pause':
+                if self.paused:
+                    return self._state(now)
+                self.paused = True
+            elif action == 'resume':
+                if not self.paused:
+                    return self._state(now)
+                self.paused = False
+            elif action == 'seek':
+                try:
+                    pos = min(max(0.0, float(value) * 1000), self.duration_ms)
+                except (TypeError, ValueError):
+                    raise PlaybackError('seek position must be a number (seconds)') from None
+            elif action == 'stop':
+                self.closed = True
+            else:
+                raise PlaybackError(f'Unknown action: {action}')
+
+            # 기준점을 현재로 옮기고, 이미 보낸 선행 구간은 새 epoch로 다시 보낸다
+            self.anchor_pos, self.anchor_clock = pos, now
+            self.cursor = bisect.bisect_left(self.index.t, pos)
+            self.epoch += 1
+            self._cond.notify_all()
+            return self._state(now)
+
+    def _state(self, now):
+        return {'epoch': self.epoch, 'retime': self.retime, 'cursor': self.cursor,
+                'now': round(now, 1), 'tempo': self.tempo, 'paused': self.paused,
+                'position': round(self.position_at(now) / 1000, 3), 'duration': self.duration_ms / 1000}
+
+    def _next_batch(self, now):
+        """[cursor, 현재 위치 + lookahead) 구간 이벤트를 세션 시계 기준으로 변환"""
+        if self.paused:
+            return None
+        horizon = self.position_at(now) + self.lookahead_ms * self.tempo
+        lo = self.cursor
+        hi = bisect.bisect_left(self.index.t, horizon, lo=lo)
+        if hi == lo:
+            return None
+        self.cursor = hi
+        ev = self.events
+        return {
+            'epoch': self.epoch,
+            'retime': self.retime,
+            'index': lo,
+            'now': round(now, 1),
+            'at': [round(self.clock_at(t), 1) for t in self.index.t[lo:hi]],
+            'type': ev['type'][lo:hi],
+            'pitch': ev['pitch'][lo:hi],
+            'vel': ev['vel'][lo:hi],
+            'dur': [round(d / self.tempo, 1) for d in ev['dur'][lo:hi]],
+        }
+
+    # ---------- Stream ----------
+    def stream(self, keepalive=10.0):
+        """SSE 본문 생성기 (제어 메시지가 오면 즉시 깨어나 다음 구간을 보낸다)"""
+        with self._cond:
+            if not self.started:
+                self.started = True
+                self.anchor_clock = self.clock()
+            self.streams += 1
+            self._state_sent = None
+        try:
+            yield 'retry: 2000\n\n'
+            last_write = time.monotonic()
+            ended = None
+            while True:
+                messages = []
+                with self._cond:
+                    if self.closed:
+                        break
+                    now = self.clock()
+                    if self._state_sent != (self.epoch, self.retime):
+                        self._state_sent = (self.epoch, self.retime)
+                        messages.append(('state', self._state(now)))
+                    batch = self._next_batch(now)
+                    if batch is not None:
+                        messages.append(('notes', batch))
+                    finished = (not self.paused and self.cursor >= len(self.index.t)
+                                and self.position_at(now) >= self.duration_ms)
+                    if finished and ended != self.epoch:
+                        ended = self.epoch
+                        messages.append(('end', {'epoch': self.epoch, 'now': round(now, 1)}))
+                    version, paused = (self.epoch, self.retime), self.paused
+
+                if messages:
+                    yield ''.join(_sse(name, body) for name, body in messages)
+                    last_write = time.monotonic()
+                elif time.monotonic() - last_write >= keepalive:
+                    # 끊긴 연결 감지 + 프록시 유휴 타임아웃 방지
+                    yield ': ping\n\n'
+                    last_write = time.monotonic()
+
+                # 끝났거나 일시정지 중이면 다음 제어 메시지(seek/resume)까지 대기
+                timeout = keepalive if finished or paused else self.interval_ms / 1000
+                with self._cond:
+                    self._cond.wait_for(lambda: self.closed or (self.epoch, self.retime) != version,
+                                        timeout=timeout)
+        finally:
+            with self._cond:
+                self.streams -= 1
+                self.last_seen = time.monotonic()
+
+
+class PlaybackHub:
+    """재생 세션 레지스트리 (스트림이 붙어 있지 않은 채 idle_timeout이 지나면 제거)"""
+
+    def __init__(self, max_sessions=32, idle_timeout=120.0, **session_options):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.session_options = session_options
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def _expire_locked(self):
+        now = time.monotonic()
+        for sid, s in list(self._sessions.items()):
+            if s.closed or (s.streams == 0 and now - s.last_seen > self.idle_timeout):
+                del self._sessions[sid]
+
+    def create(self, index, tempo=1.0, position_ms=0):
+        session = PlaybackSession(index, tempo, position_ms, **self.session_options)
+        with self._lock:
+            self._expire_locked()
+            if len(self._sessions) >= self.max_sessions:
+                return None
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, sid):
+        with self._lock:
+            session = self._sessions.get(sid)
+        if session is not None:
+            session.last_seen = time.monotonic()
+        return session
+
+    def remove(self, sid):
+        with self._lock:
+            session = self._sessions.pop(sid, None)
+        if session is not None:
+            session.control('stop')
+        return session is not None
+
+    def close(self):
+        """모든 세션 종료 (서버 종료 시 열린 스트림을 바로 끝낸다)"""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.control('stop')
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def _clamp_tempo(tempo):
+    if tempo != tempo:  # NaN
+        raise PlaybackError('tempo must be a number')
+    return min(max(tempo, TEMPO_RANGE[0]), TEMPO_RANGE[1])
+
+
+def _sse(name, body):
+    return f'event: {name}\ndata: {json.dumps(body, separators=(",", ":"))}\n\n'
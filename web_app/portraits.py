@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+작곡가 초상화 로컬 미러 (composer_info.json의 Wikipedia 썸네일)
+    원본을 한 번 내려받아 web_app/cache/portraits/src 에 두고, 프로세스 풀에서 폭별(WIDTHS)
+    WebP + JPEG 변형을 만든다. 변형 파일 이름은 내용 해시라서 서버는 /portraits/<파일>을
+    immutable 캐시로 제공하고, 한 번 빌드하면 인터넷 없이도 초상화가 보인다.
+
+    각 작곡가 항목에는 'portrait': {'version', 'source', 'variants': [[폭, webp, jpg], ...]} 가 붙는다.
+    image_url이 같고 파일이 모두 있으면 다시 받거나 다시 만들지 않는다.
+
+실행: python ../fetch_composer_info.py         → 정보 수집 후 초상화 미러까지 (내려받기 포함)
+      python portraits.py                       → 이미 받은 원본으로 변형만 다시 생성 (오프라인)
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+
+from PIL import Image, ImageOps, features
+
+from maestro_events import _write_atomic
+
+PORTRAIT_VERSION = 1
+WIDTHS = (128, 256, 512)  # 목록 카드(120px)/상세(250px)의 1x, 2x
+BACKGROUND = (42, 42, 62)  # 투명 배경은 자리 표시자 색으로 채운다
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+BASE_DIR = Path(__file__).parent
+PORTRAIT_DIR = Path(os.environ.get('PIANO_CACHE_DIR', BASE_DIR / 'cache')) / 'portraits'
+COMPOSER_INFO = BASE_DIR / 'static' / 'data' / 'composer_info.json'
+
+
+def source_path(out_dir, url):
+    """원본 보관 위치 (URL 해시)"""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return Path(out_dir) / 'src' / key[:2] / key
+
+
+def _store(out_dir, data, suffix):
+    """내용 해시 파일명으로 저장 (이미 있으면 그대로) → 파일 이름"""
+    name = hashlib.sha1(data).hexdigest()[:20] + suffix
+    path = Path(out_dir) / name
+    if not path.exists():
+        _write_atomic(path, data)
+    return name
+
+
+def build_variants(src, out_dir):
+    """워커: 원본 이미지 → [[폭, webp 파일, jpg 파일], ...] (원본보다 큰 폭은 만들지 않는다)"""
+    with Image.open(src) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            flat = Image.new('RGB', image.size, BACKGROUND)
+            flat.paste(image, mask=image.getchannel('A'))
+            image = flat
+        else:
+            image = image.convert('RGB')
+
+    widths = [w for w in WIDTHS if w <= image.width] or [image.width]
+    webp_ok = features.check('webp')
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        webp, jpg = io.BytesIO(), io.BytesIO()
+        resized.save(jpg, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        if webp_ok:  # WebP 없이 빌드된 Pillow면 JPEG만 (webp 자리는 None)
+            resized.save(webp, 'WEBP', quality=WEBP_QUALITY, method=6)
+        variants.append([width, _store(out_dir, webp.getvalue(), '.webp') if webp_ok else None,
+                         _store(out_dir, jpg.getvalue(), '.jpg')])
+    return variants
+
+
+def _build_job(name, src, out_dir):
+    try:
+        return name, build_variants(src, out_dir), ''
+    except (OSError, ValueError) as e:  # PIL.UnidentifiedImageError는 OSError
+        return name, None, str(e)
+
+
+def is_current(info, out_dir):
+    """항목의 portrait가 지금 image_url/버전으로 만든 것이고 파일이 모두 남아 있는지"""
+    portrait = info.get('portrait') or {}
+    if portrait.get('version') != PORTRAIT_VERSION or portrait.get('source') != info.get('image_url'):
+        return False
+    return all((Path(out_dir) / f).exists()
+               for _, webp, jpg in portrait.get('variants', []) for f in (webp, jpg) if f)
+
+
+def mirror(records, fetch=None, out_dir=PORTRAIT_DIR, workers=None, force=False):
+    """records(composer_info dict)의 초상화를 미러링하고 항목에 portrait를 채운다 → 통계 dict
+
+    fetch(url) → bytes 는 원본이 없을 때만 스레드로 호출한다 (None이면 받아 둔 원본만 사용)
+    """
+    out_dir = Path(out_dir)
+    with_image = [name for name, info in records.items() if info.get('image_url')]
+    todo = [name for name in with_image if force or not is_current(records[name], out_dir)]
+    counts = {'downloaded': 0, 'built': 0, 'current': len(with_image) - len(todo), 'missing': 0, 'error': 0}
+    t0 = time.perf_counter()
+
+    # 1. 원본 내려받기 (I/O - 스레드)
+    def download(name):
+        url = records[name]['image_url']
+        src = source_path(out_dir, url)
+        if src.exists():
+            return src, 'cached'
+        if fetch is None:
+            return None, 'missing'
+        try:
+            _write_atomic(src, fetch(url))
+        except Exception as e:  # fetch 구현(requests 등)에 따라 예외 종류가 다르다
+            print(f"  [ERROR] {name}: {e}")
+            return None, 'error'
+        return src, 'downloaded'
+
+    sources = {}
+    with ThreadPoolExecutor(max_workers=workers or 4) as pool:
+        for name, (src, status) in zip(todo, pool.map(download, todo)):
+            if status in counts:
+                counts[status] += 1
+            if src is not None:
+                sources[name] = src
+
+    # 2. 변형 생성 (CPU - 프로세스 풀)
+    if sources:
+        workers = min(workers or os.cpu_count() or 1, len(sources))
+        # spawn: 서버와 같은 방식 (fork하면 listen 소켓을 물려받는다)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_build_job, name, str(src), str(out_dir)) for name, src in sources.items()]
+            for future in as_completed(futures):
+                name, variants, message = future.result()
+                if variants is None:
+                    counts['error'] += 1
+                    print(f"  [ERROR] {name}: {message}")
+                    continue
+                counts['built'] += 1
+                records[name]['portrait'] = {
+                    'version': PORTRAIT_VERSION,
+                    'source': records[name]['image_url'],
+                    'variants': variants,
+                }
+
+    elapsed = time.perf_counter() - t0
+    print(f"[OK] Portraits: {counts['built']} built ({counts['downloaded']} downloaded), "
+          f"{counts['current']} up to date, {counts['missing']} not downloaded, "
+          f"{counts['error']} failed in {elapsed:.1f}s")
+    return dict(counts, seconds=round(elapsed, 3))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild composer portrait variants from mirrored originals')
+    parser.add_argument('--info', type=Path, default=COMPOSER_INFO)
+    parser.add_argument('--out', type=Path, default=PORTRAIT_DIR)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='변형 모두 다시 생성')
+    args = parser.parse_args()
+
+    records = json.loads(args.info.read_text(encoding='utf-8'))
+    stats = mirror(records, None, args.out, args.workers, args.force)
+    if stats['built']:
+        _write_atomic(args.info, json.dumps(records, ensure_ascii=False, indent=2).encode('utf-8'))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+코드 진행 테이블 - progression.CSV를 미리 토큰화하고 chord.CSV로 피치 클래스를 해석해 둔다
+/api/progressions/* 에서 진행 하나만 응답하기 위한 인덱스
+"""
+
+import bisect
+import random
+import threading
+
+# airpiano_gui.py 와 같은 태그 규칙
+POLY_TAGS = {'1', '2', '3', '4', '5', '6', '7', 'T', 'L'}
+LEGACY_TO_T = {'2', '4', '6'}
+MAX_STEPS = 32
+
+NAME2PC = {
+    'C': 0, 'B#': 0, 'C#': 1, 'Db': 1, 'D': 2, 'D#': 3, 'Eb': 3, 'E': 4, 'Fb': 4,
+    'F': 5, 'E#': 5, 'F#': 6, 'Gb': 6, 'G': 7, 'G#': 8, 'Ab': 8, 'A': 9, 'A#': 10, 'Bb': 10, 'B': 11, 'Cb': 11
+}
+
+
+def norm_tag(x):
+    s = (x or '').strip().upper()
+    return 'T' if s in LEGACY_TO_T else s
+
+
+def parse_chords(rows):
+    """chord.CSV 행 → {코드 이름: (허용 pcs, 근음 pc)}"""
+    chords = {}
+    for row in rows:
+        if len(row) < 13:
+            continue
+        name = row[0].strip()
+        if not name or name == 'nan' or name in chords:
+            continue
+        tags = [norm_tag(t) for t in row[1:13]]
+        pcs = [pc for pc, tag in enumerate(tags) if tag in POLY_TAGS]
+        root = next((pc for pc, tag in enumerate(tags) if tag == '1'), None)
+        chords[name] = (pcs, root)
+    return chords
+
+
+class ProgressionTable:
+    """토큰화 + 코드 해석이 끝난 불변 진행 테이블"""
+
+    def __init__(self, chord_rows, prog_rows):
+        self.chords = parse_chords(chord_rows)
+        self.items = {}          # id -> 응답 dict
+        self.by_chord = {}       # 코드 토큰/기본 이름 -> {id}
+        self.by_length = {}      # 길이 -> {id}
+        self.unknown = set()     # chord.CSV에 없는 코드
+
+        names = []
+        resolved = {}
+        for i, row in enumerate(prog_rows):
+            if not row:
+                continue
+            name = row[0].strip() or f'Row{i}'
+            seq = [x.strip() for x in row[1:MAX_STEPS + 1] if x.strip() and x.strip().lower() != 'nan']
+            if not seq:
+                continue
+            steps = []
+            for token in seq:
+                if token not in resolved:
+                    resolved[token] = self._resolve(token)
+                steps.append(resolved[token])
+                self.by_chord.setdefault(token, set()).add(i)
+                self.by_chord.setdefault(token.split('/', 1)[0], set()).add(i)
+            self.items[i] = {'id': i, 'name': name, 'length': len(seq), 'seq': seq, 'steps': steps}
+            self.by_length.setdefault(len(seq), set()).add(i)
+            names.append((name.casefold(), i))
+
+        names.sort()
+        self._names = names
+        self._name_keys = [n for n, _ in names]
+        self.ids = sorted(self.items)
+
+    def _resolve(self, token):
+        base, _, slash = token.partition('/')
+        entry = self.chords.get(base.strip())
+        if entry is None:
+            self.unknown.add(token)
+            return {'chord': token, 'pcs': [], 'bass': None, 'known': False}
+        pcs, root = entry
+        bass = NAME2PC.get(slash.strip()) if slash else root
+        return {'chord': token, 'pcs': pcs, 'bass': bass, 'known': True}
+
+    def _prefix_ids(self, prefix):
+        key = prefix.casefold()
+        lo = bisect.bisect_left(self._name_keys, key)
+        hi = bisect.bisect_left(self._name_keys, key + '\U0010ffff')
+        return {i for _, i in self._names[lo:hi]}
+
+    def query(self, length=None, min_length=None, max_length=None, prefix=None, chords=None):
+        """조건에 맞는 진행 id 목록 (정렬)"""
+        sets = []
+        if length is not None:
+            sets.append(self.by_length.get(length, set()))
+        elif min_length is not None or max_length is not None:
+            lo = min_length if min_length is not None else 0
+            hi = max_length if max_length is not None else MAX_STEPS
+            sets.append(set().union(*(ids for n, ids in self.by_length.items() if lo <= n <= hi)))
+        if prefix:
+            sets.append(self._prefix_ids(prefix))
+        for chord in chords or ():
+            sets.append(self.by_chord.get(chord, set()))
+        if not sets:
+            return self.ids
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+    def random(self, rng=random, **filters):
+        ids = self.query(**filters)
+        return self.items[rng.choice(ids)] if ids else None
+
+
+class ProgressionStore:
+    """DataStore의 chord/progression 스냅샷이 바뀔 때만 ProgressionTable 재구축"""
+
+    def __init__(self, data_store, chords='chords', progressions='progressions'):
+        self.data_store = data_store
+        self.names = (chords, progressions)
+        self._lock = threading.Lock()
+        self._key = None
+        self._table = None
+
+    def get(self):
+        chord_asset = self.data_store.get(self.names[0])
+        prog_asset = self.data_store.get(self.names[1])
+        if chord_asset is None or prog_asset is None:
+            return None
+        key = (chord_asset.etag, prog_asset.etag)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    table = ProgressionTable(chord_asset.value, prog_asset.value)
+                    if table.unknown:
+                        print(f"[Progressions] Unknown chords: {sorted(table.unknown)}")
+                    self._table, self._key = table, key
+        return self._table
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+클래식 라이브러리 검색 인덱스
+작곡가 이름 / 곡 제목 / 연도 / 작품 번호(Op., BWV, K. ...)에 대한 역색인 + 트라이그램 인덱스
+접두어 검색(입력 중인 마지막 단어)과 오타 허용 검색을 지원한다
+"""
+
+from collections import OrderedDict
+import bisect
+import re
+import threading
+import unicodedata
+
+import metrics
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+# "Op. 28" → op28, "BWV 846" → bwv846 처럼 작품 번호를 한 토큰으로도 색인
+CATALOG_PREFIXES = {'op', 'no', 'nos', 'bwv', 'k', 'kv', 'd', 'hob', 's', 'l', 'woo', 'sz', 'm'}
+
+FIELD_WEIGHTS = {'composer': 3.0, 'title': 2.0, 'year': 1.0}
+MATCH_EXACT, MATCH_PREFIX, MATCH_FUZZY = 1.0, 0.8, 0.6
+
+
+def normalize(text):
+    """소문자 + 악센트 제거 (Dvořák → dvorak)"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    tokens = _TOKEN_RE.findall(normalize(text))
+    combined = [a + b for a, b in zip(tokens, tokens[1:]) if a in CATALOG_PREFIXES and b.isdigit()]
+    return tokens + combined
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """인접 글자 바꿈을 1로 세는 편집 거리 (limit를 넘으면 limit + 1)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], before[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+def typo_limit(token):
+    if len(token) <= 3 or token.isdigit():
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+
+class SearchIndex:
+    """composers.json 에서 만든 불변 검색 인덱스"""
+
+    def __init__(self, composers, cache_size=256):
+        self.docs = []
+        self.lengths = []    # 동점일 때 짧은 문서(더 정확한 매칭) 우선
+        self.postings = {}   # token -> {doc_id: field weight}
+        for name, entry in composers.items():
+            self._add({'type': 'composer', 'composer': name,
+                       'piece_count': entry.get('piece_count', len(entry.get('pieces', [])))},
+                      {'composer': name})
+            for p in entry.get('pieces', []):
+                self._add({'type': 'piece', 'composer': name, 'title': p['title'],
+                           'year': p.get('year', ''), 'duration': p.get('duration'),
+                           'midi_file': p['midi_file']},
+                          {'composer': name, 'title': p['title'], 'year': str(p.get('year', ''))})
+
+        self.vocab = sorted(self.postings)
+        self.grams = {}
+        for token in self.vocab:
+            for g in trigrams(token):
+                self.grams.setdefault(g, []).append(token)
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _add(self, doc, fields):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.lengths.append(sum(len(text) for text in fields.values()))
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                post = self.postings.setdefault(token, {})
+                post[doc_id] = max(post.get(doc_id, 0.0), weight)
+
+    # ---------- Term expansion ----------
+    def _prefix_terms(self, token):
+        lo = bisect.bisect_left(self.vocab, token)
+        hi = bisect.bisect_left(self.vocab, token + '\x7f')
+        return self.vocab[lo:hi]
+
+    def _fuzzy_terms(self, token):
+        limit = typo_limit(token)
+        if limit == 0:
+            return []
+        counts = {}
+        for g in trigrams(token):
+            for term in self.grams.get(g, ()):
+                counts[term] = counts.get(term, 0) + 1
+        # 트라이그램을 충분히 공유하는 후보만 거리 계산
+        need = max(1, len(trigrams(token)) - 4 * limit)
+        out = []
+        for term, shared in counts.items():
+            if shared >= need and term != token:
+                d = edit_distance(token, term, limit)
+                if d <= limit:
+                    out.append((term, d))
+        return out
+
+    def _expand(self, token, is_last):
+        """질의 토큰 → {색인 토큰: 매칭 가중치}"""
+        terms = {}
+        if token in self.postings:
+            terms[token] = MATCH_EXACT
+        if is_last:
+            for term in self._prefix_terms(token):
+                terms.setdefault(term, MATCH_PREFIX)
+        if not terms:
+            for term, d in self._fuzzy_terms(token):
+                terms[term] = max(terms.get(term, 0.0), MATCH_FUZZY - 0.1 * (d - 1))
+        return terms
+
+    # ---------- Query ----------
+    def _rank(self, query):
+        # 작품 번호 결합 토큰은 원래 토큰과 중복되므로 질의에서는 순수 토큰만 사용
+        tokens = _TOKEN_RE.findall(normalize(query))
+        if not tokens:
+            return []
+        scores = None
+        for i, token in enumerate(tokens):
+            per_doc = {}
+            for term, match in self._expand(token, i == len(tokens) - 1).items():
+                for doc_id, weight in self.postings[term].items():
+                    s = match * weight
+                    if s > per_doc.get(doc_id, 0.0):
+                        per_doc[doc_id] = s
+            if scores is None:
+                scores = per_doc
+            else:
+                # 모든 질의 토큰이 매칭되는 문서만 (AND)
+                scores = {d: scores[d] + s for d, s in per_doc.items() if d in scores}
+            if not scores:
+                return []
+        return sorted(scores.items(),
+                      key=lambda kv: (-kv[1], self.docs[kv[0]]['type'] != 'composer',
+                                     self.lengths[kv[0]], kv[0]))
+
+    def search(self, query, page=1, per_page=20):
+        key = ' '.join(_TOKEN_RE.findall(normalize(query)))
+        with self._lock:
+            ranked = self._cache.get(key)
+            if ranked is not None:
+                self._cache.move_to_end(key)
+        metrics.cache_event('search', ranked is not None)
+        if ranked is None:
+            ranked = self._rank(key)
+            with self._lock:
+                self._cache[key] = ranked
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        start = (page - 1) * per_page
+        results = [dict(self.docs[d], score=round(s, 3)) for d, s in ranked[start:start + per_page]]
+        return {'total': len(ranked), 'page': page, 'per_page': per_page, 'results': results}
+
+
+class SearchStore:
+    """DataStore의 composers 스냅샷이 바뀔 때만 SearchIndex 재구축"""
+
+    def __init__(self, data_store, name='composers'):
+        self.data_store = data_store
+        self.name = name
+        self._lock = threading.Lock()
+        self._key = None
+        self._index = None
+
+    def get(self):
+        asset = self.data_store.get(self.name)
+        if asset is None:
+            return None
+        if asset.etag != self._key:
+            with self._lock:
+                if asset.etag != self._key:
+                    self._index, self._key = SearchIndex(asset.value.composers), asset.etag
+        return self._index
@@ -0,0 +1,2 @@
+call conda activate piano-games
+python serve.py
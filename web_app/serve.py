@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Piano Games Web App - 프로덕션 서버
+waitress 멀티스레드 WSGI 서버로 실행 (debug/reloader 없음)
+
+사용법:
+    python serve.py                              # 0.0.0.0:5000, 스레드 12개
+    python serve.py --bind 127.0.0.1:8000 --threads 16
+    python serve.py --midi-bridge 5001           # 하드웨어 MIDI 브리지 (WebSocket, 127.0.0.1:5001)
+환경 변수 PIANO_BIND, PIANO_THREADS, PIANO_STATIC_MAX_AGE, PIANO_MIDI_BRIDGE,
+PIANO_MIDI_BRIDGE_ORIGINS 로도 설정 가능
+"""
+
+import argparse
+import os
+import signal
+import sys
+
+from waitress import serve
+
+from app import app, compose_service, playback_hub
+from midi_bridge import DEFAULT_HOST, BridgeError, BridgeServer, MidiBridge, web_origins
+
+
+def parse_bind(value):
+    host, _, port = value.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+def start_midi_bridge(bind, port_name=None, origins=None):
+    """MIDI 브리지 시작 (출력 포트가 없으면 경고만 하고 웹 서버는 그대로 실행)
+    bind에 호스트가 없으면 127.0.0.1, origins는 핸드셰이크를 받을 웹 페이지 Origin 목록
+    """
+    host, _, port = str(bind).rpartition(':')
+    try:
+        bridge = MidiBridge(port_name=port_name).start()
+    except BridgeError as e:
+        print(f"MIDI bridge disabled: {e}")
+        return None
+    server = BridgeServer(bridge, host or DEFAULT_HOST, int(port), origins).start()
+    app.config['MIDI_BRIDGE'] = server
+    print(f"MIDI bridge: ws://{host or DEFAULT_HOST}:{port} → {bridge.port_name}")
+    print(f"MIDI bridge origins: {', '.join(sorted(server.origins))}")
+    return server
+
+
+def reserved_threads():
+    """재생 스트림이 쓰면 안 되는 스레드 수: 작곡 대기(max_pending) + 페이지/API/metrics 2개"""
+    return compose_service.max_pending + 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Piano Games production server')
+    parser.add_argument('--bind', default=os.environ.get('PIANO_BIND', '0.0.0.0:5000'),
+                        help='host:port (기본값 0.0.0.0:5000)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('PIANO_THREADS', 12)),
+                        help='워커 스레드 수 (기본값 12)')
+    parser.add_argument('--connection-limit', type=int, default=200,
+                        help='동시 연결 수 제한 (기본값 200)')
+    parser.add_argument('--static-max-age', type=int,
+                        default=int(os.environ.get('PIANO_STATIC_MAX_AGE', 3600)),
+                        help='/static 파일 Cache-Control max-age (초, 기본값 3600)')
+    parser.add_argument('--midi-bridge', default=os.environ.get('PIANO_MIDI_BRIDGE'),
+                        help=f'MIDI 브리지 WebSocket [host:]port (기본값 비활성화, 호스트 생략 시 {DEFAULT_HOST})')
+    parser.add_argument('--midi-bridge-origins', default=os.environ.get('PIANO_MIDI_BRIDGE_ORIGINS'),
+                        help='MIDI 브리지에 연결할 수 있는 웹 페이지 Origin (쉼표 구분, '
+                             '기본값 http://localhost:<포트>, http://127.0.0.1:<포트>)')
+    parser.add_argument('--midi-port', default=os.environ.get('PIANO_MIDI_PORT'),
+                        help='MIDI 브리지 출력 포트 이름 (기본값 PREFERRED_OUT_PORTS 순서)')
+    args = parser.parse_args()
+
+    host, port = parse_bind(args.bind)
+    # SSE 재생 스트림은 끝날 때까지 스레드를 잡고 있으므로 세션 수를 스레드 수 아래로 묶는다
+    reserved = reserved_threads()
+    if args.threads <= reserved:
+        parser.error(f'--threads must be greater than {reserved} '
+                     f'(compose requests + pages/API need {reserved} threads besides playback streams)')
+    if playback_hub.max_sessions > args.threads - reserved:
+        print(f"PIANO_PLAYBACK_SESSIONS={playback_hub.max_sessions} leaves too few threads; "
+              f"limiting playback sessions to {args.threads - reserved}")
+        playback_hub.max_sessions = args.threads - reserved
+    app.debug = False
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = args.static_max_age
+
+    print("=" * 50)
+    print("Piano Games Web App (production)")
+    print("=" * 50)
+    print(f"Listening on http://{host}:{port}  (threads={args.threads}, playback sessions={playback_hub.max_sessions})")
+    bridge_server = None
+    if args.midi_bridge:
+        bridge_server = start_midi_bridge(args.midi_bridge, args.midi_port,
+                                          args.midi_bridge_origins or web_origins(port))
+    print("=" * 50)
+    # SIGTERM도 정상 종료로 처리해 작곡 워커 프로세스를 함께 정리
+    # 재생 스트림은 먼저 끝내야 waitress가 스레드 종료를 기다리지 않는다
+    def terminate(*_):
+        playback_hub.close()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        serve(app, host=host, port=port, threads=args.threads,
+              connection_limit=args.connection_limit, ident='piano-games')
+    finally:
+        compose_service.shutdown()
+        if bridge_server is not None:
+            bridge_server.stop()
+
+
+if __name__ == '__main__':
+    main()
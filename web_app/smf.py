@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Standard MIDI File 최소 구현 (의존성 없음)
+서버에서 MIDI 메타데이터/이벤트를 읽기 위한 파서 + 생성/변환용 writer
+"""
+
+from collections import namedtuple
+from pathlib import Path
+import heapq
+import struct
+
+# status: 0x80-0xEF 채널 메시지, 0xF0/0xF7 sysex, 0xFF 메타
+# data: 데이터 바이트 (bytes), meta_type: 메타 이벤트 종류 (그 외 None)
+Event = namedtuple('Event', ['delta', 'status', 'data', 'meta_type'])
+
+META_TRACK_NAME = 0x03
+META_END_OF_TRACK = 0x2F
+META_TEMPO = 0x51
+DEFAULT_TEMPO = 500000  # 120 BPM (microseconds per beat)
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+CONTROL_CHANGE = 0xB0
+CC_SUSTAIN = 64
+
+# 채널 메시지별 데이터 바이트 수
+_DATA_LEN = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+
+class MidiFormatError(ValueError):
+    """MIDI 파일 형식 오류"""
+
+
+class MidiFile:
+    def __init__(self, fmt, division, tracks):
+        self.format = fmt
+        self.division = division
+        self.tracks = tracks
+
+    @property
+    def ticks_per_beat(self):
+        return self.division if self.division > 0 else None
+
+
+def _read_varlen(buf, pos):
+    value = 0
+    while True:
+        if pos >= len(buf):
+            raise MidiFormatError('Truncated variable-length quantity')
+        b = buf[pos]
+        pos += 1
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value, pos
+
+
+def _parse_track(buf):
+    events = []
+    pos = 0
+    running = None
+    end = len(buf)
+    while pos < end:
+        delta, pos = _read_varlen(buf, pos)
+        if pos >= end:
+            raise MidiFormatError('Truncated event')
+        status = buf[pos]
+        if status == 0xFF:
+            if pos + 1 >= end:
+                raise MidiFormatError('Truncated meta event')
+            meta_type = buf[pos + 1]
+            length, pos = _read_varlen(buf, pos + 2)
+            if pos + length > end:
+                raise MidiFormatError('Truncated meta event')
+            events.append(Event(delta, 0xFF, bytes(buf[pos:pos + length]), meta_type))
+            pos += length
+            if meta_type == META_END_OF_TRACK:
+                break
+            continue
+        if status in (0xF0, 0xF7):
+            length, pos = _read_varlen(buf, pos + 1)
+            if pos + length > end:
+                raise MidiFormatError('Truncated sysex event')
+            events.append(Event(delta, status, bytes(buf[pos:pos + length]), None))
+            pos += length
+            running = None
+            continue
+        if status & 0x80:
+            pos += 1
+            running = status
+        elif running is None:
+            raise MidiFormatError('Data byte without running status')
+        else:
+            status = running
+        n = _DATA_LEN.get(status & 0xF0)
+        if n is None:
+            raise MidiFormatError(f'Unsupported status byte 0x{status:02X}')
+        if pos + n > end:
+            raise MidiFormatError('Truncated channel event')
+        events.append(Event(delta, status, bytes(buf[pos:pos + n]), None))
+        pos += n
+    return events
+
+
+def _write_varlen(value):
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _serialize_track(events):
+    out = bytearray()
+    running = None
+    ended = False
+    for ev in events:
+        out += _write_varlen(ev.delta)
+        if ev.status == 0xFF:
+            out += bytes((0xFF, ev.meta_type)) + _write_varlen(len(ev.data)) + ev.data
+            running = None
+            if ev.meta_type == META_END_OF_TRACK:
+                ended = True
+                break
+        elif ev.status in (0xF0, 0xF7):
+            out += bytes((ev.status,)) + _write_varlen(len(ev.data)) + ev.data
+            running = None
+        else:
+            if ev.status != running:
+                out.append(ev.status)
+                running = ev.status
+            out += ev.data
+    if not ended:
+        out += b'\x00\xff\x2f\x00'
+    return bytes(out)
+
+
+def serialize(mf):
+    """MidiFile → bytes (running status 사용, End of Track 자동 추가)"""
+    chunks = [b'MThd', struct.pack('>IHHh', 6, mf.format, len(mf.tracks), mf.division)]
+    for events in mf.tracks:
+        body = _serialize_track(events)
+        chunks += [b'MTrk', struct.pack('>I', len(body)), body]
+    return b''.join(chunks)
+
+
+def write(mf, path):
+    Path(path).write_bytes(serialize(mf))
+
+
+def track_from_ticks(items):
+    """[(절대 tick, status, data bytes, meta_type)] → 델타 tick Event 리스트
+    tick 순 정렬, 같은 tick에서는 노트 오프를 먼저 둔다 (같은 음 재타건이 끊기지 않도록)
+    """
+    def order(it):
+        tick, status, data, _ = it
+        off = status < 0xF0 and ((status & 0xF0) == NOTE_OFF or ((status & 0xF0) == NOTE_ON and data[1] == 0))
+        return tick, not off
+
+    events = []
+    last = 0
+    for tick, status, data, meta_type in sorted(items, key=order):
+        events.append(Event(tick - last, status, bytes(data), meta_type))
+        last = tick
+    return events
+
+
+def tempo_event(bpm, delta=0):
+    us = round(60e6 / bpm)
+    return Event(delta, 0xFF, bytes(((us >> 16) & 0xFF, (us >> 8) & 0xFF, us & 0xFF)), META_TEMPO)
+
+
+def parse(data):
+    """bytes → MidiFile"""
+    if data[:4] != b'MThd':
+        raise MidiFormatError('Not a Standard MIDI File')
+    if len(data) < 14:
+        raise MidiFormatError('Truncated header chunk')
+    header_len = struct.unpack('>I', data[4:8])[0]
+    fmt, ntracks, division = struct.unpack('>HHh', data[8:14])
+    if header_len < 6:
+        raise MidiFormatError(f'Invalid header length {header_len}')
+    pos = 8 + header_len
+    tracks = []
+    while pos + 8 <= len(data) and len(tracks) < ntracks:
+        chunk_id = data[pos:pos + 4]
+        length = struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        body = data[pos + 8:pos + 8 + length]
+        pos += 8 + length
+        if chunk_id == b'MTrk':
+            tracks.append(_parse_track(body))
+    return MidiFile(fmt, division, tracks)
+
+
+def read(path):
+    """파일 경로 → MidiFile"""
+    return parse(Path(path).read_bytes())
+
+
+def merged(mf):
+    """모든 트랙을 절대 tick 순으로 병합: (tick, track_index, Event) 반복"""
+    def track_iter(idx, events):
+        tick = 0
+        for ev in events:
+            tick += ev.delta
+            yield tick, idx, ev
+
+    return heapq.merge(*(track_iter(i, t) for i, t in enumerate(mf.tracks)),
+                       key=lambda item: (item[0], item[1]))
+
+
+def timed(mf):
+    """템포 맵을 반영하여 (초, track_index, Event) 반복"""
+    if mf.division < 0:
+        # SMPTE: 상위 바이트 = -fps, 하위 바이트 = ticks per frame
+        fps = -(mf.division >> 8)
+        tpf = mf.division & 0xFF
+        sec_per_tick = 1.0 / (fps * tpf)
+        for tick, idx, ev in merged(mf):
+            yield tick * sec_per_tick, idx, ev
+        return
+
+    tpb = mf.division or 480
+    tempo = DEFAULT_TEMPO
+    last_tick = 0
+    seconds = 0.0
+    for tick, idx, ev in merged(mf):
+        seconds += (tick - last_tick) * tempo / (tpb * 1e6)
+        last_tick = tick
+        if ev.status == 0xFF and ev.meta_type == META_TEMPO and len(ev.data) == 3:
+            tempo = (ev.data[0] << 16) | (ev.data[1] << 8) | ev.data[2]
+        yield seconds, idx, ev
+
+
+def is_note_on(ev):
+    return (ev.status & 0xF0) == NOTE_ON and ev.status < 0xF0 and ev.data[1] > 0
+
+
+def is_note_off(ev):
+    kind = ev.status & 0xF0
+    return ev.status < 0xF0 and (kind == NOTE_OFF or (kind == NOTE_ON and ev.data[1] == 0))
+
+
+def summarize(mf):
+    """재생 시간, 트랙 수, 노트 수 요약"""
+    duration = 0.0
+    notes = 0
+    for seconds, _, ev in timed(mf):
+        duration = seconds
+        if is_note_on(ev):
+            notes += 1
+    return {
+        'duration': round(duration, 3),
+        'tracks': len(mf.tracks),
+        'notes': notes,
+    }
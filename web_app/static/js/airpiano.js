@@ -21,13 +21,6 @@ const FINGER_PRESS_DEG = 165;
 const FINGER_RELEASE_DEG = 175;
 const FINGER_COUNT = 5;
 
-// 음악 이론
-// NOTE_NAMES는 common.js에서 로드됨
-const NAME2PC = {
-    'C':0,'B#':0,'C#':1,'Db':1,'D':2,'D#':3,'Eb':3,'E':4,'Fb':4,
-    'F':5,'E#':5,'F#':6,'Gb':6,'G':7,'G#':8,'Ab':8,'A':9,'A#':10,'Bb':10,'B':11,'Cb':11
-};
-
 // 파티클 설정
 const MAX_PARTICLES = 140;
 const PARTICLE_LIFE = [0.8, 1.8];
@@ -39,9 +32,8 @@ const GRAVITY = 40.0;
 let isRunning = false;
 let isPaused = false;
 
-let chordTables = null;
-let progressions = [];
-let currentProgIdx = 0;
+let currentProg = null;   // { id, name, seq, steps: [{ chord, pcs, bass }] }
+let chordPCs = {};        // 현재 진행의 코드 이름 -> { pcs, bass }
 let currentStep = 0;
 let lastChord = '';
 let bassOnce = false;
@@ -81,18 +73,14 @@ window.addEventListener('load', async () => {
         populateMidiSelect(midiSelect, midiResult.outputs, midiResult.selected);
     }
 
-    // CSV 로드
-    await loadChordData();
-    await loadProgressionData();
-
-    if (progressions.length === 0) {
-        showError('progression.CSV를 로드할 수 없습니다.');
+    // 랜덤 progression 선택 (서버에서 코드 해석 완료된 진행 하나만 받음)
+    try {
+        await loadRandomProgression();
+    } catch (error) {
+        showError('코드 진행을 로드할 수 없습니다: ' + error.message);
         return;
     }
 
-    // 랜덤 progression 선택
-    currentProgIdx = Math.floor(Math.random() * progressions.length);
-
     // BPM 슬라이더
     document.getElementById('bpm').addEventListener('input', (e) => {
         BPM = parseInt(e.target.value);
@@ -122,90 +110,35 @@ function createHandState(label, channel, low, high) {
     };
 }
 
-// ============ CSV 로드 ============
+// ============ 코드 진행 로드 ============
 
-async function loadChordData() {
-    const result = await loadCSV('/static/data/chord.CSV');
-    if (!result.success) {
-        showError('chord.CSV 로드 실패');
-        return;
+async function loadRandomProgression() {
+    const response = await fetch('/api/progressions/random');
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
     }
+    currentProg = await response.json();
 
-    chordTables = {};
-    result.data.forEach(row => {
-        const chordName = row[0];
-        if (!chordName || chordName === 'nan') return;
-
-        const tags = {};
-        NOTE_NAMES.forEach((noteName, idx) => {
-            const tag = (row[idx + 1] || '').trim().toUpperCase();
-            tags[noteName] = tag;
-        });
-
-        chordTables[chordName] = tags;
+    chordPCs = {};
+    currentProg.steps.forEach(step => {
+        chordPCs[step.chord] = step;
     });
 
-    if (DEBUG) console.log('✅ Chord tables loaded:', Object.keys(chordTables).length);
-}
-
-async function loadProgressionData() {
-    const result = await loadCSV('/static/data/progression.CSV');
-    if (!result.success) {
-        showError('progression.CSV 로드 실패');
-        return;
-    }
-
-    result.data.forEach((row, i) => {
-        const name = row[0] || `Row${i}`;
-        const seq = row.slice(1, 33).filter(x => x && x !== 'nan');
-        if (seq.length > 0) {
-            progressions.push({ name, seq });
-        }
-    });
-
-    if (DEBUG) console.log('✅ Progressions loaded:', progressions.length);
+    if (DEBUG) console.log('✅ Progression loaded:', currentProg.name, currentProg.seq.slice(0, 4));
 }
 
 // ============ 음악 로직 ============
 
 function allowedPCs(chordName, mono, excludePC = null) {
-    if (!chordTables[chordName]) return [];
-
-    const tags = mono ? ['1','2','3','4','5','6','7','T','L'] : ['1','2','3','4','5','6','7','T','L'];
-    const forbid = ['A', ''];
-
-    const pcs = [];
-    NOTE_NAMES.forEach((noteName, pc) => {
-        const tag = chordTables[chordName][noteName];
-        if (forbid.includes(tag)) return;
-        if (tags.includes(tag) && (excludePC === null || pc !== excludePC)) {
-            pcs.push(pc);
-        }
-    });
-
-    return pcs;
+    // mono/poly 태그 집합이 같으므로 서버에서 해석한 pcs를 그대로 사용
+    const step = chordPCs[chordName];
+    if (!step) return [];
+    return step.pcs.filter(pc => excludePC === null || pc !== excludePC);
 }
 
 function bassPC(chordName) {
-    const parts = chordName.split('/');
-    const base = parts[0];
-
-    // Slash chord
-    if (parts[1]) {
-        return NAME2PC[parts[1]] || null;
-    }
-
-    // Root note
-    if (!chordTables[base]) return null;
-
-    for (let pc = 0; pc < 12; pc++) {
-        const noteName = NOTE_NAMES[pc];
-        if (chordTables[base][noteName] === '1') {
-            return pc;
-        }
-    }
-
-    return null;
+    const step = chordPCs[chordName];
+    return step ? step.bass : null;
 }
 
 function xToCenter(x, low, high) {
@@ -308,20 +241,25 @@ function togglePause() {
     }
 }
 
-function changeProgression() {
-    currentProgIdx = Math.floor(Math.random() * progressions.length);
+async function changeProgression() {
+    try {
+        await loadRandomProgression();
+    } catch (error) {
+        showError('코드 진행을 로드할 수 없습니다: ' + error.message);
+        return;
+    }
     currentStep = 0;
     lastChord = '';
     bassOnce = false;
-    showSuccess(`분위기 전환: ${progressions[currentProgIdx].name}`);
+    showSuccess(`분위기 전환: ${currentProg.name}`);
 }
 
 // ============ 비트 진행 ============
 
 function advanceStep() {
-    if (isPaused || !isRunning) return;
+    if (isPaused || !isRunning || !currentProg) return;
 
-    const seq = progressions[currentProgIdx].seq;
+    const seq = currentProg.seq;
     if (seq.length === 0) return;
 
     currentStep = (currentStep + 1) % seq.length;
@@ -370,7 +308,7 @@ function onHandsResults(results) {
     }
 
     // 코드 진행
-    const seq = progressions[currentProgIdx].seq;
+    const seq = currentProg.seq;
     const chord = seq[currentStep % seq.length];
     const chordChanged = chord !== lastChord;
 
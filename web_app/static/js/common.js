@@ -11,6 +11,16 @@ let midiOutput = null;
  * @param {string} preferredOutputId - 선호하는 출력 장치 ID (선택사항)
  */
 async function initMIDI(preferredOutputId = null) {
+    // Web MIDI가 없거나 ?bridge=1 (또는 localStorage midiBridge=1) 이면 서버 MIDI 브리지 사용
+    if (!navigator.requestMIDIAccess || wantMidiBridge()) {
+        const bridge = await connectMidiBridge();
+        if (bridge) {
+            midiOutput = bridge;
+            console.log('✅ 서버 MIDI 브리지 사용:', bridge.name);
+            return { success: true, outputs: [bridge], selected: bridge };
+        }
+    }
+
     try {
         if (!navigator.requestMIDIAccess) {
             throw new Error('Web MIDI API를 지원하지 않는 브라우저입니다. Chrome 또는 Edge를 사용하세요.');
@@ -234,6 +244,302 @@ function allNotesOff() {
     }
 }
 
+// ============ 서버 MIDI 브리지 ============
+
+function wantMidiBridge() {
+    return new URLSearchParams(location.search).get('bridge') === '1'
+        || localStorage.getItem('midiBridge') === '1';
+}
+
+/**
+ * 서버 MIDI 브리지 연결 (/api/midi-bridge 로 WebSocket 포트 확인) - 사용할 수 없으면 null
+ */
+async function connectMidiBridge() {
+    try {
+        const response = await fetch('/api/midi-bridge');
+        const info = await response.json();
+        if (!info.available) return null;
+        const output = new MidiBridgeOutput(`ws://${location.hostname}:${info.ws_port}/`, info.port);
+        await output.connect();
+        return output;
+    } catch (error) {
+        console.warn('MIDI 브리지 연결 실패:', error);
+        return null;
+    }
+}
+
+/**
+ * Web MIDI MIDIOutput과 같은 send(data, timestamp) 인터페이스로 서버 브리지에 전송
+ * 같은 태스크 안에서 보낸 메시지(코드, allNotesOff 등)는 WebSocket 프레임 하나로 묶는다
+ */
+class MidiBridgeOutput {
+    constructor(url, portName) {
+        this.url = url;
+        this.id = 'midi-bridge';
+        this.name = `서버 MIDI 브리지 (${portName})`;
+        this.manufacturer = 'Piano Games';
+        this.state = 'connected';
+        this.ws = null;
+        this.pending = [];
+        this.timers = new Set();
+        this.seq = 0;
+        this.lastRtt = null;
+        this.rtt = [];  // 최근 왕복 지연 (ms)
+    }
+
+    connect() {
+        return new Promise((resolve, reject) => {
+            const ws = new WebSocket(this.url);
+            ws.onopen = () => {
+                this.ws = ws;
+                this.state = 'connected';
+                resolve(this);
+            };
+            ws.onerror = () => reject(new Error('MIDI 브리지 WebSocket 연결 실패'));
+            ws.onmessage = (e) => this._onMessage(JSON.parse(e.data));
+            ws.onclose = () => {
+                if (this.ws !== ws) return;
+                // 서버가 끊으면 1초 뒤 재연결 (서버는 끊긴 연결의 노트를 모두 끈다)
+                this.state = 'disconnected';
+                this.ws = null;
+                this._reconnect();
+            };
+        });
+    }
+
+    _reconnect() {
+        setTimeout(() => this.connect().catch(() => this._reconnect()), 1000);
+    }
+
+    send(data, timestamp = 0) {
+        const delay = timestamp ? timestamp - performance.now() : 0;
+        if (delay > 2) {
+            const id = setTimeout(() => {
+                this.timers.delete(id);
+                this._queue(data);
+            }, delay);
+            this.timers.add(id);
+        } else {
+            this._queue(data);
+        }
+    }
+
+    clear() {
+        this.timers.forEach(id => clearTimeout(id));
+        this.timers.clear();
+        this.pending = [];
+    }
+
+    _queue(data) {
+        this.pending.push(Array.from(data));
+        if (this.pending.length === 1) {
+            queueMicrotask(() => this._flush());
+        }
+    }
+
+    _flush() {
+        if (!this.pending.length) return;
+        const events = this.pending;
+        this.pending = [];
+        if (!this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+
+        const message = { seq: ++this.seq, t: performance.now(), events };
+        if (this.lastRtt !== null) {
+            message.rtt = this.lastRtt;  // 서버 통계용으로 직전 왕복 지연 보고
+            this.lastRtt = null;
+        }
+        this.ws.send(JSON.stringify(message));
+    }
+
+    _onMessage(msg) {
+        if (msg.error) {
+            console.warn('MIDI 브리지 오류:', msg.error);
+        } else if (msg.ack !== undefined && typeof msg.t === 'number') {
+            this.lastRtt = Math.round((performance.now() - msg.t) * 100) / 100;
+            this.rtt.push(this.lastRtt);
+            if (this.rtt.length > 200) this.rtt.shift();
+        }
+    }
+}
+
+// ============ 서버 스트리밍 재생 ============
+
+/**
+ * 서버 스트리밍 재생 (/api/playback, Server-Sent Events)
+ * 서버가 보내는 짧은 선행 구간 이벤트만 큐에 넣고, 곧 울릴 이벤트만 MIDI 출력에 타임스탬프로 예약한다.
+ * 일시정지/탐색/정지로 서버의 epoch가 바뀌면 큐를 비우고 울리는 음을 끈다.
+ * 템포 변경(retime)은 아직 내보내지 않은 이벤트만 새 시각으로 바꿔 넣어 울리는 음과 페달을 유지한다.
+ *
+ *   const stream = new PlaybackStream({ onEnd: () => ... });
+ *   await stream.start({ music: ['C', 'song.mid'] });   // 또는 { maestro: '2004/....midi' }
+ *   stream.setTempo(1.2);                               // 잦은 호출은 자동으로 묶어서 전송
+ */
+class PlaybackStream {
+    constructor({ channel = 0, latency = 50, horizon = 100, onState = null, onEnd = null } = {}) {
+        this.channel = channel;
+        this.latency = latency;   // 네트워크 지터 여유 (ms)
+        this.horizon = horizon;   // MIDI 출력에 미리 넣어 두는 구간 (ms) - 취소 시 최대 지연
+        this.onState = onState;
+        this.onEnd = onEnd;
+        this.id = null;
+        this.source = null;
+        this.epoch = 0;
+        this.retime = 0;
+        this.offset = null;       // performance.now() - 서버 세션 시계
+        this.queue = [];          // [time, bytes, index] (performance.now 기준, 시간순, index = 서버 이벤트 번호)
+        this.outputIndex = -1;    // 출력에 넘긴 노트 온/CC 중 가장 큰 이벤트 번호
+        this.sounding = new Set(); // 출력에 노트 온을 넘긴 음
+        this.timer = null;
+        this.tempo = 1.0;
+        this.sentTempo = 1.0;
+        this.tempoTimer = null;
+        this.lastTempoSent = 0;
+    }
+
+    async start(source, { tempo = 1.0, position = 0 } = {}) {
+        this.stop();
+        const response = await fetch('/api/playback', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...source, tempo, position })
+        });
+        const info = await response.json();
+        if (!response.ok) {
+            throw new Error(info.error || `HTTP ${response.status}`);
+        }
+
+        this.id = info.id;
+        this.tempo = this.sentTempo = tempo;
+        this.source = new EventSource(info.stream);
+        this.source.addEventListener('state', e => this._onState(JSON.parse(e.data)));
+        this.source.addEventListener('notes', e => this._onNotes(JSON.parse(e.data)));
+        this.source.addEventListener('end', () => this.onEnd && this.onEnd());
+        this.timer = setInterval(() => this._pump(), 25);
+        return info;
+    }
+
+    async control(action, value = null) {
+        if (!this.id) return null;
+        const response = await fetch(`/api/playback/${this.id}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ action, value })
+        });
+        return response.ok ? response.json() : null;
+    }
+
+    /**
+     * 템포 배율 변경 - 2% 미만 변화는 무시, 150ms에 한 번만 전송 (마지막 값은 항상 반영)
+     */
+    setTempo(factor) {
+        this.tempo = factor;
+        if (!this.id || this.tempoTimer) return;
+        if (Math.abs(factor - this.sentTempo) / this.sentTempo < 0.02) return;
+
+        const wait = Math.max(0, 150 - (performance.now() - this.lastTempoSent));
+        this.tempoTimer = setTimeout(() => {
+            this.tempoTimer = null;
+            this.lastTempoSent = performance.now();
+            this.sentTempo = this.tempo;
+            this.control('tempo', this.tempo);
+        }, wait);
+    }
+
+    pause() { return this.control('pause'); }
+    resume() { return this.control('resume'); }
+    seek(seconds) { return this.control('seek', seconds); }
+
+    stop() {
+        if (this.source) this.source.close();
+        if (this.timer) clearInterval(this.timer);
+        if (this.tempoTimer) clearTimeout(this.tempoTimer);
+        if (this.id) {
+            fetch(`/api/playback/${this.id}`, { method: 'DELETE' }).catch(() => {});
+        }
+        this._cancel();
+        this.id = this.source = this.timer = this.tempoTimer = null;
+        this.offset = null;
+    }
+
+    _onState(state) {
+        this._sync(state.now);
+        if (state.epoch !== this.epoch) {
+            this.epoch = state.epoch;
+            this.retime = state.retime;
+            this._cancel();
+        } else if (state.retime !== this.retime) {
+            this.retime = state.retime;
+            this._retime(state.cursor);
+        }
+        if (this.onState) this.onState(state);
+    }
+
+    _onNotes(batch) {
+        // 이전 epoch/retime의 늦게 도착한 구간
+        if (batch.epoch !== this.epoch || batch.retime !== this.retime) return;
+        this._sync(batch.now);
+        const base = this.offset + this.latency;
+        const noteOn = 0x90 + this.channel;
+        const cc = 0xB0 + this.channel;
+        for (let i = 0; i < batch.at.length; i++) {
+            const index = batch.index + i;
+            if (index <= this.outputIndex) continue;  // 템포 변경 전에 이미 출력에 넘긴 이벤트
+            const at = batch.at[i] + base;
+            if (batch.type[i] === 1) {
+                this.queue.push([at, [cc, batch.pitch[i], batch.vel[i]], index]);
+            } else {
+                this.queue.push([at, [noteOn, batch.pitch[i], batch.vel[i]], index]);
+                this.queue.push([at + batch.dur[i], [noteOn, batch.pitch[i], 0], index]);
+            }
+        }
+        this.queue.sort((a, b) => a[0] - b[0]);
+    }
+
+    _sync(serverNow) {
+        // 전송 지연이 가장 작았던 메시지 기준으로 시계 차이 추정
+        const offset = performance.now() - serverNow;
+        if (this.offset === null || offset < this.offset) this.offset = offset;
+    }
+
+    _pump() {
+        if (!midiOutput) return;
+        const until = performance.now() + this.horizon;
+        let n = 0;
+        while (n < this.queue.length && this.queue[n][0] <= until) {
+            const [time, bytes, index] = this.queue[n++];
+            midiOutput.send(bytes, time);
+            if ((bytes[0] & 0xF0) === 0x90 && bytes[2] === 0) {
+                this.sounding.delete(bytes[1]);
+            } else {
+                if ((bytes[0] & 0xF0) === 0x90) this.sounding.add(bytes[1]);
+                this.outputIndex = Math.max(this.outputIndex, index);
+            }
+        }
+        if (n) this.queue.splice(0, n);
+    }
+
+    _retime(cursor) {
+        // 서버가 cursor 번째 이벤트부터 새 템포 시각으로 다시 보낸다 - 그 이후의 아직 내보내지 않은
+        // 노트 온/CC와 그 노트 오프만 버린다 (이미 울리는 음의 노트 오프는 그대로 둔다)
+        this.queue = this.queue.filter(([, bytes, index]) =>
+            index < cursor || (index <= this.outputIndex && (bytes[0] & 0xF0) === 0x90 && bytes[2] === 0));
+    }
+
+    _cancel() {
+        // 아직 보내지 않은 큐는 버리고, 출력에 넘긴 노트는 즉시 끈다
+        this.queue = [];
+        this.outputIndex = -1;
+        if (midiOutput) {
+            const now = performance.now() + this.horizon + 1;  // 예약된 노트 온 이후에 도착하도록
+            for (const pitch of this.sounding) {
+                midiOutput.send([0x80 + this.channel, pitch, 0], now);
+            }
+            midiOutput.send([0xB0 + this.channel, 64, 0], now);
+        }
+        this.sounding.clear();
+    }
+}
+
 // ============ 카메라 유틸리티 ============
 
 /**
@@ -266,12 +572,22 @@ async function getAudioStream(constraints = { audio: true }) {
 
 // ============ CSV 로더 ============
 
+/**
+ * /static 경로를 빌드된 해시 파일명 URL로 변환 (manifest가 없으면 그대로)
+ * 템플릿에서 window.ASSET_MANIFEST = {'data/chord.CSV': '/assets/chord.<hash>.CSV', ...} 주입
+ */
+function assetUrl(url) {
+    const manifest = window.ASSET_MANIFEST || {};
+    const key = url.replace(/^\/static\//, '');
+    return manifest[key] || url;
+}
+
 /**
  * CSV 파일 로드 및 파싱
  */
 async function loadCSV(url) {
     try {
-        const response = await fetch(url);
+        const response = await fetch(assetUrl(url));
         const text = await response.text();
 
         // 간단한 CSV 파싱 (헤더 없음)
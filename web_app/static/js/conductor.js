@@ -21,6 +21,12 @@ let isPlaying = false;
 let baseBPM = 120;
 let midiPlaybackInterval = null;
 
+// 서버 곡 스트리밍 재생 (/api/playback) - 파싱 없이 템포 배율만 서버로 보낸다
+let serverMidi = null;  // [key, filename]
+const playbackStream = new PlaybackStream({
+    onEnd: () => playbackStream.seek(0)  // 끝나면 처음부터 다시 (업로드 파일 재생과 동일)
+});
+
 // 프레임 차이 계산용
 let prevFrame = null;
 
@@ -74,8 +80,10 @@ window.addEventListener('load', async () => {
             return;
         }
 
-        // 새 파일 선택됨
+        // 새 파일 선택됨 (서버 곡 선택은 해제)
         selectedMidiFile = file;
+        serverMidi = null;
+        document.getElementById('serverMidiSelect').value = '';
         updateMidiFileLabel(file.name);
 
         // MIDI 파일 읽기
@@ -121,6 +129,22 @@ window.addEventListener('load', async () => {
         reader.readAsArrayBuffer(file);
     });
 
+    // 서버 MusicRoot 곡 목록
+    const serverSelect = document.getElementById('serverMidiSelect');
+    loadServerMidiList(serverSelect);
+    serverSelect.addEventListener('change', (e) => {
+        if (!e.target.value) {
+            serverMidi = null;
+            return;
+        }
+        serverMidi = JSON.parse(e.target.value);
+        // 업로드 파일보다 서버 곡을 우선
+        selectedMidiFile = null;
+        parsedMidiData = null;
+        midiFileInput.value = '';
+        updateMidiFileLabel(`${serverMidi[0]} / ${serverMidi[1]} (서버)`);
+    });
+
     // 파일 선택 레이블 업데이트 함수
     function updateMidiFileLabel(filename) {
         if (midiFileLabel) {
@@ -130,6 +154,24 @@ window.addEventListener('load', async () => {
     }
 });
 
+async function loadServerMidiList(select) {
+    try {
+        const response = await fetch('/api/midi-files');
+        if (!response.ok) return;
+        const listing = await response.json();
+        Object.entries(listing).forEach(([key, files]) => {
+            files.forEach(filename => {
+                const option = document.createElement('option');
+                option.value = JSON.stringify([key, filename]);
+                option.textContent = `${key} / ${filename}`;
+                select.appendChild(option);
+            });
+        });
+    } catch (error) {
+        console.warn('서버 MIDI 목록 로드 실패:', error);
+    }
+}
+
 // ============ 세션 제어 ============
 
 async function startSession() {
@@ -163,7 +205,11 @@ async function startSession() {
         // MIDI 재생 타이머 초기화
         lastMidiUpdateTime = Date.now();
 
-        if (parsedMidiData) {
+        if (serverMidi) {
+            playbackStream.start({ music: serverMidi }, { tempo: 0.5 })
+                .then(() => showSuccess(`재생 중: ${serverMidi[1]} (서버 스트리밍, 움직임으로 템포 조절)`))
+                .catch(error => showError('스트리밍 시작 실패: ' + error.message));
+        } else if (parsedMidiData) {
             showSuccess(`재생 중: ${selectedMidiFile.name} (움직임으로 템포 조절)`);
         } else {
             showSuccess('재생 중... 움직여보세요!');
@@ -196,6 +242,8 @@ function stopSession() {
         animationId = null;
     }
 
+    playbackStream.stop();
+
     // MIDI 재생 상태 초기화
     midiPlaybackStartTime = null;
     midiPlaybackPosition = 0;
@@ -261,7 +309,10 @@ function processFrame(video) {
         }
 
         // MIDI 출력
-        if (parsedMidiData) {
+        if (serverMidi) {
+            // 서버 스트리밍: 템포 배율만 전송 (잦은 변화는 PlaybackStream이 묶어서 보냄)
+            playbackStream.setTempo(clamp(currentBPM / baseBPM, 0.25, 4.0));
+        } else if (parsedMidiData) {
             // MIDI 파일이 있으면 모션으로 재생 제어
             playMidiWithMotion(currentBPM);
         } else {
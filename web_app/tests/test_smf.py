@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+smf 파서 - 잘리거나 반쯤 복사된 .mid 파일은 struct.error가 아니라 MidiFormatError
+(web_app 폴더에서: python -m pytest tests)
+"""
+
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import smf  # noqa: E402
+from music_catalog import MusicCatalog  # noqa: E402
+
+
+def _sample():
+    track = [
+        smf.tempo_event(120),
+        smf.Event(0, 0x90, bytes((60, 100)), None),
+        smf.Event(480, 0x80, bytes((60, 0)), None),
+        smf.Event(0, 0xFF, b'', smf.META_END_OF_TRACK),
+    ]
+    return smf.serialize(smf.MidiFile(0, 480, [track]))
+
+
+def test_roundtrip():
+    assert smf.summarize(smf.parse(_sample()))['notes'] == 1
+
+
+@pytest.mark.parametrize('cut', [6, 13, 23, 24, 26, 31, 36])
+def test_truncated_file_raises_format_error(cut):
+    with pytest.raises(smf.MidiFormatError):
+        smf.parse(_sample()[:cut])
+
+
+@pytest.mark.parametrize('event', [
+    b'\x00\xff\x03\x10ab',     # 트랙 이름 16바이트라고 하고 2바이트만
+    b'\x00\xf0\x05\x7e\x7f',  # sysex 5바이트라고 하고 2바이트만
+])
+def test_meta_or_sysex_past_chunk_end_raises_format_error(event):
+    data = b'MThd' + bytes((0, 0, 0, 6, 0, 0, 0, 1, 1, 0xE0)) + b'MTrk' + len(event).to_bytes(4, 'big') + event
+    with pytest.raises(smf.MidiFormatError):
+        smf.parse(data)
+
+
+def test_any_prefix_parses_or_raises_format_error():
+    data = _sample()
+    for cut in range(len(data)):
+        try:
+            smf.summarize(smf.parse(data[:cut]))
+        except smf.MidiFormatError:
+            pass
+
+
+def test_catalog_survives_truncated_file(tmp_path):
+    key_dir = tmp_path / 'C'
+    key_dir.mkdir()
+    (key_dir / 'ok.mid').write_bytes(_sample())
+    (key_dir / 'broken.mid').write_bytes(b'MThd\x00\x00')
+
+    catalog = MusicCatalog(tmp_path)
+    catalog.refresh(force=True)
+    assert catalog.listing() == {'C': ['broken.mid', 'ok.mid']}
+
+
+def test_catalog_rescans_folder_after_failed_scan(tmp_path, monkeypatch):
+    key_dir = tmp_path / 'C'
+    key_dir.mkdir()
+    (key_dir / 'ok.mid').write_bytes(_sample())
+    catalog = MusicCatalog(tmp_path)
+
+    def fail(*args):
+        raise RuntimeError('scan failed')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(catalog, '_scan_key', fail)
+        with pytest.raises(RuntimeError):
+            catalog.refresh(force=True)
+    catalog.refresh(force=True)
+    assert catalog.listing() == {'C': ['ok.mid']}